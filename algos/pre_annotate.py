@@ -2,44 +2,112 @@ import glob
 import json
 import math
 import os
+import threading
 
 import numpy as np
-import tensorflow as tf
-
-from . import util
-
-util.config_gpu()
 
 
 RESAMPLE_NUM = 10
 
 model_file = "./algos/models/deep_annotation_inference.h5"
 
-rotation_model = tf.keras.models.load_model(model_file)
-rotation_model.summary()
+# tensorflow and the model are loaded on first use, see get_rotation_model
+rotation_model = None
+_model_lock = threading.Lock()
 
 NUM_POINT=512
 
-def sample_one_obj(points, num):
-    if points.shape[0] < NUM_POINT:
-        return np.concatenate([points, np.zeros((NUM_POINT-points.shape[0], 3), dtype=np.float32)], axis=0)
-    else:
-        idx = np.arange(points.shape[0])
-        np.random.shuffle(idx)
-        return points[idx[0:num]]
+# per request limits checked by the predict_rotation routes: input points, and
+# objects (each one becomes a (RESAMPLE_NUM, NUM_POINT, 3) float32 input, ~60KB)
+MAX_PACKED_POINTS = 4000000
+MAX_PACKED_OBJECTS = 1024
+# max random keys drawn at once by sample_packed (float32 keys + int64 partition)
+SAMPLE_KEY_BUDGET = 1 << 22
+
+def get_rotation_model():
+    global rotation_model
+    if rotation_model is None:
+        with _model_lock:
+            if rotation_model is None:
+                import tensorflow as tf
+
+                from . import util
+
+                util.config_gpu()
+                rotation_model = tf.keras.models.load_model(model_file)
+    return rotation_model
+
+def warmup():
+    """load the model and run one prediction so the first request is fast"""
+    predict_yaw(np.random.random([1000,3]))
+
+rng = np.random.default_rng()
+
+def sample_packed(points, offsets, num=NUM_POINT, resample_num=RESAMPLE_NUM):
+    """resample many objects at once
+
+    points: (N,3) points of all objects, object i is points[offsets[i]:offsets[i+1]]
+    returns (len(offsets)-1, resample_num, num, 3) float32; objects with at least
+    num points get resample_num random subsets of num points, smaller objects
+    keep their points in order and are zero padded
+    """
+    points = np.asarray(points, dtype=np.float32).reshape((-1,3))
+    offsets = np.asarray(offsets, dtype=np.int64)
+    counts = np.diff(offsets)
+
+    # point index of every output slot, slots >= count are padding
+    idx = np.empty((len(counts), resample_num, num), dtype=np.int64)
+    idx[:] = np.arange(num)
+    # large objects, grouped by point count: a group gets one draw for all its
+    # views (the num smallest random keys of each view, keys past an object's
+    # own points never win), with the key array kept under SAMPLE_KEY_BUDGET;
+    # an object too big for the budget is drawn view by view
+    large = np.flatnonzero(counts >= num)
+    large = large[np.argsort(counts[large], kind="stable")]
+    start = 0
+    while start < len(large):
+        end = start + 1
+        while end < len(large) and (end - start + 1) * resample_num * counts[large[end]] <= SAMPLE_KEY_BUDGET:
+            end += 1
+        group = large[start:end]
+        group_counts = counts[group]
+        width = int(group_counts.max())
+        if len(group) * resample_num * width > SAMPLE_KEY_BUDGET:
+            for view in idx[group[0]]:
+                view[:] = rng.choice(width, num, replace=False)
+        else:
+            keys = rng.random((len(group), resample_num, width), dtype=np.float32)
+            np.copyto(keys, 2.0, where=np.arange(width) >= group_counts[:,None,None])
+            idx[group] = np.argpartition(keys, num-1, axis=-1)[..., :num]
+        start = end
+
+    out = np.zeros((len(counts), resample_num, num, 3), dtype=np.float32)
+    valid = idx < counts[:,None,None]
+    out[valid] = points[(offsets[:-1,None,None] + idx)[valid]]
+    return out
+
+def check_packed_size(n_points, n_obj):
+    """raise ValueError when a request is over MAX_PACKED_POINTS / MAX_PACKED_OBJECTS"""
+    if n_points > MAX_PACKED_POINTS:
+        raise ValueError("too many points: {} > {}".format(n_points, MAX_PACKED_POINTS))
+    if n_obj > MAX_PACKED_OBJECTS:
+        raise ValueError("too many objects: {} > {}".format(n_obj, MAX_PACKED_OBJECTS))
+
+def predict_yaw_packed(points, offsets):
+    """predict yaw for objects packed as one (N,3) array plus offsets, one model call"""
+    offsets = np.asarray(offsets, dtype=np.int64)
+    input_data = sample_packed(points, offsets)
+    n_obj = len(offsets) - 1
+    pred_val = get_rotation_model().predict(input_data.reshape((n_obj*RESAMPLE_NUM, NUM_POINT, 3)))
+    pred_cls = np.argmax(pred_val, axis=-1).reshape((n_obj, RESAMPLE_NUM))
+
+    return [[0,0,float((cls[0]*3+1.5)*np.pi/180.)] for cls in pred_cls]
 
 def predict_yaw(points):
-    points = np.array(points).reshape((-1,3))
-    input_data = np.stack([x for x in map(lambda x: sample_one_obj(points, NUM_POINT), range(RESAMPLE_NUM))], axis=0)
-    pred_val = rotation_model.predict(input_data)
-    pred_cls = np.argmax(pred_val, axis=-1)
-    print(pred_cls)
-    
-    ret = (pred_cls[0]*3+1.5)*np.pi/180.
-    ret =[0,0,ret]
-    print(ret)
-
-    return ret
-
-# warmup the model
-predict_yaw(np.random.random([1000,3]))
+    return predict_yaw_batch([points])[0]
+
+def predict_yaw_batch(points_list):
+    """predict yaw for several objects with a single model call"""
+    points_list = [np.asarray(p, dtype=np.float32).reshape((-1,3)) for p in points_list]
+    offsets = np.concatenate([[0], np.cumsum([len(p) for p in points_list])])
+    return predict_yaw_packed(np.concatenate(points_list, axis=0), offsets)
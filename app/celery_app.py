@@ -13,6 +13,8 @@ celery_app = Celery(
     include=[
         "app.tasks.export_tasks",  # 导出任务模块
         "app.tasks.project_tasks",  # 项目任务模块
+        "app.tasks.label_check_tasks",  # 标注检查任务模块
+        "app.tasks.trajectory_tasks",  # 轨迹处理任务模块
     ],
 )
 
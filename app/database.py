@@ -1,13 +1,61 @@
 from sqlmodel import SQLModel, create_engine, Session
-import sqlite3
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Engine
+import os
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-DATABASE_URL = "sqlite:///./database.db"
+# 可通过环境变量使用外部数据库（如 postgresql://...），默认本地 SQLite
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./database.db")
+# 连接池大小：uvicorn / Celery 每个进程各自持有一个连接池
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+# SQLite 写锁等待时间（毫秒），超时才报 database is locked
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+
+def create_db_engine(url: str = DATABASE_URL, wal: bool = True) -> Engine:
+    """
+    创建数据库引擎
+
+    SQLite 使用 WAL 日志：写入不阻塞读取，多个进程（uvicorn / Celery）共用同一个
+    数据库文件时读请求不再等待写事务；busy_timeout 让并发写入排队而不是立即失败。
+    """
+    if not url.startswith("sqlite"):
+        return create_engine(
+            url,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_pre_ping=True,
+            pool_recycle=1800,
+        )
+
+    engine = create_engine(
+        url,
+        connect_args={
+            "check_same_thread": False,
+            "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000,
+        },
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+    )
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragma(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if wal:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            # WAL 下 NORMAL 仍保证一致性，只在断电时可能丢失最后的事务
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.close()
+
+    return engine
+
+
+engine = create_db_engine()
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
@@ -16,23 +64,13 @@ def check_and_create_tables():
     """检查表是否存在，如果不存在则创建"""
     try:
         # 检查是否存在project表
-        conn = sqlite3.connect("./database.db")
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT name FROM sqlite_master 
-            WHERE type='table' AND name='project';
-        """)
-        
-        if not cursor.fetchone():
+        if not inspect(engine).has_table("project"):
             logger.info("Database tables not found, creating...")
             SQLModel.metadata.create_all(engine)
             logger.info("Database tables created successfully")
         else:
             logger.info("Database tables already exist")
-            
-        conn.close()
-        
+
     except Exception as e:
         logger.error(f"Error checking/creating database tables: {e}")
         # 如果检查失败，尝试创建表
@@ -45,4 +83,4 @@ def check_and_create_tables():
 
 def get_session():
     with Session(engine) as session:
-        yield session
\ No newline at end of file
+        yield session
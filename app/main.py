@@ -6,9 +6,12 @@ from fastapi.templating import Jinja2Templates
 from fastapi.requests import Request
 from contextlib import asynccontextmanager
 
+from algos import pre_annotate
 from app.database import check_and_create_tables
+from app.services.inference_service import rotation_worker
 
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
@@ -18,9 +21,14 @@ async def lifespan(app: FastAPI):
     # 启动时执行
     logger.info("Starting up application...")
     check_and_create_tables()
+    # 朝向预测模型默认在首次请求时加载；需要时可在启动阶段预热
+    if os.getenv("ROTATION_MODEL_WARMUP", "false").lower() in ("1", "true", "yes"):
+        logger.info("Warming up rotation model...")
+        await rotation_worker.run(pre_annotate.warmup)
     yield
     # 关闭时执行（如果需要的话）
     logger.info("Shutting down application...")
+    await rotation_worker.stop()
 
 app = FastAPI(
     title="NextPoints_API",
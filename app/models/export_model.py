@@ -39,6 +39,7 @@ class ExportOptions(BaseModel):
     include_sweeps: bool = True
     include_ego_pose: bool = True
     output_format: str = "zip"  # zip, tar.gz
+    incremental: bool = True  # 仅重新导出自上次导出以来变化的帧
 
 class NuScenesExportRequest(BaseModel):
     """NuScenes 导出请求模型"""
@@ -47,6 +48,19 @@ class NuScenesExportRequest(BaseModel):
     annotation_filter: Optional[AnnotationFilter] = None
     export_options: Optional[ExportOptions] = None
 
+class MultiSceneExportRequest(NuScenesExportRequest):
+    """多项目分片 NuScenes 导出请求模型"""
+    project_names: List[str] = Field(min_length=1, description="参与导出的项目列表")
+    output_project: Optional[str] = Field(default=None, description="导出结果写入该项目的存储桶，默认第一个项目")
+    shard_size: int = Field(default=200, ge=1, description="每个分片处理的帧数")
+
+class KittiExportRequest(BaseModel):
+    """KITTI 导出请求模型"""
+    export_format: ExportFormat = ExportFormat.KITTI
+    camera_channel: Optional[str] = Field(default=None, description="导出为 image_2 的相机通道，默认第一个相机")
+    annotation_filter: Optional[AnnotationFilter] = None
+    export_options: Optional[ExportOptions] = None
+
 class ExportTaskResponse(BaseModel):
     """导出任务创建响应"""
     task_id: str
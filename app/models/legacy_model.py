@@ -8,6 +8,10 @@ from pydantic import BaseModel
 class PointCloudRequest(BaseModel):
     points: List[List[float]]  # N x 3 数组，每个点是 [x, y, z]
 
+class PointCloudBatchRequest(BaseModel):
+    points: str  # base64 编码的 float32 小端数组，所有目标的点依次排列 (x, y, z)
+    offsets: List[int]  # 第 i 个目标为点 offsets[i] 到 offsets[i+1]，长度为目标数 + 1
+
 class FrameRequest(BaseModel):
     scene: str  # 项目名称
     frame: str  # 帧ID
\ No newline at end of file
@@ -0,0 +1,21 @@
+"""
+轨迹处理相关的 Pydantic 模型
+"""
+from typing import Optional, List
+from pydantic import BaseModel, Field, field_validator
+
+
+class TrajectorySmoothRequest(BaseModel):
+    """整个场景的批量轨迹插值 / 平滑配置"""
+    obj_ids: Optional[List[str]] = Field(default=None, description="只处理这些目标，默认全部")
+    interpolate: bool = Field(default=True, description="填补轨迹中间缺失的帧")
+    max_gap: Optional[int] = Field(default=None, ge=1, description="只填补不超过该帧数的缺口")
+    window: int = Field(default=1, ge=1, description="滑动平均窗口帧数（奇数），1 表示不平滑")
+    extrapolate_frames: int = Field(default=0, ge=0, description="在轨迹首尾之外外推的帧数")
+
+    @field_validator("window")
+    @classmethod
+    def window_must_be_odd(cls, v):
+        if v % 2 == 0:
+            raise ValueError("window must be odd")
+        return v
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, HTTPException
 from fastapi import APIRouter, Request, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 from typing import List
+import base64
 import numpy as np
 from typing import List, Optional, Any, Union
 from sqlmodel import SQLModel, create_engine, Session, select
@@ -12,8 +13,16 @@ from nextpoints_sdk.models.annotation import AnnotationItem
 from nextpoints_sdk.models.project import Project
 
 from algos import pre_annotate
-from app.models.legacy_model import PointCloudRequest, FrameRequest
+from app.services.inference_service import rotation_worker
+from app.models.legacy_model import (
+    PointCloudRequest,
+    PointCloudBatchRequest,
+    FrameRequest,
+)
 from app.services.s3_service import S3Service
+from app.services.project_cache import project_cache
+from app.services import http_cache
+from app.services.json_response import json_response
 from app.database import get_session
 
 router = APIRouter()
@@ -27,24 +36,108 @@ async def read_root():
     return {"message": "Welcome to the legacy API"}
 
 
-@router.post("/predict_rotation")
-async def predict_rotation(data: PointCloudRequest):
+@router.post(
+    "/predict_rotation",
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "application/octet-stream": {
+                    "schema": {"type": "string", "format": "binary"}
+                },
+                "application/json": {"schema": PointCloudRequest.model_json_schema()},
+            },
+            "required": True,
+        }
+    },
+)
+async def predict_rotation(request: Request):
+    """
+    预测单个目标的朝向
+
+    请求体为 application/octet-stream 时按 float32 小端 Nx3 数组解析（不经过
+    JSON），否则按 PointCloudRequest JSON 解析
+    """
     try:
-        # 检查维度是否符合 Nx3
-        points_array = np.array(data.points)
+        body = await request.body()
+        content_type = request.headers.get("content-type", "")
+        if content_type.startswith("application/octet-stream"):
+            if len(body) % 12 != 0:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Binary body must be Nx3 little-endian float32 values.",
+                )
+            points_array = np.frombuffer(body, dtype="<f4").reshape((-1, 3))
+        else:
+            data = PointCloudRequest.model_validate_json(body)
+            points_array = np.array(data.points)
 
+        # 检查维度是否符合 Nx3
         if points_array.ndim != 2 or points_array.shape[1] != 3:
             raise HTTPException(
                 status_code=400, detail="Input must be Nx3 point cloud data."
             )
+        try:
+            pre_annotate.check_packed_size(len(points_array), 1)
+        except ValueError as e:
+            raise HTTPException(status_code=413, detail=str(e))
 
-        angle = pre_annotate.predict_yaw(points_array)
+        # 并发请求在推理工作器中合并为一次模型调用
+        angle = await rotation_worker.submit(points_array)
 
         return {"angle": angle}
+    except HTTPException:
+        raise
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors())
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
 
+@router.post("/predict_rotation_batch")
+async def predict_rotation_batch(data: PointCloudBatchRequest):
+    """
+    一次请求预测多个目标的朝向，所有目标的点打包为一个 float32 数组
+    """
+    try:
+        points_array = np.frombuffer(base64.b64decode(data.points), dtype="<f4")
+        offsets = np.array(data.offsets, dtype=np.int64)
+        if points_array.size % 3 != 0:
+            raise HTTPException(
+                status_code=400, detail="Points buffer must contain Nx3 float32 values."
+            )
+        points_array = points_array.reshape((-1, 3))
+        if (
+            len(offsets) < 2
+            or offsets[0] != 0
+            or offsets[-1] != len(points_array)
+            or np.any(np.diff(offsets) < 0)
+        ):
+            raise HTTPException(
+                status_code=400,
+                detail="Offsets must start at 0, be non-decreasing and end at the number of points.",
+            )
+        try:
+            pre_annotate.check_packed_size(len(points_array), len(offsets) - 1)
+        except ValueError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+
+        angles = await rotation_worker.run(
+            pre_annotate.predict_yaw_packed, points_array, offsets
+        )
+
+        return {"angles": angles}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+
+
+@router.get("/predict_rotation/metrics")
+async def predict_rotation_metrics():
+    """推理工作器的队列深度与批大小统计"""
+    return rotation_worker.metrics()
+
+
 @router.get("/auto_annotate")
 async def auto_annotate():
     # 这里实现自动标注的逻辑
@@ -55,18 +148,21 @@ async def auto_annotate():
 async def load_annotation(
     scene: str,
     frame: str,
+    request: Request,
     session: Session = Depends(get_session),
 ):
     """
     加载指定 scene + frame 的标注数据。
     返回 JSON,前端 xhr.responseText 仍是字符串，能被 anno_to_boxes() 使用。
+
+    ETag 直接使用标注文件的 S3 ETag，浏览器带 If-None-Match 重新请求时由 S3
+    条件读取判断是否变化，未变化返回 304。标注只在读取时校验一次，直接序列化
+    返回，不再按 response_model 重复校验。
     """
     try:
         # 1. check scene 和 frame 是否有效
         project_name = scene
-        project: Optional[Project] = session.exec(
-            select(Project).where(Project.name == project_name)
-        ).first()
+        project: Optional[Project] = project_cache.get(project_name, session)
         if not project:
             raise HTTPException(
                 status_code=404, detail=f"Project not found: {project_name}"
@@ -82,16 +178,25 @@ async def load_annotation(
 
         # 3. load annotation data
         annotation_key = f"{project_name}/nextpoints/label/{frame}.json"
-        # check if annotation_key exists
+        if_none_match = request.headers.get("if-none-match")
+        # S3 条件读取只支持单个 ETag
+        client_etags = http_cache.parse_etags(if_none_match)
+        s3_etag = (
+            client_etags[0]
+            if len(client_etags) == 1 and client_etags[0] != http_cache.MISSING_ETAG
+            else None
+        )
         try:
-            if not s3_service.object_exists(project.bucket_name, annotation_key):
-                return []
-            # read JSON object from S3
-            annotation_data = s3_service.read_json_object(
-                project.bucket_name, annotation_key
+            # read JSON object from S3, missing object -> (None, None)
+            annotation_data, etag = s3_service.read_json_object_if_none_match(
+                project.bucket_name, annotation_key, s3_etag
             )
+            etag = etag or http_cache.MISSING_ETAG
+            if http_cache.etag_matches(if_none_match, etag):
+                return http_cache.not_modified(etag)
+            headers = http_cache.cache_headers(etag)
             if not annotation_data:
-                return []
+                return json_response(request, [], headers=headers)
         except Exception as e:
             raise HTTPException(
                 status_code=404,
@@ -99,7 +204,7 @@ async def load_annotation(
             )
         # 4. convert to AnnotationItem list
         annotations = [AnnotationItem(**item) for item in annotation_data]
-        return annotations
+        return json_response(request, annotations, headers=headers)
     except Exception as e:
         logger.exception("Unexpected error in load_annotation")
         raise
@@ -1,7 +1,18 @@
-from fastapi import APIRouter, HTTPException, Depends, status, BackgroundTasks
-from fastapi.responses import FileResponse
+from fastapi import (
+    APIRouter,
+    HTTPException,
+    Depends,
+    status,
+    BackgroundTasks,
+    Request,
+    Query,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlmodel import Session, select
 from typing import List, Optional, Dict, Any
+import asyncio
+import json
 import logging
 
 from nextpoints_sdk.models.project_metadata import ProjectMetadataResponse
@@ -19,10 +30,18 @@ from app.database import get_session
 
 from app.models.export_model import (
     NuScenesExportRequest,
+    MultiSceneExportRequest,
+    KittiExportRequest,
     ExportTaskResponse,
+    ExportTaskStatus,
 )
 
+from app.models.trajectory_model import TrajectorySmoothRequest
 from app.services import project_service
+from app.services.project_cache import project_cache
+from app.services import http_cache
+from app.services.json_response import json_response
+from app.services import points_service
 from app.services.export_service import export_service
 
 import tools.project_metadata as pm
@@ -31,6 +50,14 @@ import tools.project_metadata as pm
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# 标注检查事件流轮询间隔（秒）
+LABEL_CHECK_EVENT_INTERVAL = 0.5
+# 单个标注检查事件流的最长保持时间（秒），超时后关闭，客户端可带 offset 重连
+LABEL_CHECK_EVENT_MAX_SECONDS = 600
+
+# 点云转换结果只随源 PCD 变化，浏览器在该时间内直接使用本地缓存
+POINTS_CACHE_CONTROL = "private, max-age=3600"
+
 
 @router.post("/", response_model=ProjectCreateResponse)
 async def create_project(
@@ -68,7 +95,10 @@ async def save_world_list(
     保存世界帧的标注数据
     """
     try:
-        saved_count = project_service.save_world_list(request, session)
+        # 上传标注与更新快照都在线程池中进行，不阻塞事件循环
+        saved_count = await run_in_threadpool(
+            project_service.save_world_list, request, session
+        )
         if saved_count == 0:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -125,7 +155,7 @@ async def get_project(project_name: str, session: Session = Depends(get_session)
     """
     获取单个项目详情
     """
-    project = session.exec(select(Project).where(Project.name == project_name)).first()
+    project = project_cache.get(project_name, session)
 
     if not project:
         raise HTTPException(
@@ -143,19 +173,31 @@ async def get_project(project_name: str, session: Session = Depends(get_session)
 
 @router.get("/{project_name}/metadata", response_model=ProjectMetadataResponse)
 async def get_project_metadata(
-    project_name: str, session: Session = Depends(get_session)
+    project_name: str,
+    request: Request,
+    session: Session = Depends(get_session),
 ):
     """
     获取项目完整元数据,包括所有帧信息和预签名URL
+
+    支持 If-None-Match：来源对象均未变化时返回 304，不读取任何标注/位姿文件。
+    元数据生成时已校验，直接序列化并按 Accept-Encoding 压缩返回。
     """
     try:
-        project_metadata = pm.get_project_metadata(project_name, session)
-        if not project_metadata:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Project metadata not found",
-            )
-        return project_metadata
+        project_metadata, etag = pm.get_project_metadata_if_none_match(
+            project_name, session, request.headers.get("if-none-match")
+        )
+        if project_metadata is None:
+            return http_cache.not_modified(etag)
+        # 数 MB 的序列化与压缩放到线程池，不阻塞事件循环
+        return await run_in_threadpool(
+            json_response,
+            request,
+            project_metadata,
+            headers=http_cache.cache_headers(etag),
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to get project metadata: {e}")
         raise HTTPException(
@@ -164,6 +206,65 @@ async def get_project_metadata(
         )
 
 
+@router.get("/{project_name}/frames/{timestamp}/points")
+async def get_frame_points(
+    project_name: str,
+    timestamp: str,
+    request: Request,
+    channel: str = "lidar-fusion",
+    min_x: Optional[float] = None,
+    min_y: Optional[float] = None,
+    min_z: Optional[float] = None,
+    max_x: Optional[float] = None,
+    max_y: Optional[float] = None,
+    max_z: Optional[float] = None,
+    voxel_size: Optional[float] = Query(None, gt=0),
+    max_points: Optional[int] = Query(None, gt=0),
+    session: Session = Depends(get_session),
+):
+    """
+    获取帧点云的紧凑二进制格式（float32 xyz + uint8 intensity，格式见
+    tools/compact_points.py），可选按包围盒裁剪、体素降采样与限制点数
+
+    支持 Range / If-Range 分段下载与 If-None-Match
+    """
+    try:
+        project = project_cache.get(project_name, session)
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+
+        bounds = (min_x, min_y, min_z, max_x, max_y, max_z)
+        path, etag, count = await run_in_threadpool(
+            points_service.load_frame_points,
+            project,
+            timestamp,
+            channel,
+            bounds if any(b is not None for b in bounds) else None,
+            voxel_size,
+            max_points,
+            request.headers.get("if-none-match"),
+        )
+        if path is None:
+            return http_cache.not_modified(etag, POINTS_CACHE_CONTROL)
+
+        return FileResponse(
+            path,
+            media_type="application/octet-stream",
+            headers={
+                **http_cache.cache_headers(etag, POINTS_CACHE_CONTROL),
+                "X-Point-Count": str(count),
+            },
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get frame points: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get frame points: {str(e)}",
+        )
+
+
 @router.get("/{project_name}/check_label", response_model=List[Dict[str, Any]])
 async def get_label_check(project_name: str, session: Session = Depends(get_session)):
     """
@@ -185,6 +286,206 @@ async def get_label_check(project_name: str, session: Session = Depends(get_sess
         )
 
 
+@router.post("/{project_name}/check_label/tasks", response_model=Dict[str, Any])
+async def start_label_check_task(
+    project_name: str, session: Session = Depends(get_session)
+):
+    """
+    启动后台标注检查任务，检查消息通过任务查询 / 事件流接口逐步返回
+    """
+    try:
+        return project_service.start_label_check_task(project_name, session)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to start label check task: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to start label check task: {str(e)}",
+        )
+
+
+@router.get(
+    "/{project_name}/check_label/tasks/{task_id}", response_model=Dict[str, Any]
+)
+async def get_label_check_task(project_name: str, task_id: str, offset: int = 0):
+    """
+    查询后台标注检查任务进度，返回 offset 之后的新检查消息
+    """
+    try:
+        return await run_in_threadpool(
+            project_service.get_label_check_task, task_id, offset, project_name
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get label check task {task_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get label check task: {str(e)}",
+        )
+
+
+@router.get("/{project_name}/check_label/tasks/{task_id}/events")
+async def stream_label_check_task(project_name: str, task_id: str, offset: int = 0):
+    """
+    以 Server-Sent Events 推送后台标注检查的进度和新检查消息，任务结束或
+    超过 LABEL_CHECK_EVENT_MAX_SECONDS 后关闭
+    """
+    # 在开始推送前校验任务，未知任务直接返回 404 而不是一直轮询
+    try:
+        progress = await run_in_threadpool(
+            project_service.get_label_check_task, task_id, offset, project_name
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get label check task {task_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get label check task: {str(e)}",
+        )
+
+    async def events(progress):
+        deadline = asyncio.get_running_loop().time() + LABEL_CHECK_EVENT_MAX_SECONDS
+        while True:
+            yield f"data: {json.dumps(progress, default=str)}\n\n"
+            if progress["done"] or asyncio.get_running_loop().time() >= deadline:
+                break
+            await asyncio.sleep(LABEL_CHECK_EVENT_INTERVAL)
+            try:
+                progress = await run_in_threadpool(
+                    project_service.get_label_check_task,
+                    task_id,
+                    progress["next_offset"],
+                    project_name,
+                )
+            except HTTPException as e:
+                # 响应已开始，状态码无法再改，以错误事件结束事件流
+                yield f"event: error\ndata: {json.dumps({'detail': e.detail})}\n\n"
+                break
+
+    return StreamingResponse(events(progress), media_type="text/event-stream")
+
+
+@router.post("/{project_name}/annotation_snapshot", response_model=Dict[str, Any])
+async def build_annotation_snapshot(
+    project_name: str, session: Session = Depends(get_session)
+):
+    """
+    按需重新生成项目的列式标注快照
+    """
+    try:
+        return await run_in_threadpool(
+            project_service.build_annotation_snapshot, project_name, session
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to build annotation snapshot: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to build annotation snapshot: {str(e)}",
+        )
+
+
+@router.get("/{project_name}/objects/{obj_id}/track", response_model=Dict[str, Any])
+async def get_object_track(
+    project_name: str, obj_id: str, session: Session = Depends(get_session)
+):
+    """
+    获取单个目标的完整轨迹（各帧中的框），按帧时间排序
+    """
+    try:
+        return await run_in_threadpool(
+            project_service.get_object_track, project_name, obj_id, session
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get object track {obj_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get object track: {str(e)}",
+        )
+
+
+@router.post(
+    "/{project_name}/objects/{obj_id}/interpolate", response_model=Dict[str, Any]
+)
+async def interpolate_object_track(
+    project_name: str,
+    obj_id: str,
+    start_frame: Optional[str] = None,
+    end_frame: Optional[str] = None,
+    extrapolate: bool = True,
+    session: Session = Depends(get_session),
+):
+    """
+    对目标轨迹插值 / 外推，补全缺失帧的框并保存
+    """
+    try:
+        return await run_in_threadpool(
+            project_service.interpolate_object_track,
+            project_name,
+            obj_id,
+            session,
+            start_frame=start_frame,
+            end_frame=end_frame,
+            extrapolate=extrapolate,
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to interpolate object {obj_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to interpolate object track: {str(e)}",
+        )
+
+
+@router.post("/{project_name}/tracks/smooth", response_model=Dict[str, Any])
+async def start_smooth_tracks_task(
+    project_name: str,
+    request: TrajectorySmoothRequest,
+    session: Session = Depends(get_session),
+):
+    """
+    启动后台任务，对整个场景的目标轨迹批量插值 / 平滑 / 外推
+    """
+    try:
+        return project_service.start_smooth_tracks_task(project_name, request, session)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to start track smoothing task: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to start track smoothing task: {str(e)}",
+        )
+
+
+@router.get(
+    "/{project_name}/tracks/smooth/{task_id}", response_model=Dict[str, Any]
+)
+async def get_smooth_tracks_task(project_name: str, task_id: str):
+    """
+    查询批量轨迹平滑任务状态
+    """
+    try:
+        return await run_in_threadpool(
+            project_service.get_smooth_tracks_task, project_name, task_id
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get track smoothing task {task_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get track smoothing task: {str(e)}",
+        )
+
+
 @router.put("/update_project_status", response_model=ProjectResponse)
 async def update_project_status(
     request: ProjectStatusUpdateRequest,
@@ -209,6 +510,7 @@ async def update_project_status(
     session.add(project)
     session.commit()
     session.refresh(project)
+    project_cache.invalidate(project_name)
 
     return ProjectResponse(
         id=project.id,
@@ -234,6 +536,7 @@ async def delete_project(project_name: str, session: Session = Depends(get_sessi
     # 删除项目（级联删除会自动删除相关的帧和标注数据）
     session.delete(project)
     session.commit()
+    project_cache.invalidate(project_name)
 
     return {"message": f"Project {project_name} deleted successfully"}
 
@@ -262,3 +565,61 @@ async def start_nuscenes_export(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to start export task: {str(e)}",
         )
+
+
+@router.post("/{project_name}/export/kitti", response_model=ExportTaskResponse)
+async def start_kitti_export(
+    project_name: str,
+    request: KittiExportRequest,
+    session: Session = Depends(get_session),
+):
+    """
+    启动 KITTI 格式导出任务
+    """
+    try:
+        return export_service.start_kitti_export(
+            project_name=project_name, export_request=request, session=session
+        )
+    except Exception as e:
+        logger.error(f"Failed to start KITTI export for {project_name}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to start export task: {str(e)}",
+        )
+
+
+@router.post("/export/nuscenes", response_model=ExportTaskResponse)
+async def start_multi_scene_nuscenes_export(
+    request: MultiSceneExportRequest,
+    session: Session = Depends(get_session),
+):
+    """
+    启动多项目分片 NuScenes 导出任务，结果合并为单个 v1.0-all
+    """
+    try:
+        return export_service.start_multi_scene_export(
+            export_request=request, session=session
+        )
+    except Exception as e:
+        logger.error(f"Failed to start multi-scene NuScenes export: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to start export task: {str(e)}",
+        )
+
+
+@router.get("/{project_name}/export/{task_id}", response_model=ExportTaskStatus)
+async def get_export_task_status(project_name: str, task_id: str):
+    """
+    查询导出任务状态，完成后返回压缩包下载地址
+    """
+    try:
+        return export_service.get_export_task_status(project_name, task_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get export task status {task_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get export task status: {str(e)}",
+        )
@@ -4,25 +4,41 @@
 
 import uuid
 import os
+import json
 import redis
 from datetime import datetime
 from typing import Optional, List, Dict, Any
-from sqlmodel import Session, select
+from sqlmodel import Session
 from fastapi import HTTPException, status
+from celery import chord, group
 from celery.result import AsyncResult
 
 from nextpoints_sdk.models.project import Project
 
 from app.models.export_model import (
     NuScenesExportRequest,
+    MultiSceneExportRequest,
+    KittiExportRequest,
     ExportTaskResponse,
     ExportTaskStatus,
     ExportStatus,
     ExportTaskList,
 )
 
-from app.tasks.export_tasks import export_to_nuscenes_task
+from app.tasks.export_tasks import (
+    export_to_nuscenes_task,
+    export_to_kitti_task,
+    export_nuscenes_shard_task,
+    merge_nuscenes_shards_task,
+    cleanup_nuscenes_shards_task,
+)
 from app.celery_app import celery_app
+from app.services.project_cache import project_cache
+
+from tools.project_metadata import list_frame_timestamps
+
+# 导出任务的创建信息（所属项目、创建时间），保存时长与 Celery 结果一致
+EXPORT_TASK_RECORD_TTL = int(celery_app.conf.result_expires or 86400)
 
 
 class ExportService:
@@ -53,6 +69,68 @@ class ExportService:
                 created_at=datetime.utcnow(),
             )
 
+    def _record_task(self, task_id: str, project_names: List[str]):
+        """任务入队时记录所属项目与创建时间"""
+        self.redis_client.set(
+            f"export_task:{task_id}",
+            json.dumps(
+                {
+                    "project_names": project_names,
+                    "created_at": datetime.utcnow().isoformat(),
+                }
+            ),
+            ex=EXPORT_TASK_RECORD_TTL,
+        )
+
+    def _get_task_record(self, task_id: str) -> Optional[Dict[str, Any]]:
+        raw = self.redis_client.get(f"export_task:{task_id}")
+        return json.loads(raw) if raw else None
+
+    def get_export_task_status(
+        self, project_name: str, task_id: str
+    ) -> ExportTaskStatus:
+        """获取导出任务的详细状态（完成后包含压缩包下载地址）"""
+        record = self._get_task_record(task_id)
+        if not record or project_name not in record["project_names"]:
+            # 未知、已过期或属于其他项目的任务（Celery 对未知 ID 只会返回 PENDING）
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Export task {task_id} not found for project {project_name}",
+            )
+
+        task_result = AsyncResult(task_id, app=self.celery_app)
+        info = task_result.info if isinstance(task_result.info, dict) else {}
+        export_status = self._convert_celery_state(task_result.state)
+        if task_result.state in (ExportStatus.PROCESSING, ExportStatus.FAILED):
+            # 任务内通过 update_state 直接使用了自定义状态
+            export_status = ExportStatus(task_result.state)
+        error_details = info.get("error_details")
+        if task_result.failed():
+            error_details = str(task_result.result)
+
+        return ExportTaskStatus(
+            task_id=task_id,
+            status=export_status,
+            progress=(
+                100.0
+                if export_status == ExportStatus.COMPLETED
+                else float(info.get("progress", 0.0))
+            ),
+            current_step=info.get("current_step"),
+            message=info.get("message", ""),
+            created_at=datetime.fromisoformat(record["created_at"]),
+            completed_at=(
+                datetime.fromisoformat(info["completed_at"])
+                if info.get("completed_at")
+                else None
+            ),
+            download_url=info.get("download_url"),
+            file_size=info.get("file_size"),
+            total_frames_processed=info.get("total_frames_processed"),
+            total_annotations_exported=info.get("total_annotations_exported"),
+            error_details=error_details,
+        )
+
     def start_nuscenes_export(
         self, project_name: str, export_request: NuScenesExportRequest, session: Session
     ) -> ExportTaskResponse:
@@ -68,9 +146,7 @@ class ExportService:
             导出任务响应
         """
         # 1. 验证项目是否存在
-        project = session.exec(
-            select(Project).where(Project.name == project_name)
-        ).first()
+        project = project_cache.get(project_name, session)
 
         if not project:
             return ExportTaskResponse(
@@ -97,6 +173,7 @@ class ExportService:
                     project_name=project_name,
                     export_request=export_request.model_dump(),
                 )
+                self._record_task(celery_task.id, [project_name])
                 success = self.redis_client.set(
                     redis_key,
                     celery_task.id,
@@ -127,6 +204,150 @@ class ExportService:
                 detail=f"Failed to start export task: {str(e)}",
             )
 
+    def start_kitti_export(
+        self, project_name: str, export_request: KittiExportRequest, session: Session
+    ) -> ExportTaskResponse:
+        """
+        启动 KITTI 导出任务
+
+        Args:
+            project_name: 项目名称
+            export_request: 导出请求配置
+            session: 数据库会话
+
+        Returns:
+            导出任务响应
+        """
+        project = project_cache.get(project_name, session)
+
+        if not project:
+            return ExportTaskResponse(
+                task_id="none",
+                status=ExportStatus.FAILED,
+                message=f"Project '{project_name}' does not exist",
+                created_at=datetime.now(),
+            )
+
+        try:
+            # 同一项目同时只运行一个 KITTI 导出任务
+            redis_key = f"export_to_kitti_task:{project_name}"
+            if self.redis_client.get(redis_key):
+                task_id = self.redis_client.get(redis_key).decode("utf-8")
+                return self.get_task_status(task_id)
+
+            celery_task = export_to_kitti_task.delay(
+                project_name=project_name,
+                export_request=export_request.model_dump(),
+            )
+            self._record_task(celery_task.id, [project_name])
+            success = self.redis_client.set(
+                redis_key,
+                celery_task.id,
+                ex=30,
+                nx=True,
+            )
+            if not success:
+                return ExportTaskResponse(
+                    task_id=celery_task.id,
+                    status=ExportStatus.FAILED,
+                    message=f"Export task for project '{project_name}' already exists",
+                    created_at=datetime.now(),
+                )
+
+            return ExportTaskResponse(
+                task_id=celery_task.id,
+                status=ExportStatus.PENDING,
+                message=f"KITTI export task created for project '{project_name}'",
+                created_at=datetime.now(),
+            )
+
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to start export task: {str(e)}",
+            )
+
+    def start_multi_scene_export(
+        self, export_request: MultiSceneExportRequest, session: Session
+    ) -> ExportTaskResponse:
+        """
+        启动多项目分片 NuScenes 导出：每个项目按 shard_size 帧切分为分片，
+        分片任务并行执行，全部完成后由合并任务写出统一的 v1.0-all
+
+        Returns:
+            导出任务响应（task_id 为合并任务 ID）
+        """
+        output_project = (
+            export_request.output_project or export_request.project_names[0]
+        )
+        for name in set(export_request.project_names) | {output_project}:
+            project = project_cache.get(name, session)
+            if not project:
+                return ExportTaskResponse(
+                    task_id="none",
+                    status=ExportStatus.FAILED,
+                    message=f"Project '{name}' does not exist",
+                    created_at=datetime.now(),
+                )
+
+        try:
+            job_id = uuid.uuid4().hex
+            shard_request = export_request.model_dump(
+                exclude={"project_names", "output_project", "shard_size"}
+            )
+            shard_size = export_request.shard_size
+            shards = []
+            for name in export_request.project_names:
+                frame_count = len(list_frame_timestamps(name, session))
+                for start in range(0, frame_count, shard_size):
+                    shards.append(
+                        export_nuscenes_shard_task.s(
+                            job_id,
+                            name,
+                            output_project,
+                            shard_request,
+                            start,
+                            min(start + shard_size, frame_count),
+                        )
+                    )
+            if not shards:
+                return ExportTaskResponse(
+                    task_id="none",
+                    status=ExportStatus.FAILED,
+                    message="No frames found in the requested projects",
+                    created_at=datetime.now(),
+                )
+
+            merge_result = chord(group(shards))(
+                merge_nuscenes_shards_task.s(
+                    job_id, output_project, shard_request
+                ).on_error(
+                    cleanup_nuscenes_shards_task.s(
+                        job_id=job_id, output_project=output_project
+                    )
+                )
+            )
+            # 任一参与项目或目标项目均可查询合并任务的状态
+            self._record_task(
+                merge_result.id,
+                sorted(set(export_request.project_names) | {output_project}),
+            )
+            return ExportTaskResponse(
+                task_id=merge_result.id,
+                status=ExportStatus.PENDING,
+                message=(
+                    f"Multi-scene export started: {len(export_request.project_names)} "
+                    f"projects, {len(shards)} shards"
+                ),
+                created_at=datetime.now(),
+            )
+
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to start multi-scene export: {str(e)}",
+            )
+
     def _convert_celery_state(self, celery_state: str) -> ExportStatus:
         """
         将 Celery 状态转换为自定义状态
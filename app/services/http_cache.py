@@ -0,0 +1,58 @@
+"""
+HTTP 条件请求 - ETag / If-None-Match 与 304 响应
+"""
+
+from typing import Dict, Optional
+
+from fastapi import Response, status
+
+# 标注与元数据在编辑过程中随时变化：浏览器可以缓存，但每次使用前须向服务器验证
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+# 标注文件不存在时的 ETag（S3 的 ETag 为 MD5 十六进制，不会与之相同）
+MISSING_ETAG = '"missing"'
+
+
+# 压缩响应在 ETag 后追加的编码后缀，见 json_response.json_response
+ENCODING_SUFFIXES = ("-gzip",)
+
+
+def parse_etags(if_none_match: Optional[str]) -> list:
+    """
+    解析 If-None-Match 头为 ETag 列表（保留引号）
+
+    去掉 W/ 前缀与压缩编码后缀，得到未压缩表示的 ETag
+    """
+    if not if_none_match:
+        return []
+    etags = []
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        for suffix in ENCODING_SUFFIXES:
+            if tag.endswith(f'{suffix}"'):
+                tag = tag[: -len(suffix) - 1] + '"'
+                break
+        if tag:
+            etags.append(tag)
+    return etags
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 是否与当前 ETag 匹配（GET 按弱比较）"""
+    etags = parse_etags(if_none_match)
+    return "*" in etags or etag in etags
+
+
+def not_modified(etag: str, cache_control: str = REVALIDATE_CACHE_CONTROL) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers=cache_headers(etag, cache_control),
+    )
+
+
+def cache_headers(
+    etag: str, cache_control: str = REVALIDATE_CACHE_CONTROL
+) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": cache_control}
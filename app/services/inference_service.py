@@ -0,0 +1,155 @@
+"""
+推理服务 - 将并发的 predict_rotation 请求合并为一次模型批量推理
+"""
+
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from algos import pre_annotate
+
+logger = logging.getLogger(__name__)
+
+# 第一个请求到达后最多等待的合并窗口（毫秒）
+INFERENCE_BATCH_WINDOW_MS = float(os.getenv("INFERENCE_BATCH_WINDOW_MS", "5"))
+# 单次模型调用最多合并的请求数
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "32"))
+
+
+class BatchingInferenceWorker:
+    """
+    微批推理工作器
+
+    请求放入队列，后台协程在合并窗口内收集请求，整批交给 batch_fn 在
+    单独的线程中执行（模型推理不阻塞事件循环，且同一时刻只有一个批次在跑）。
+
+    Args:
+        batch_fn: 批量推理函数，输入为请求列表，返回同样长度的结果列表
+        window_ms: 合并窗口（毫秒）
+        max_batch_size: 单批最大请求数
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        window_ms: float = INFERENCE_BATCH_WINDOW_MS,
+        max_batch_size: int = INFERENCE_MAX_BATCH_SIZE,
+    ):
+        self.batch_fn = batch_fn
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="inference"
+        )
+
+        # 统计
+        self.stats = {
+            "requests": 0,
+            "batches": 0,
+            "errors": 0,
+            "last_batch_size": 0,
+            "max_batch_size_seen": 0,
+            "inference_seconds": 0.0,
+        }
+
+    def start(self):
+        """在当前事件循环中启动后台批处理协程（可重复调用）"""
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """停止后台协程，未处理的请求以异常结束"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._queue is not None and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Inference worker stopped"))
+
+    async def submit(self, item: Any) -> Any:
+        """提交一个请求，等待所在批次完成后返回其结果"""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """在推理线程上直接执行一次调用（请求本身已是批量时使用）"""
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, fn, *args
+        )
+
+    def metrics(self) -> Dict[str, Any]:
+        batches = self.stats["batches"]
+        return {
+            **self.stats,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "mean_batch_size": (
+                (self.stats["requests"] - self.stats["errors"]) / batches
+                if batches
+                else 0.0
+            ),
+            "window_ms": self.window * 1000.0,
+            "max_batch_size": self.max_batch_size,
+        }
+
+    async def _collect(self) -> List[Tuple[Any, asyncio.Future]]:
+        """等待第一个请求，再在合并窗口内收集其余请求"""
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # 等待期间已取消的请求不再推理
+            batch = [(item, future) for item, future in batch if not future.done()]
+            if not batch:
+                continue
+
+            self.stats["requests"] += len(batch)
+            start = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(
+                    self._executor, self.batch_fn, [item for item, _ in batch]
+                )
+            except Exception as e:
+                logger.error(f"Batch inference failed: {e}")
+                self.stats["errors"] += len(batch)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.stats["inference_seconds"] += time.perf_counter() - start
+            self.stats["batches"] += 1
+            self.stats["last_batch_size"] = len(batch)
+            self.stats["max_batch_size_seen"] = max(
+                self.stats["max_batch_size_seen"], len(batch)
+            )
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+
+# predict_rotation 使用的全局工作器，由应用生命周期负责停止
+rotation_worker = BatchingInferenceWorker(pre_annotate.predict_yaw_batch)
@@ -0,0 +1,82 @@
+"""
+大 JSON 响应 - 直接用 pydantic 序列化已校验的模型，并对大响应按 Accept-Encoding 做 gzip
+"""
+
+import gzip
+import os
+from typing import Any, Dict, Optional
+
+import pydantic_core
+from fastapi import Request, Response
+
+# 是否压缩响应；前面有负责压缩的反向代理时可设为 0
+JSON_COMPRESS = os.getenv("JSON_COMPRESS", "1") == "1"
+# 小于该字节数的响应不压缩：压缩耗时与体积成正比，小响应省下的传输时间
+# 抵不上压缩时间
+JSON_COMPRESS_MIN_SIZE = int(os.getenv("JSON_COMPRESS_MIN_SIZE", str(256 * 1024)))
+# 压缩级别：元数据中大量重复的键和 URL 在最低级别已能压缩到约 1/4，
+# 更高级别只略微减小体积但耗时成倍增加（见 tools/response_benchmark.py）
+JSON_GZIP_LEVEL = int(os.getenv("JSON_GZIP_LEVEL", "1"))
+
+
+class ModelJSONResponse(Response):
+    """
+    JSON 响应：模型、模型列表等由 pydantic-core 直接序列化为字节
+
+    路由直接返回该响应时 FastAPI 不再按 response_model 重新校验和
+    jsonable_encoder 转换（response_model 仍用于接口文档）
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return pydantic_core.to_json(content)
+
+
+def accepted_encoding(request: Request) -> Optional[str]:
+    """按 Accept-Encoding 判断客户端是否接受 gzip"""
+    for item in request.headers.get("accept-encoding", "").split(","):
+        name, *params = [part.strip() for part in item.split(";")]
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if name.lower() == "gzip" and q > 0:
+            return "gzip"
+    return None
+
+
+def compress(body: bytes) -> bytes:
+    return gzip.compress(body, compresslevel=JSON_GZIP_LEVEL)
+
+
+def json_response(
+    request: Request,
+    content: Any,
+    headers: Optional[Dict[str, str]] = None,
+    min_size: int = JSON_COMPRESS_MIN_SIZE,
+) -> Response:
+    """
+    序列化 content；启用压缩、客户端支持 gzip 且响应不小于 min_size 时压缩
+
+    压缩后的 ETag 追加编码后缀（"xxx-gzip"），同一资源的不同编码不共用强 ETag；
+    http_cache.parse_etags 比较时会去掉该后缀。
+    """
+    response = ModelJSONResponse(content, headers=headers)
+    response.headers["Vary"] = "Accept-Encoding"
+    if not JSON_COMPRESS or len(response.body) < min_size:
+        return response
+    encoding = accepted_encoding(request)
+    if encoding is None:
+        return response
+
+    response.body = compress(response.body)
+    response.headers["Content-Encoding"] = encoding
+    response.headers["Content-Length"] = str(len(response.body))
+    etag = response.headers.get("ETag")
+    if etag and etag.endswith('"'):
+        response.headers["ETag"] = f'{etag[:-1]}-{encoding}"'
+    return response
@@ -0,0 +1,169 @@
+"""
+点云服务 - 将帧的 PCD 转换为紧凑二进制格式（见 tools/compact_points.py）并缓存到本地磁盘
+"""
+
+import hashlib
+import json
+import logging
+import os
+import posixpath
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+
+from nextpoints_sdk.models.project import Project
+
+from app.services import http_cache
+from app.services.s3_service import S3Service
+from tools import compact_points
+
+logger = logging.getLogger(__name__)
+
+# 转换结果的缓存目录，多个 uvicorn worker 共用
+POINTS_CACHE_DIR = Path(os.getenv("POINTS_CACHE_DIR", "./cache/points"))
+# 缓存目录的容量上限（字节），超出时删除最久未使用的文件
+POINTS_CACHE_MAX_BYTES = int(os.getenv("POINTS_CACHE_MAX_BYTES", str(2 * 1024**3)))
+# 最近该秒数内被访问过的文件不淘汰：刚返回给请求的文件不会在发送前被删除
+POINTS_CACHE_MIN_AGE = 60
+
+# 本进程估计的缓存目录大小：首次写入时扫描目录，之后累加本进程写入的文件，
+# 超过上限时才重新扫描并淘汰（其他 worker 的写入在下次扫描时计入）
+_cache_bytes: Optional[int] = None
+_cache_lock = threading.Lock()
+
+
+def points_etag(
+    source_key: str,
+    source_etag: str,
+    bounds: Optional[Sequence[Optional[float]]],
+    voxel_size: Optional[float],
+    max_points: Optional[int],
+) -> str:
+    """转换结果的强 ETag：由源 PCD 的 S3 ETag、转换参数与格式版本决定"""
+    digest = hashlib.sha256(
+        json.dumps(
+            [
+                compact_points.FORMAT_VERSION,
+                source_key,
+                source_etag,
+                list(bounds) if bounds is not None else None,
+                voxel_size,
+                max_points,
+            ]
+        ).encode("utf-8")
+    )
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def _cache_path(etag: str) -> Path:
+    return POINTS_CACHE_DIR / f"{etag.strip(chr(34))}.bin"
+
+
+def _scan_cache() -> list:
+    files = []
+    for path in POINTS_CACHE_DIR.glob("*.bin"):
+        try:
+            files.append((path, path.stat()))
+        except FileNotFoundError:  # 其他 worker 刚刚删除
+            continue
+    return files
+
+
+def _prune_cache():
+    """缓存超出容量时按访问时间删除旧文件，降到容量的 90%；返回剩余字节数"""
+    try:
+        files = _scan_cache()
+    except OSError:
+        return 0
+    total = sum(stat.st_size for _, stat in files)
+    if total <= POINTS_CACHE_MAX_BYTES:
+        return total
+    recent = time.time() - POINTS_CACHE_MIN_AGE
+    for path, stat in sorted(files, key=lambda item: item[1].st_mtime):
+        if stat.st_mtime > recent or total <= POINTS_CACHE_MAX_BYTES * 0.9:
+            break
+        try:
+            path.unlink()
+        except OSError:
+            continue
+        total -= stat.st_size
+    return total
+
+
+def _add_cache_bytes(size: int):
+    """累加写入的字节数，估计值超过上限时扫描并淘汰"""
+    global _cache_bytes
+    with _cache_lock:
+        if _cache_bytes is not None:
+            _cache_bytes += size
+        if _cache_bytes is None or _cache_bytes > POINTS_CACHE_MAX_BYTES:
+            _cache_bytes = _prune_cache()
+
+
+def point_count(path: Path) -> int:
+    with open(path, "rb") as f:
+        return compact_points.decode_header(f.read(compact_points.HEADER_SIZE))
+
+
+def load_frame_points(
+    project: Project,
+    timestamp: str,
+    channel: str,
+    bounds: Optional[Sequence[Optional[float]]] = None,
+    voxel_size: Optional[float] = None,
+    max_points: Optional[int] = None,
+    if_none_match: Optional[str] = None,
+) -> Tuple[Optional[Path], str, int]:
+    """
+    获取帧点云的紧凑格式文件
+
+    每次只对源 PCD 做一次 HEAD 取 ETag；转换结果按 ETag 缓存，源文件变化后
+    自动失效。
+
+    Returns:
+        (缓存文件路径, ETag, 点数)，ETag 与 if_none_match 匹配时为 (None, ETag, 0)
+    """
+    s3_service = S3Service(
+        access_key_id=project.access_key_id,
+        secret_access_key=project.secret_access_key,
+        endpoint_url=project.s3_endpoint,
+        region_name=project.region_name,
+    )
+    root = (project.bucket_prefix or "").strip("/")
+    source_key = posixpath.join(root, "lidar", channel, f"{timestamp}.pcd")
+    source_etag = s3_service.head_object_etag(project.bucket_name, source_key)
+    if source_etag is None:
+        raise HTTPException(
+            status_code=404, detail=f"Point cloud not found: {source_key}"
+        )
+
+    etag = points_etag(source_key, source_etag, bounds, voxel_size, max_points)
+    if http_cache.etag_matches(if_none_match, etag):
+        return None, etag, 0
+
+    path = _cache_path(etag)
+    try:
+        # 更新访问时间，供容量淘汰使用
+        os.utime(path)
+        return path, etag, point_count(path)
+    except FileNotFoundError:  # 未缓存，或刚被其他 worker 淘汰，重新转换
+        pass
+
+    pcd_bytes = s3_service.get_object(project.bucket_name, source_key)
+    if pcd_bytes is None:
+        raise HTTPException(
+            status_code=404, detail=f"Point cloud not found: {source_key}"
+        )
+    blob = compact_points.convert_pcd(pcd_bytes, bounds, voxel_size, max_points)
+
+    # 先写临时文件再原子替换，并发转换同一帧时读者不会看到半个文件
+    POINTS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+    tmp_path.write_bytes(blob)
+    os.replace(tmp_path, path)
+    _add_cache_bytes(len(blob))
+    return path, etag, compact_points.decode_header(blob)
@@ -0,0 +1,150 @@
+"""
+项目配置缓存 - 按项目名缓存 Project（bucket、凭证等），热点请求不再查询数据库
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import redis
+from sqlmodel import Session, select
+
+from nextpoints_sdk.models.project import Project
+
+logger = logging.getLogger(__name__)
+
+# 缓存有效期（秒），跨进程失效消息丢失时最多陈旧这么久
+PROJECT_CACHE_TTL = float(os.getenv("PROJECT_CACHE_TTL", "60"))
+# 最多缓存的项目数
+PROJECT_CACHE_MAX_SIZE = int(os.getenv("PROJECT_CACHE_MAX_SIZE", "256"))
+# 是否通过 redis pub/sub 通知其他进程（uvicorn worker / Celery worker）失效
+PROJECT_CACHE_PUBSUB = os.getenv("PROJECT_CACHE_PUBSUB", "1") == "1"
+PROJECT_CACHE_CHANNEL = "project_cache:invalidate"
+
+
+class ProjectCache:
+    """
+    进程内 TTL + LRU 项目缓存
+
+    缓存的是与会话分离的 Project 副本，调用方只读取其中的配置，不要修改或
+    交给 session 保存；需要修改项目时仍通过 session 查询。
+
+    Args:
+        ttl: 缓存有效期（秒）
+        max_size: 最多缓存的项目数
+        redis_url: 非空时通过该 redis 的 pub/sub 在进程间广播失效
+    """
+
+    def __init__(
+        self,
+        ttl: float = PROJECT_CACHE_TTL,
+        max_size: int = PROJECT_CACHE_MAX_SIZE,
+        redis_url: Optional[str] = None,
+    ):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._items: "OrderedDict[str, Tuple[float, Project]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = redis.Redis.from_url(redis_url) if redis_url else None
+        # 订阅线程所在的进程，Celery prefork 子进程需要各自订阅
+        self._listener_pid: Optional[int] = None
+
+        # 统计
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, project_name: str, session: Session) -> Optional[Project]:
+        """
+        获取项目配置，未命中或过期时用 session 查询并缓存；项目不存在返回 None
+        """
+        self._ensure_listener()
+        now = time.monotonic()
+        with self._lock:
+            item = self._items.get(project_name)
+            if item is not None and item[0] > now:
+                self._items.move_to_end(project_name)
+                self.stats["hits"] += 1
+                return item[1]
+            self.stats["misses"] += 1
+
+        project = session.exec(
+            select(Project).where(Project.name == project_name)
+        ).first()
+        if project is None:
+            # 不缓存不存在的项目，创建后立即可见
+            return None
+
+        cached = Project(**project.model_dump())
+        with self._lock:
+            self._items[project_name] = (now + self.ttl, cached)
+            self._items.move_to_end(project_name)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+        return cached
+
+    def invalidate(self, project_name: str, publish: bool = True):
+        """使项目缓存失效，publish 时通知其他进程"""
+        self._drop(project_name)
+        if publish and self._redis is not None:
+            try:
+                self._redis.publish(PROJECT_CACHE_CHANNEL, project_name)
+            except Exception as e:
+                logger.warning(f"Failed to publish project cache invalidation: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def metrics(self):
+        with self._lock:
+            size = len(self._items)
+        return {
+            **self.stats,
+            "size": size,
+            "ttl": self.ttl,
+            "max_size": self.max_size,
+        }
+
+    def _drop(self, project_name: str):
+        with self._lock:
+            if self._items.pop(project_name, None) is not None:
+                self.stats["invalidations"] += 1
+
+    def _ensure_listener(self):
+        if self._redis is None or self._listener_pid == os.getpid():
+            return
+        with self._lock:
+            if self._listener_pid == os.getpid():
+                return
+            self._listener_pid = os.getpid()
+            # fork 前缓存的内容可能已错过失效消息
+            self._items.clear()
+        threading.Thread(
+            target=self._listen, name="project-cache-listener", daemon=True
+        ).start()
+
+    def _listen(self):
+        """订阅失效消息；连接断开时清空缓存并重连"""
+        while True:
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(PROJECT_CACHE_CHANNEL)
+                for message in pubsub.listen():
+                    self._drop(message["data"].decode("utf-8"))
+            except Exception as e:
+                logger.warning(f"Project cache listener disconnected: {e}")
+            # 断开期间可能错过消息
+            self.clear()
+            time.sleep(1.0)
+
+
+# 全局项目缓存
+project_cache = ProjectCache(
+    redis_url=(
+        os.getenv("CELERY_BROKER_URL", "redis://redis:6379/0")
+        if PROJECT_CACHE_PUBSUB
+        else None
+    )
+)
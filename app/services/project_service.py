@@ -2,12 +2,14 @@ from sqlmodel import Session
 from fastapi import APIRouter, HTTPException, Depends, status
 from pathlib import Path
 import logging
-from typing import Dict, Any, Optional, List, Set, Tuple
-from sqlmodel import select
+from typing import Callable, Dict, Any, Optional, List, Set, Tuple
 import os
+import json
 import redis
+import numpy as np
 from celery.result import AsyncResult
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from nextpoints_sdk.models.annotation import AnnotationItem, FrameAnnotation
 from nextpoints_sdk.models.project import (
     ProjectCreateRequest,
@@ -18,10 +20,31 @@ from nextpoints_sdk.models.enums import TaskStatusEnum, ProjectStatusEnum
 from nextpoints_sdk.models.project import Project
 
 
+from app.models.trajectory_model import TrajectorySmoothRequest
 from app.services.s3_service import S3Service
+from app.services.project_cache import project_cache
 from app.database import get_session
 
 from tools.check_label import LabelChecker
+from tools.annotation_snapshot import (
+    AnnotationSnapshot,
+    SNAPSHOT_FILENAME,
+    frame_sort_key,
+)
+from tools.project_metadata import (
+    label_etags_from_listing,
+    list_frame_timestamps,
+    list_label_etags,
+)
+from tools.trajectory import (
+    fill_track,
+    frame_times,
+    pack_tracks,
+    reference_rows,
+    rpy_to_quat,
+    smooth_tracks,
+    unwrap_angles,
+)
 
 from app.tasks.project_tasks import create_project_task
 from app.celery_app import celery_app
@@ -31,6 +54,21 @@ logger = logging.getLogger(__name__)
 REDIS_URL = os.getenv("CELERY_BROKER_URL", "redis://redis:6379/0")
 redis_client = redis.Redis.from_url(REDIS_URL)
 
+# 并发读取标注文件的线程数
+LABEL_FETCH_WORKERS = int(os.getenv("LABEL_FETCH_WORKERS", "16"))
+# 标注检查结果缓存有效期（秒）
+LABEL_CHECK_CACHE_TTL = 7 * 24 * 3600
+# 标注检查：目标相邻帧间允许的最大旋转角（度）
+LABEL_CHECK_MAX_ROTATION_DELTA_DEG = float(
+    os.getenv("LABEL_CHECK_MAX_ROTATION_DELTA_DEG", "30")
+)
+# 后台检查任务消息流保留时间（秒），与任务结果保存时间一致
+LABEL_CHECK_STREAM_TTL = 86400
+# 轨迹平滑任务所属项目的记录保留时间（秒），与任务结果保存时间一致
+SMOOTH_TRACKS_TASK_RECORD_TTL = int(celery_app.conf.result_expires or 86400)
+# 标注快照锁的自动释放时间（秒）：保存标注与更新 / 重建快照都在锁内进行
+ANNOTATION_SNAPSHOT_LOCK_TIMEOUT = 600
+
 
 def get_task_status(task_id: str, project_name: str) -> ProjectCreateResponse:
     """获取任务状态"""
@@ -61,9 +99,7 @@ def create_project(
 
     try:
         # 1. 验证项目是否存在
-        project = session.exec(
-            select(Project).where(Project.name == project_name)
-        ).first()
+        project = project_cache.get(project_name, session)
         if project:
             return ProjectCreateResponse(
                 project_name=project_name,
@@ -120,9 +156,7 @@ def get_check_label(
     """
     try:
         # 1. 获取项目基本信息和状态
-        project = session.exec(
-            select(Project).where(Project.name == project_name)
-        ).first()
+        project = project_cache.get(project_name, session)
 
         # 2. build FrameAnnotation list from label files
         if not project:
@@ -133,46 +167,555 @@ def get_check_label(
             endpoint_url=project.s3_endpoint,
             region_name=project.region_name,
         )
-        label_key_prefix = str(Path(project.bucket_prefix or "") / "label")
-        label_files = s3_service.list_objects(project.bucket_name, label_key_prefix)
-        if not label_files:
+        return run_label_check(project, s3_service)
+
+    except Exception as e:
+        logger.error(f"Failed to get label check data: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get label check data: {str(e)}",
+        )
+
+
+def run_label_check(
+    project: Project,
+    s3_service: S3Service,
+    on_progress: Optional[Callable[[str, float], None]] = None,
+    on_messages: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    执行项目的标注检查（同步接口与后台任务共用）
+
+    Args:
+        on_progress: 进度回调 (当前步骤, 进度百分比)
+        on_messages: 新产生检查消息时的回调；全量检查时每完成一项检查回调一次
+
+    Returns:
+        全部检查消息
+    """
+    on_progress = on_progress or (lambda step, progress: None)
+    with redis_client.lock(f"label_check_lock:{project.name}", timeout=600):
+        # 先取出变更记录再读快照：之后的保存会重新标记，下次检查时处理
+        dirty_frames, dirty_objects = _pop_label_check_dirty(project.name)
+        on_progress("Loading annotation snapshot", 0.0)
+        snapshot, rebuilt = load_current_annotation_snapshot(
+            s3_service,
+            project,
+            on_progress=lambda done, total: on_progress(
+                f"Loading label files {done}/{total}", 50.0 * done / total
+            ),
+        )
+        if len(snapshot.frames) == 0:
             raise HTTPException(
                 status_code=404, detail="No label files found for this project"
             )
-        annotations = []
-        for label_file in label_files:
-            key = label_file
-            relative_key = (
-                key[len(label_key_prefix) :].lstrip("/") if label_key_prefix else key
-            )
-            frame_id = Path(relative_key).stem  # 获取帧ID
-
-            try:
-                annotation_data = s3_service.read_json_object(project.bucket_name, key)
-                if not isinstance(annotation_data, list):
-                    annotation_data = []  # 确保是列表格式
-                annotations.append(
-                    FrameAnnotation(
-                        scene=project.name,
-                        frame=frame_id,
-                        annotation=[AnnotationItem(**item) for item in annotation_data],
-                    )
-                )
-            except Exception as e:
-                logger.error(f"Failed to read or parse label file {key}: {e}")
-                continue
+        # 快照重新生成时缓存的检查结果可能已过期，执行全量检查
+        cache = None if rebuilt else _load_label_check_cache(project.name)
 
         # 3. use LabelChecker to validate annotations
-        label_checker = LabelChecker(annotations)
-        label_checker.check()
-        return label_checker.messages
+        # 有缓存时仅重新检查变更的帧和受影响的目标轨迹
+        label_checker = LabelChecker.from_snapshot(
+            snapshot, max_rotation_delta_deg=LABEL_CHECK_MAX_ROTATION_DELTA_DEG
+        )
+        streamed = cache is None
+        if cache is None:
+            cache = _run_label_checks(
+                label_checker, on_progress=on_progress, on_messages=on_messages
+            )
+        else:
+            by_frame, by_object = _run_label_checks(
+                label_checker, dirty_frames, dirty_objects, on_progress=on_progress
+            )
+            cache = (
+                _merge_check_results(cache[0], by_frame),
+                _merge_check_results(cache[1], by_object),
+            )
+        _save_label_check_cache(project.name, cache)
+
+    by_frame, by_object = cache
+    messages = []
+    for frame in snapshot.frames.tolist():
+        messages.extend(by_frame.get(frame, []))
+    for obj_id in sorted(by_object):
+        messages.extend(by_object[obj_id])
+    if on_messages and not streamed and messages:
+        on_messages(messages)
+    return messages
+
+
+def label_check_stream_key(task_id: str) -> str:
+    """后台标注检查任务的消息流（redis list，每项为一条 JSON 消息）"""
+    return f"label_check_stream:{task_id}"
+
+
+def start_label_check_task(project_name: str, session: Session) -> Dict[str, Any]:
+    """
+    启动后台标注检查任务；同一项目已有任务在运行时返回该任务
+    """
+    project = project_cache.get(project_name, session)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    redis_key = f"check_label_task:{project_name}"
+    task_id = redis_client.get(redis_key)
+    if task_id:
+        return get_label_check_task(task_id.decode("utf-8"))
+
+    # 通过任务名发送，避免与任务模块循环导入
+    celery_task = celery_app.send_task(
+        "app.tasks.label_check_tasks.check_label_task",
+        kwargs={"project_name": project_name},
+    )
+    if not redis_client.set(redis_key, celery_task.id, ex=600, nx=True):
+        return get_label_check_task(redis_client.get(redis_key).decode("utf-8"))
+    return {
+        "task_id": celery_task.id,
+        "status": TaskStatusEnum.PENDING,
+        "message": f"Label check task created for project '{project_name}'",
+        "progress": 0.0,
+        "messages": [],
+        "next_offset": 0,
+        "done": False,
+    }
+
+
+def get_label_check_task(
+    task_id: str, offset: int = 0, project_name: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    查询后台标注检查任务的状态，并返回 offset 之后新产生的检查消息
+
+    客户端以返回的 next_offset 继续轮询，done 为 True 后消息已全部返回。
+    给出 project_name 时校验任务：celery 对未知 task_id 也返回 PENDING，
+    若该项目没有这个运行中的任务、也没有它的消息流，则返回 404
+    """
+    # 先取状态再读消息流：任务结束前写入的消息一定能在本次读到
+    task_result = AsyncResult(task_id, app=celery_app)
+    state = task_result.state
+    if project_name is not None and state == "PENDING":
+        running = redis_client.get(f"check_label_task:{project_name}")
+        if (
+            running is None or running.decode("utf-8") != task_id
+        ) and not redis_client.exists(label_check_stream_key(task_id)):
+            raise HTTPException(
+                status_code=404, detail=f"Label check task {task_id} not found"
+            )
+    info = task_result.info if isinstance(task_result.info, dict) else {}
+    if state == "SUCCESS":
+        task_status = TaskStatusEnum.COMPLETED
+    elif state in ("FAILURE", TaskStatusEnum.FAILED):
+        task_status = TaskStatusEnum.FAILED
+        info = {"message": str(task_result.info)}
+    elif state == TaskStatusEnum.PROCESSING:
+        task_status = TaskStatusEnum.PROCESSING
+    else:
+        task_status = TaskStatusEnum.PENDING
+    messages = [
+        json.loads(m)
+        for m in redis_client.lrange(label_check_stream_key(task_id), offset, -1)
+    ]
+    return {
+        "task_id": task_id,
+        "status": task_status,
+        "message": info.get("message", ""),
+        "progress": info.get("progress", 0.0),
+        "messages": messages,
+        "next_offset": offset + len(messages),
+        "done": task_status in (TaskStatusEnum.COMPLETED, TaskStatusEnum.FAILED),
+    }
+
+
+def _label_check_keys(project_name: str) -> Tuple[str, str, str]:
+    """(检查结果缓存, 变更帧集合, 变更目标集合) 的 redis 键"""
+    return (
+        f"label_check:{project_name}",
+        f"label_check_dirty_frames:{project_name}",
+        f"label_check_dirty_objects:{project_name}",
+    )
+
 
+def _run_label_checks(
+    label_checker: LabelChecker,
+    frames: Optional[Set[str]] = None,
+    obj_ids: Optional[Set[str]] = None,
+    on_progress: Optional[Callable[[str, float], None]] = None,
+    on_messages: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, List[Dict[str, Any]]]]:
+    """执行检查，按帧（逐框/逐帧检查）和按目标（轨迹检查）分组返回消息
+
+    frames / obj_ids 为 None 时检查全部；返回结果包含所有被检查的键（可能为空列表）
+    """
+    by_frame: Dict[str, List[Dict[str, Any]]] = {f: [] for f in frames or []}
+    by_object: Dict[str, List[Dict[str, Any]]] = {o: [] for o in obj_ids or []}
+    label_checker.clear_messages()
+    steps = label_checker.iter_checks(frames, obj_ids)
+    for i, (scope, name, messages) in enumerate(steps):
+        if scope == "frame":
+            for message in messages:
+                by_frame.setdefault(message["frame_id"], []).append(message)
+        else:
+            for message in messages:
+                by_object.setdefault(message["obj_id"], []).append(message)
+        if on_messages and messages:
+            on_messages(messages)
+        if on_progress:
+            on_progress(name, 50.0 + 50.0 * (i + 1) / len(LabelChecker.CHECKS))
+    return by_frame, by_object
+
+
+def _merge_check_results(
+    cached: Dict[str, List[Dict[str, Any]]], updated: Dict[str, List[Dict[str, Any]]]
+) -> Dict[str, List[Dict[str, Any]]]:
+    merged = {**cached, **updated}
+    return {key: messages for key, messages in merged.items() if messages}
+
+
+def _load_label_check_cache(project_name: str) -> Optional[Tuple[Dict, Dict]]:
+    cache_key, _, _ = _label_check_keys(project_name)
+    data = redis_client.get(cache_key)
+    if not data:
+        return None
+    cache = json.loads(data)
+    return cache["frames"], cache["objects"]
+
+
+def _save_label_check_cache(project_name: str, cache: Tuple[Dict, Dict]) -> None:
+    cache_key, _, _ = _label_check_keys(project_name)
+    by_frame, by_object = cache
+    redis_client.set(
+        cache_key,
+        json.dumps(
+            {
+                "frames": {k: v for k, v in by_frame.items() if v},
+                "objects": {k: v for k, v in by_object.items() if v},
+            }
+        ),
+        ex=LABEL_CHECK_CACHE_TTL,
+    )
+
+
+def _pop_label_check_dirty(project_name: str) -> Tuple[Set[str], Set[str]]:
+    """原子地取出并清空变更的帧与目标"""
+    _, frames_key, objects_key = _label_check_keys(project_name)
+    pipe = redis_client.pipeline()
+    pipe.smembers(frames_key)
+    pipe.smembers(objects_key)
+    pipe.delete(frames_key, objects_key)
+    frames, objects, _ = pipe.execute()
+    return {f.decode("utf-8") for f in frames}, {o.decode("utf-8") for o in objects}
+
+
+def _mark_label_check_dirty(
+    project_name: str, frames: Set[str], obj_ids: Set[str]
+) -> None:
+    _, frames_key, objects_key = _label_check_keys(project_name)
+    pipe = redis_client.pipeline()
+    if frames:
+        pipe.sadd(frames_key, *frames)
+    if obj_ids:
+        pipe.sadd(objects_key, *obj_ids)
+    pipe.execute()
+
+
+def _invalidate_label_check_cache(project_name: str) -> None:
+    redis_client.delete(*_label_check_keys(project_name))
+
+
+def _load_label_annotations(
+    s3_service: S3Service,
+    project: Project,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> Tuple[List[FrameAnnotation], Dict[str, str]]:
+    """并发读取 label/<ts>.json 并解析为 FrameAnnotation
+
+    每个工作线程完成下载后立即解析校验，解析与其他文件的网络 I/O 重叠进行。
+
+    Returns:
+        (标注列表, 列目录时各帧标注文件的 ETag)
+    """
+    label_key_prefix = str(Path(project.bucket_prefix or "") / "label")
+    label_objects = s3_service.list_all_objects(project.bucket_name, label_key_prefix)
+    label_files = [obj["Key"] for obj in label_objects]
+    label_etags = label_etags_from_listing(label_objects)
+
+    def _load(key: str) -> Optional[FrameAnnotation]:
+        relative_key = (
+            key[len(label_key_prefix) :].lstrip("/") if label_key_prefix else key
+        )
+        frame_id = Path(relative_key).stem  # 获取帧ID
+        try:
+            annotation_data = s3_service.read_json_object(project.bucket_name, key)
+            if not isinstance(annotation_data, list):
+                annotation_data = []  # 确保是列表格式
+            return FrameAnnotation(
+                scene=project.name,
+                frame=frame_id,
+                annotation=[AnnotationItem(**item) for item in annotation_data],
+            )
+        except Exception as e:
+            logger.error(f"Failed to read or parse label file {key}: {e}")
+            return None
+
+    annotations = []
+    with ThreadPoolExecutor(max_workers=LABEL_FETCH_WORKERS) as executor:
+        for i, annotation in enumerate(executor.map(_load, label_files), 1):
+            if annotation is not None:
+                annotations.append(annotation)
+            if on_progress and (i % 100 == 0 or i == len(label_files)):
+                on_progress(i, len(label_files))
+    return annotations, label_etags
+
+
+def _snapshot_key(project: Project) -> str:
+    """标注快照与 label/ 目录同级存放"""
+    prefix = project.bucket_prefix or ""
+    if prefix and not prefix.endswith("/"):
+        prefix += "/"
+    return f"{prefix}{SNAPSHOT_FILENAME}"
+
+
+def load_annotation_snapshot(
+    s3_service: S3Service, project: Project
+) -> Optional[AnnotationSnapshot]:
+    """读取项目的标注快照，不存在或无法解析时返回 None"""
+    data = s3_service.get_object(project.bucket_name, _snapshot_key(project))
+    if not data:
+        return None
+    try:
+        return AnnotationSnapshot.from_bytes(data)
     except Exception as e:
-        logger.error(f"Failed to get label check data: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to get label check data: {str(e)}",
+        logger.warning(f"Failed to parse annotation snapshot of {project.name}: {e}")
+        return None
+
+
+def _write_annotation_snapshot(
+    s3_service: S3Service, project: Project, snapshot: AnnotationSnapshot
+) -> bool:
+    if not s3_service.put_object(
+        project.bucket_name, _snapshot_key(project), snapshot.to_bytes()
+    ):
+        logger.warning(f"Failed to write annotation snapshot of {project.name}")
+        return False
+    return True
+
+
+def _annotation_snapshot_lock(project_name: str):
+    """快照锁：标注文件写入与快照 / 轨迹索引更新在同一把锁内完成"""
+    return redis_client.lock(
+        f"annotation_snapshot:{project_name}",
+        timeout=ANNOTATION_SNAPSHOT_LOCK_TIMEOUT,
+    )
+
+
+def _discard_annotation_snapshot(s3_service: S3Service, project: Project) -> None:
+    """删除快照、轨迹索引与检查缓存，下次使用时从标注文件重新生成"""
+    s3_service.delete_objects(project.bucket_name, [_snapshot_key(project)])
+    redis_client.delete(_object_tracks_key(project.name))
+    _invalidate_label_check_cache(project.name)
+
+
+def _rebuild_annotation_snapshot(
+    s3_service: S3Service,
+    project: Project,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> AnnotationSnapshot:
+    """从全部标注文件重新生成快照与轨迹索引（调用方需持有快照锁）"""
+    annotations, label_etags = _load_label_annotations(
+        s3_service, project, on_progress=on_progress
+    )
+    snapshot = AnnotationSnapshot.from_annotations(annotations, label_etags)
+    _write_annotation_snapshot(s3_service, project, snapshot)
+    _write_object_tracks(project.name, snapshot)
+    _invalidate_label_check_cache(project.name)
+    return snapshot
+
+
+def load_current_annotation_snapshot(
+    s3_service: S3Service,
+    project: Project,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    locked: bool = False,
+) -> Tuple[AnnotationSnapshot, bool]:
+    """
+    读取与 label/ 目录一致的标注快照
+
+    快照不存在、无法解析，或记录的标注 ETag 与当前标注文件不一致（例如绕过接口
+    直接修改了标注文件）时，在快照锁内重新读取全部标注文件生成。
+
+    Args:
+        locked: 调用方已持有快照锁
+
+    Returns:
+        (快照, 是否重新生成)
+    """
+
+    def _load_current() -> Optional[AnnotationSnapshot]:
+        label_etags = list_label_etags(s3_service, project)
+        snapshot = load_annotation_snapshot(s3_service, project)
+        if snapshot is not None and not snapshot.is_current(label_etags):
+            logger.info(f"Annotation snapshot of {project.name} is stale, rebuilding")
+            return None
+        return snapshot
+
+    if not locked:
+        snapshot = _load_current()
+        if snapshot is not None:
+            return snapshot, False
+        with _annotation_snapshot_lock(project.name):
+            return load_current_annotation_snapshot(
+                s3_service, project, on_progress=on_progress, locked=True
+            )
+
+    # 等待锁期间快照可能已由其他请求重新生成
+    snapshot = _load_current()
+    if snapshot is not None:
+        return snapshot, False
+    return _rebuild_annotation_snapshot(s3_service, project, on_progress), True
+
+
+def _update_annotation_snapshot(
+    s3_service: S3Service,
+    project: Project,
+    saved: List[FrameAnnotation],
+    label_etags: Dict[str, Optional[str]],
+) -> None:
+    """
+    保存标注后更新快照中对应的帧及其标注 ETag（调用方需持有快照锁）
+
+    快照不存在时跳过（首次检查或按需生成）；更新失败时删除快照与轨迹索引，
+    避免之后读到与标注文件不一致的数据
+    """
+    try:
+        snapshot = load_annotation_snapshot(s3_service, project)
+        if snapshot is None:
+            _discard_annotation_snapshot(s3_service, project)
+            return
+        updated = snapshot.replace_frames(
+            saved,
+            {frame: (etag or "").strip('"') for frame, etag in label_etags.items()},
         )
+        if not _write_annotation_snapshot(s3_service, project, updated):
+            raise RuntimeError("snapshot upload failed")
+
+        # 受影响的目标包括帧内原有和新保存的目标
+        frames = {item.frame for item in saved}
+        previous = snapshot.columns["obj_id"][
+            np.isin(snapshot.columns["frame"], list(frames))
+        ]
+        obj_ids = set(previous.tolist())
+        for item in saved:
+            obj_ids.update(a.obj_id for a in item.annotation or [])
+        if redis_client.exists(_object_tracks_key(project.name)):
+            _write_object_tracks(project.name, updated, obj_ids)
+    except Exception as e:
+        logger.error(
+            f"Failed to update annotation snapshot of {project.name}, "
+            f"discarding it: {e}"
+        )
+        _discard_annotation_snapshot(s3_service, project)
+        return
+
+    # 快照写入后再标记变更
+    _mark_label_check_dirty(project.name, frames, obj_ids)
+
+
+def build_annotation_snapshot(
+    project_name: str, session: Session = Depends(get_session)
+) -> Dict[str, Any]:
+    """
+    重新读取全部标注文件生成项目的标注快照
+    """
+    project = project_cache.get(project_name, session)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    s3_service = S3Service(
+        access_key_id=project.access_key_id,
+        secret_access_key=project.secret_access_key,
+        endpoint_url=project.s3_endpoint,
+        region_name=project.region_name,
+    )
+    with _annotation_snapshot_lock(project.name):
+        snapshot = _rebuild_annotation_snapshot(s3_service, project)
+    return {
+        "key": _snapshot_key(project),
+        "frame_count": len(snapshot.frames),
+        "box_count": len(snapshot),
+    }
+
+
+def _object_tracks_key(project_name: str) -> str:
+    """目标轨迹索引：redis hash，obj_id -> 轨迹 JSON [{"frame", "box"}]"""
+    return f"object_tracks:{project_name}"
+
+
+def _write_object_tracks(
+    project_name: str,
+    snapshot: AnnotationSnapshot,
+    obj_ids: Optional[Set[str]] = None,
+) -> None:
+    """从快照写入目标轨迹索引；obj_ids 为 None 时重建整个索引，否则只更新这些目标"""
+    key = _object_tracks_key(project_name)
+    tracks = snapshot.tracks(obj_ids)
+    pipe = redis_client.pipeline()
+    if obj_ids is None:
+        pipe.delete(key)
+    else:
+        removed = [obj_id for obj_id in obj_ids if obj_id not in tracks]
+        if removed:
+            pipe.hdel(key, *removed)
+    if tracks:
+        pipe.hset(key, mapping={obj_id: json.dumps(t) for obj_id, t in tracks.items()})
+    pipe.execute()
+
+
+def load_object_track(
+    s3_service: S3Service, project: Project, obj_id: str
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    从轨迹索引读取单个目标的轨迹，索引不存在时先由快照生成
+
+    Returns:
+        [{"frame", "box"}]，按帧时间排序；目标不存在时返回 None
+    """
+    key = _object_tracks_key(project.name)
+    if not redis_client.exists(key):
+        with _annotation_snapshot_lock(project.name):
+            if not redis_client.exists(key):
+                snapshot, rebuilt = load_current_annotation_snapshot(
+                    s3_service, project, locked=True
+                )
+                if not rebuilt:
+                    _write_object_tracks(project.name, snapshot)
+    track = redis_client.hget(key, obj_id)
+    return json.loads(track) if track else None
+
+
+def get_object_track(
+    project_name: str, obj_id: str, session: Session = Depends(get_session)
+) -> Dict[str, Any]:
+    """
+    获取单个目标在全部帧中的轨迹
+    """
+    project = project_cache.get(project_name, session)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    s3_service = S3Service(
+        access_key_id=project.access_key_id,
+        secret_access_key=project.secret_access_key,
+        endpoint_url=project.s3_endpoint,
+        region_name=project.region_name,
+    )
+    track = load_object_track(s3_service, project, obj_id)
+    if track is None:
+        raise HTTPException(status_code=404, detail=f"Object {obj_id} not found")
+    return {"obj_id": obj_id, "track": track}
+
+
+def _label_key(project: Project, frame: str) -> str:
+    prefix = project.bucket_prefix or ""
+    if prefix and not prefix.endswith("/"):
+        prefix += "/"
+    return f"{prefix}label/{frame}.json"
 
 
 def save_world_list(
@@ -200,9 +743,7 @@ def save_world_list(
         project_name = request[0].scene
 
         # 获取项目信息
-        project = session.exec(
-            select(Project).where(Project.name == project_name)
-        ).first()
+        project = project_cache.get(project_name, session)
 
         if not project:
             raise HTTPException(
@@ -219,30 +760,34 @@ def save_world_list(
         )
 
         saved_count = 0
+        saved: List[FrameAnnotation] = []
+        label_etags: Dict[str, Optional[str]] = {}
 
-        # 保存每帧
-        for item in request:
-            try:
-                prefix = project.bucket_prefix or ""
-                if prefix and not prefix.endswith("/"):
-                    prefix += "/"
+        # 保存每帧；标注文件与快照在同一把锁内更新，并发保存不会让快照与
+        # 标注文件错开
+        with _annotation_snapshot_lock(project.name):
+            for item in request:
+                try:
+                    label_key = _label_key(project, item.frame)
 
-                label_key = f"{prefix}label/{item.frame}.json"
+                    label_etags[item.frame] = s3_service.upload_json_object(
+                        bucket_name=project.bucket_name,
+                        key=label_key,
+                        data=[a.model_dump(exclude_none=True) for a in item.annotation],
+                    )
 
-                s3_service.upload_json_object(
-                    bucket_name=project.bucket_name,
-                    key=label_key,
-                    data=item.annotation.model_dump(exclude_none=True),
-                )
+                    saved_count += 1
+                    saved.append(item)
 
-                saved_count += 1
+                except Exception as e:
+                    logger.error(
+                        f"Failed to save annotation for {project_name}/{item.frame}: {e}"
+                    )
+                    logger.error(f"Annotation data: {item.annotation}")
+                    continue
 
-            except Exception as e:
-                logger.error(
-                    f"Failed to save annotation for {project_name}/{item.frame}: {e}"
-                )
-                logger.error(f"Annotation data: {item.annotation}")
-                continue
+            if saved:
+                _update_annotation_snapshot(s3_service, project, saved, label_etags)
 
         return {
             "message": f"Successfully saved {saved_count} annotations",
@@ -258,3 +803,367 @@ def save_world_list(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to save annotations: {str(e)}",
         )
+
+
+def _save_object_boxes(
+    s3_service: S3Service,
+    project: Project,
+    boxes: Dict[str, List[AnnotationItem]],
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    expected_etags: Optional[Dict[str, Optional[str]]] = None,
+    overwrite: bool = True,
+) -> Tuple[List[FrameAnnotation], List[str], List[str]]:
+    """
+    并发写回若干帧中指定目标的框：帧内这些目标原有的框被替换，其余框保持不变
+
+    读取、写回标注文件与更新快照都在快照锁内进行；框是根据较早读到的标注
+    算出的，写回前按当前标注文件检查，有冲突的帧跳过而不是覆盖别人的修改。
+
+    Args:
+        boxes: 帧 ID -> 该帧要写入的框
+        expected_etags: 帧 ID -> 计算框时该帧标注文件的 ETag（None 表示当时没有
+            标注文件）；给出时，当前 ETag 不同的帧被跳过
+        overwrite: 为 False 时，当前标注中这些目标已有框的帧被跳过
+
+    Returns:
+        (已保存的帧, 保存失败的帧 ID, 因冲突跳过的帧 ID)，并已更新标注快照
+    """
+
+    def _save(frame: str) -> Optional[Tuple[FrameAnnotation, Optional[str]]]:
+        key = _label_key(project, frame)
+        data, etag = s3_service.read_json_object_if_none_match(project.bucket_name, key)
+        if expected_etags is not None and frame in expected_etags:
+            if (etag or "").strip('"') != (expected_etags[frame] or ""):
+                return None
+        items = [AnnotationItem(**item) for item in (data or [])]
+        replaced = {box.obj_id for box in boxes[frame]}
+        if not overwrite and any(a.obj_id in replaced for a in items):
+            return None
+        items = [a for a in items if a.obj_id not in replaced] + boxes[frame]
+        etag = s3_service.upload_json_object(
+            bucket_name=project.bucket_name,
+            key=key,
+            data=[a.model_dump(exclude_none=True) for a in items],
+        )
+        return FrameAnnotation(scene=project.name, frame=frame, annotation=items), etag
+
+    saved: List[FrameAnnotation] = []
+    failed: List[str] = []
+    skipped: List[str] = []
+    label_etags: Dict[str, Optional[str]] = {}
+    with _annotation_snapshot_lock(project.name):
+        with ThreadPoolExecutor(max_workers=LABEL_FETCH_WORKERS) as executor:
+            futures = {executor.submit(_save, frame): frame for frame in boxes}
+            for i, (future, frame) in enumerate(futures.items(), 1):
+                try:
+                    result = future.result()
+                    if result is None:
+                        logger.warning(
+                            f"Labels of {project.name}/{frame} changed, boxes not saved"
+                        )
+                        skipped.append(frame)
+                    else:
+                        frame_annotation, label_etags[frame] = result
+                        saved.append(frame_annotation)
+                except Exception as e:
+                    logger.error(
+                        f"Failed to save boxes for {project.name}/{frame}: {e}"
+                    )
+                    failed.append(frame)
+                if on_progress and (i % 100 == 0 or i == len(futures)):
+                    on_progress(i, len(futures))
+
+        if saved:
+            _update_annotation_snapshot(s3_service, project, saved, label_etags)
+    return saved, failed, skipped
+
+
+def interpolate_object_track(
+    project_name: str,
+    obj_id: str,
+    session: Session = Depends(get_session),
+    start_frame: Optional[str] = None,
+    end_frame: Optional[str] = None,
+    extrapolate: bool = True,
+) -> Dict[str, Any]:
+    """
+    补全目标轨迹：在 [start_frame, end_frame] 内该目标缺失的帧上插值 / 外推出框并保存
+
+    已有的框全部作为关键帧保持不变，只写入新补出框的帧
+    """
+    project = project_cache.get(project_name, session)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    s3_service = S3Service(
+        access_key_id=project.access_key_id,
+        secret_access_key=project.secret_access_key,
+        endpoint_url=project.s3_endpoint,
+        region_name=project.region_name,
+    )
+
+    # 1. 从轨迹索引取出目标的整条轨迹
+    track = load_object_track(s3_service, project, obj_id)
+    if not track:
+        raise HTTPException(status_code=404, detail=f"Object {obj_id} not found")
+    # 同一帧内重复的目标只取第一个
+    boxes: Dict[str, Dict[str, Any]] = {}
+    for entry in track:
+        boxes.setdefault(entry["frame"], entry["box"])
+    key_boxes = [AnnotationItem(**box) for box in boxes.values()]
+
+    # 2. 时间轴：主雷达的全部帧（含未标注的帧），按时间戳排序
+    frames = list_frame_timestamps(project_name, session)
+    frames = sorted(set(frames) | set(boxes), key=frame_sort_key)
+    times = frame_times(frames)
+    frame_index = {frame: i for i, frame in enumerate(frames)}
+    key_index = np.array([frame_index[frame] for frame in boxes], dtype=np.int64)
+
+    for frame in (start_frame, end_frame):
+        if frame is not None and frame not in frame_index:
+            raise HTTPException(status_code=404, detail=f"Frame {frame} not found")
+    start = 0 if start_frame is None else frame_index[start_frame]
+    end = len(frames) - 1 if end_frame is None else frame_index[end_frame]
+    if start > end:
+        raise HTTPException(
+            status_code=400,
+            detail=f"start_frame {start_frame} is after end_frame {end_frame}",
+        )
+
+    in_range = np.zeros(len(frames), dtype=bool)
+    in_range[start : end + 1] = True
+    in_range[key_index] = False
+    query_index = np.nonzero(in_range)[0]
+
+    # 3. 整条轨迹一次性插值 / 外推
+    psr = [box.psr for box in key_boxes]
+    filled = fill_track(
+        times[key_index],
+        np.array([[p.position.x, p.position.y, p.position.z] for p in psr]),
+        np.array(
+            [[p.rotation.x, p.rotation.y, p.rotation.z, p.rotation.w] for p in psr]
+        ),
+        np.array([[p.scale.x, p.scale.y, p.scale.z] for p in psr]),
+        times[query_index],
+        extrapolate=extrapolate,
+    )
+    valid = filled["valid"]
+    query_index = query_index[valid]
+    # 新框沿用时间上最近的前一个关键帧（没有则第一个）的类别与属性
+    ref = np.clip(np.searchsorted(key_index, query_index) - 1, 0, len(key_boxes) - 1)
+    new_items = {
+        frames[i]: AnnotationItem(
+            obj_id=obj_id,
+            obj_type=key_boxes[r].obj_type,
+            obj_attr=key_boxes[r].obj_attr,
+            psr={
+                "position": dict(zip("xyz", position)),
+                "rotation": dict(zip("xyzw", rotation)),
+                "scale": dict(zip("xyz", scale)),
+            },
+        )
+        for i, r, position, rotation, scale in zip(
+            query_index.tolist(),
+            ref.tolist(),
+            filled["position"][valid].tolist(),
+            filled["rotation"][valid].tolist(),
+            filled["scale"][valid].tolist(),
+        )
+    }
+
+    # 4. 并发写回受影响的帧
+    # 轨迹读出后在这些帧上新加了该目标的框时跳过该帧，不覆盖
+    saved, failed, skipped = _save_object_boxes(
+        s3_service,
+        project,
+        {frame: [item] for frame, item in new_items.items()},
+        overwrite=False,
+    )
+
+    return {
+        "obj_id": obj_id,
+        "key_frames": len(key_index),
+        "updated_frames": sorted((item.frame for item in saved), key=frame_sort_key),
+        "failed_frames": failed,
+        "skipped_frames": sorted(skipped, key=frame_sort_key),
+    }
+
+
+def smooth_project_tracks(
+    project_name: str,
+    request: TrajectorySmoothRequest,
+    session: Session = Depends(get_session),
+    on_progress: Optional[Callable[[str, float], None]] = None,
+) -> Dict[str, Any]:
+    """
+    对整个场景的全部（或指定）目标轨迹批量插值 / 平滑 / 外推并保存
+
+    所有轨迹打包为 (目标数, 帧数, 9) 数组一次计算，只写回框有变化的帧
+    """
+    on_progress = on_progress or (lambda step, progress: None)
+    project = project_cache.get(project_name, session)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    s3_service = S3Service(
+        access_key_id=project.access_key_id,
+        secret_access_key=project.secret_access_key,
+        endpoint_url=project.s3_endpoint,
+        region_name=project.region_name,
+    )
+
+    # 1. 读取快照并打包轨迹
+    on_progress("Loading annotation snapshot", 0.0)
+    snapshot, _ = load_current_annotation_snapshot(s3_service, project)
+    columns = snapshot.columns
+    selected = columns["obj_id"] != ""
+    if request.obj_ids is not None:
+        selected &= np.isin(columns["obj_id"], request.obj_ids)
+    source = np.nonzero(selected)[0]
+
+    frames = list_frame_timestamps(project_name, session)
+    frames = sorted(set(frames) | set(snapshot.frames.tolist()), key=frame_sort_key)
+    frame_index = {frame: i for i, frame in enumerate(frames)}
+    obj_ids, states, mask, rows = pack_tracks(
+        columns["obj_id"][source],
+        np.array(
+            [frame_index[f] for f in columns["frame"][source].tolist()], dtype=np.int64
+        ),
+        columns["position"][source],
+        columns["rotation"][source],
+        columns["scale"][source],
+        len(frames),
+    )
+    rows = np.where(rows >= 0, source[np.clip(rows, 0, None)], -1)
+
+    # 2. 全部轨迹一次计算
+    on_progress(f"Smoothing {len(obj_ids)} tracks", 20.0)
+    smoothed, smoothed_mask = smooth_tracks(
+        states,
+        mask,
+        frame_times(frames),
+        interpolate=request.interpolate,
+        max_gap=request.max_gap,
+        window=request.window,
+        extrapolate_frames=request.extrapolate_frames,
+    )
+    # 角度按展开后的值比较，避免 2pi 的差异被当作变化
+    changed = smoothed_mask & (
+        ~mask | np.any(np.abs(smoothed - unwrap_angles(states, mask)) > 1e-6, axis=-1)
+    )
+
+    # 3. 生成需要写回的框，按帧分组
+    ref_rows = reference_rows(rows)
+    changed_obj, changed_frame = np.nonzero(changed)
+    quats = rpy_to_quat(smoothed[changed_obj, changed_frame, 6:])
+    boxes: Dict[str, List[AnnotationItem]] = {}
+    for f, added, box, state, quat in zip(
+        changed_frame.tolist(),
+        (rows[changed_obj, changed_frame] < 0).tolist(),
+        snapshot.row_items(ref_rows[changed_obj, changed_frame]),
+        smoothed[changed_obj, changed_frame].tolist(),
+        quats.tolist(),
+    ):
+        if added:
+            box.pop("num_pts", None)  # 补出的框没有点数
+        box["psr"] = {
+            "position": dict(zip("xyz", state[0:3])),
+            "rotation": dict(zip("xyzw", quat)),
+            "scale": dict(zip("xyz", state[3:6])),
+        }
+        boxes.setdefault(frames[f], []).append(AnnotationItem(**box))
+
+    # 4. 并发写回；快照读出后标注文件有变化的帧跳过，框按旧标注算出
+    on_progress(f"Saving {len(boxes)} frames", 40.0)
+    saved, failed, skipped = _save_object_boxes(
+        s3_service,
+        project,
+        boxes,
+        on_progress=lambda done, total: on_progress(
+            f"Saving frames {done}/{total}", 40.0 + 60.0 * done / total
+        ),
+        expected_etags={frame: snapshot.label_etags.get(frame) for frame in boxes},
+    )
+    return {
+        "object_count": len(obj_ids),
+        "boxes_added": int((changed & ~mask).sum()),
+        "boxes_updated": int((changed & mask).sum()),
+        "updated_frames": len(saved),
+        "failed_frames": failed,
+        "skipped_frames": sorted(skipped, key=frame_sort_key),
+    }
+
+
+def start_smooth_tracks_task(
+    project_name: str,
+    request: TrajectorySmoothRequest,
+    session: Session = Depends(get_session),
+) -> Dict[str, Any]:
+    """
+    启动后台批量轨迹平滑任务；同一项目已有任务在运行时返回该任务
+    """
+    project = project_cache.get(project_name, session)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    redis_key = f"smooth_tracks_task:{project_name}"
+    task_id = redis_client.get(redis_key)
+    if task_id:
+        return get_smooth_tracks_task(project_name, task_id.decode("utf-8"))
+
+    # 通过任务名发送，避免与任务模块循环导入
+    celery_task = celery_app.send_task(
+        "app.tasks.trajectory_tasks.smooth_tracks_task",
+        kwargs={"project_name": project_name, "request": request.model_dump()},
+    )
+    redis_client.set(
+        _smooth_tracks_task_record_key(celery_task.id),
+        project_name,
+        ex=SMOOTH_TRACKS_TASK_RECORD_TTL,
+    )
+    if not redis_client.set(redis_key, celery_task.id, ex=600, nx=True):
+        return get_smooth_tracks_task(
+            project_name, redis_client.get(redis_key).decode("utf-8")
+        )
+    return {
+        "task_id": celery_task.id,
+        "status": TaskStatusEnum.PENDING,
+        "message": f"Track smoothing task created for project '{project_name}'",
+        "progress": 0.0,
+        "result": None,
+    }
+
+
+def _smooth_tracks_task_record_key(task_id: str) -> str:
+    """任务 ID -> 所属项目，启动任务时写入"""
+    return f"smooth_tracks_task_project:{task_id}"
+
+
+def get_smooth_tracks_task(project_name: str, task_id: str) -> Dict[str, Any]:
+    """查询批量轨迹平滑任务的状态，完成后返回统计结果"""
+    project = redis_client.get(_smooth_tracks_task_record_key(task_id))
+    if project is None or project.decode("utf-8") != project_name:
+        # 未知、已过期或属于其他项目的任务（Celery 对未知 ID 只会返回 PENDING）
+        raise HTTPException(
+            status_code=404,
+            detail=f"Smooth tracks task {task_id} not found for project {project_name}",
+        )
+    task_result = AsyncResult(task_id, app=celery_app)
+    state = task_result.state
+    info = task_result.info if isinstance(task_result.info, dict) else {}
+    result = None
+    if state == "SUCCESS":
+        task_status = TaskStatusEnum.COMPLETED
+        result = info
+    elif state in ("FAILURE", TaskStatusEnum.FAILED):
+        task_status = TaskStatusEnum.FAILED
+        info = {"message": str(task_result.info)}
+    elif state == TaskStatusEnum.PROCESSING:
+        task_status = TaskStatusEnum.PROCESSING
+    else:
+        task_status = TaskStatusEnum.PENDING
+    return {
+        "task_id": task_id,
+        "status": task_status,
+        "message": info.get("message", ""),
+        "progress": info.get("progress", 100.0 if result else 0.0),
+        "result": result,
+    }
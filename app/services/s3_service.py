@@ -1,6 +1,8 @@
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError, NoCredentialsError, EndpointConnectionError
 from typing import List, Dict, Optional, Tuple
+import io
 import os
 import re
 import logging
@@ -35,6 +37,98 @@ CONTENT_TYPE_MAP = {
 }
 
 
+class S3MultipartWriter(io.RawIOBase):
+    """
+    以文件对象的形式写入 S3 对象：数据按分片大小缓冲并通过 multipart upload 上传，
+    不在本地落盘。可直接作为 zipfile / tarfile 的输出流使用。
+    """
+
+    def __init__(
+        self,
+        s3_client,
+        bucket_name: str,
+        key: str,
+        content_type: str = "application/octet-stream",
+        part_size: int = 8 * 1024 * 1024,
+    ):
+        super().__init__()
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.key = key
+        self.part_size = max(part_size, 5 * 1024 * 1024)  # S3 最小分片 5MB
+        self._buffer = bytearray()
+        self._parts: List[Dict[str, Any]] = []
+        self._position = 0
+        response = s3_client.create_multipart_upload(
+            Bucket=bucket_name, Key=key, ContentType=content_type
+        )
+        self._upload_id = response["UploadId"]
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def write(self, data) -> int:
+        if self.closed:
+            raise ValueError("write to closed S3MultipartWriter")
+        self._buffer.extend(data)
+        self._position += len(data)
+        while len(self._buffer) >= self.part_size:
+            self._upload_part(bytes(self._buffer[: self.part_size]))
+            del self._buffer[: self.part_size]
+        return len(data)
+
+    def _upload_part(self, body: bytes) -> None:
+        part_number = len(self._parts) + 1
+        response = self.s3_client.upload_part(
+            Bucket=self.bucket_name,
+            Key=self.key,
+            UploadId=self._upload_id,
+            PartNumber=part_number,
+            Body=body,
+        )
+        self._parts.append({"PartNumber": part_number, "ETag": response["ETag"]})
+
+    def close(self) -> None:
+        """上传剩余数据并完成 multipart upload"""
+        if self.closed:
+            return
+        try:
+            if self._buffer or not self._parts:
+                self._upload_part(bytes(self._buffer))
+                self._buffer.clear()
+            self.s3_client.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=self.key,
+                UploadId=self._upload_id,
+                MultipartUpload={"Parts": self._parts},
+            )
+        except Exception:
+            self.abort()
+            raise
+        super().close()
+
+    def abort(self) -> None:
+        """放弃上传，清理已上传的分片"""
+        if self.closed:
+            return
+        try:
+            self.s3_client.abort_multipart_upload(
+                Bucket=self.bucket_name, Key=self.key, UploadId=self._upload_id
+            )
+        except ClientError as e:
+            logger.error(f"Failed to abort multipart upload {self.key}: {e}")
+        super().close()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+
 class S3Service:
     """S3 存储服务类"""
 
@@ -44,6 +138,7 @@ class S3Service:
         secret_access_key: str,
         endpoint_url: Optional[str] = None,
         region_name: str = "us-east-1",
+        max_pool_connections: int = int(os.getenv("S3_MAX_POOL_CONNECTIONS", "32")),
     ):
         """
         初始化 S3 客户端
@@ -53,6 +148,7 @@ class S3Service:
             secret_access_key: AWS Secret Access Key
             endpoint_url: S3 端点 URL（可选，用于兼容 MinIO 等）
             region_name: AWS 区域名称
+            max_pool_connections: HTTP 连接池大小，需不小于并发读取的线程数
         """
         try:
             self.s3_client = boto3.client(
@@ -61,6 +157,7 @@ class S3Service:
                 aws_secret_access_key=secret_access_key,
                 endpoint_url=endpoint_url,
                 region_name=region_name,
+                config=Config(max_pool_connections=max_pool_connections),
             )
             self.region_name = region_name
         except Exception as e:
@@ -170,17 +267,60 @@ class S3Service:
             print(f"Error reading JSON object s3://{bucket_name}/{key}: {e}")
             raise
 
-    def upload_json_object(self, bucket_name: str, key: str, data: JSONLike) -> None:
+    def head_object_etag(self, bucket_name: str, key: str) -> Optional[str]:
         """
-        将一个 Python 字典序列化为 JSON 并上传到 S3。
+        返回对象的 ETag，对象不存在时返回 None；其他错误抛出。
         """
         try:
-            self.s3_client.put_object(
+            response = self.s3_client.head_object(Bucket=bucket_name, Key=key)
+        except ClientError as e:
+            code = str(e.response.get("Error", {}).get("Code", ""))
+            status = e.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+            if code in ("404", "NoSuchKey", "NotFound") or status == 404:
+                return None
+            raise
+        return response["ETag"]
+
+    def read_json_object_if_none_match(
+        self, bucket_name: str, key: str, etag: Optional[str] = None
+    ) -> Tuple[Optional[JSONLike], Optional[str]]:
+        """
+        条件读取 JSON 文件（GetObject If-None-Match），一次请求完成存在性检查与读取。
+
+        Returns:
+            (数据, ETag)：对象 ETag 与 etag 相同时为 (None, ETag)，
+            对象不存在时为 (None, None)
+        """
+        kwargs = {"Bucket": bucket_name, "Key": key}
+        if etag:
+            kwargs["IfNoneMatch"] = etag
+        try:
+            response = self.s3_client.get_object(**kwargs)
+        except ClientError as e:
+            code = str(e.response.get("Error", {}).get("Code", ""))
+            status = e.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+            if code in ("304", "NotModified") or status == 304:
+                return None, etag
+            if code in ("404", "NoSuchKey", "NotFound") or status == 404:
+                return None, None
+            raise
+        content = response["Body"].read().decode("utf-8")
+        return json.loads(content), response["ETag"]
+
+    def upload_json_object(
+        self, bucket_name: str, key: str, data: JSONLike
+    ) -> Optional[str]:
+        """
+        将一个 Python 字典序列化为 JSON 并上传到 S3，返回新对象的 ETag。
+        """
+        try:
+            response = self.s3_client.put_object(
                 Bucket=bucket_name,
                 Key=key,
                 Body=json.dumps(data, indent=2),  # indent for human readability
                 ContentType="application/json",
             )
+            return response.get("ETag")
         except ClientError as e:
             print(f"Error uploading JSON object to s3://{bucket_name}/{key}: {e}")
             raise
@@ -444,6 +584,54 @@ class S3Service:
             logging.error(f"上传对象失败: {e}")
             return False
 
+    def get_object_stream(self, bucket_name: str, object_key: str) -> Tuple[Any, int]:
+        """
+        以流的方式读取对象，不把内容整体读入内存。
+
+        :return: (StreamingBody, 对象大小)
+        """
+        response = self.s3_client.get_object(Bucket=bucket_name, Key=object_key)
+        return response["Body"], response["ContentLength"]
+
+    def open_multipart_writer(
+        self,
+        bucket_name: str,
+        object_key: str,
+        content_type: str = "application/octet-stream",
+    ) -> S3MultipartWriter:
+        """
+        打开一个流式写入的 S3 对象（multipart upload）。
+
+        :param bucket_name: Bucket 名称
+        :param object_key: 对象键
+        :param content_type: 对象内容类型
+        :return: 可写文件对象，close() 时完成上传
+        """
+        return S3MultipartWriter(
+            self.s3_client, bucket_name, object_key, content_type=content_type
+        )
+
+    def delete_objects(self, bucket_name: str, object_keys: List[str]) -> int:
+        """
+        批量删除对象（每次请求最多 1000 个键）。
+
+        :param bucket_name: Bucket 名称
+        :param object_keys: 要删除的对象键列表
+        :return: 成功删除的对象数量
+        """
+        deleted_count = 0
+        for i in range(0, len(object_keys), 1000):
+            batch = object_keys[i : i + 1000]
+            try:
+                response = self.s3_client.delete_objects(
+                    Bucket=bucket_name,
+                    Delete={"Objects": [{"Key": k} for k in batch], "Quiet": True},
+                )
+                deleted_count += len(batch) - len(response.get("Errors", []))
+            except ClientError as e:
+                logging.error(f"批量删除对象失败: {e}")
+        return deleted_count
+
     def _extract_camera_id(self, file_path: str) -> str:
         """
         从文件路径中提取相机ID
@@ -5,11 +5,13 @@ Celery 导出任务定义
 import os
 import json
 import uuid
+import time
+import tarfile
 import zipfile
 import shutil
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import logging
 import redis
 from celery import current_task
@@ -21,10 +23,15 @@ from nextpoints_sdk.models.annotation import AnnotationItem
 
 # 注意：这里需要导入你实际的 celery_app
 from app.celery_app import celery_app
-from app.models.export_model import ExportStatus, NuScenesExportRequest
+from app.models.export_model import (
+    ExportStatus,
+    NuScenesExportRequest,
+    KittiExportRequest,
+)
 from app.database import get_session
 
 from app.services.s3_service import S3Service
+from app.services.project_cache import project_cache
 from app.models.export_model import NuScenesExportRequest
 
 # from app.models.meta_data_model import ProjectMetadataResponse
@@ -32,10 +39,30 @@ from nextpoints_sdk.models.project_metadata import ProjectMetadataResponse
 from nextpoints_sdk.models.project import Project
 
 from tools.export_tools.export_to_nuscenes import NextPointsToNuScenesConverter
-from tools.project_metadata import get_project_metadata
+from tools.export_tools.export_to_kitti import NextPointsToKittiConverter
+from tools.export_tools.export_to_nuscenes.utils import (
+    ExportManifest,
+    MANIFEST_FILENAME,
+)
+from tools.export_tools.export_to_nuscenes.merge import (
+    NUSCENES_TABLES,
+    merge_partial_tables,
+    save_merged_tables,
+)
+from tools.project_metadata import get_project_metadata, list_label_etags
 
 redis_client = redis.Redis.from_url(celery_app.conf.broker_url)
 
+# 导出压缩包格式
+ARCHIVE_EXTENSIONS = {"zip": ".zip", "tar.gz": ".tar.gz", "tar": ".tar"}
+ARCHIVE_CONTENT_TYPES = {
+    "zip": "application/zip",
+    "tar.gz": "application/gzip",
+    "tar": "application/x-tar",
+}
+# 不再压缩的成员文件类型
+STORED_SUFFIXES = {".jpg", ".jpeg", ".png", ".pcd", ".bin"}
+
 
 @celery_app.task(bind=True)
 def export_to_nuscenes_task(
@@ -58,12 +85,10 @@ def export_to_nuscenes_task(
             # 更新任务状态为处理中
             self.update_state(
                 state=ExportStatus.PROCESSING,
-                meta={"message": "Starting NuScenes export process"},
+                meta={"message": "Starting NuScenes export process", "progress": 0},
             )
             # 1. 验证项目是否存在
-            project: Optional[Project] = session.exec(
-                select(Project).where(Project.name == project_name)
-            ).first()
+            project: Optional[Project] = project_cache.get(project_name, session)
             if not project:
                 raise HTTPException(
                     status_code=404, detail=f"Project not found: {project_name}"
@@ -72,7 +97,10 @@ def export_to_nuscenes_task(
             # 2. 获取项目元数据
             self.update_state(
                 state=ExportStatus.PROCESSING,
-                meta={"message": f"Loading metadata for project: {project_name}"},
+                meta={
+                    "message": f"Loading metadata for project: {project_name}",
+                    "progress": 5,
+                },
             )
             project_metadata = get_project_metadata(project_name, session)
             if not project_metadata:
@@ -82,50 +110,457 @@ def export_to_nuscenes_task(
             output_dir = Path(f"/tmp/exports/{project_name}")
             output_dir.mkdir(parents=True, exist_ok=True)
 
+            s3_service = S3Service(
+                access_key_id=project.access_key_id,
+                secret_access_key=project.secret_access_key,
+                endpoint_url=project.s3_endpoint,
+                region_name=project.region_name,
+            )
+            export_prefix = f"{project.name}/nuscenes/"
+
+            # 增量导出：读取上次导出的 manifest 以及当前标注文件的 ETag
+            previous_manifest = None
+            incremental = (
+                request.export_options.incremental if request.export_options else True
+            )
+            if incremental:
+                previous_manifest = _load_export_manifest(
+                    s3_service, project.bucket_name, export_prefix
+                )
+            label_etags = list_label_etags(s3_service, project)
+            sensor_etags = _list_sensor_etags(s3_service, project)
+
             # 4. 执行转换
             self.update_state(
                 state=ExportStatus.PROCESSING,
                 meta={
                     "message": "converting to NuScenes format",
+                    "progress": 15,
                 },
             )
             result = _perform_nuscenes_conversion(
                 project_metadata=project_metadata,
                 export_request=request,
                 output_dir=output_dir,
+                previous_manifest=previous_manifest,
+                label_etags=label_etags,
+                sensor_etags=sensor_etags,
             )
 
             print(f"output_dir: {output_dir}")
 
             # 5. upload to S3
             self.update_state(
-                state=ExportStatus.PROCESSING, meta={"message": "Uploading to S3"}
+                state=ExportStatus.PROCESSING,
+                meta={"message": "Uploading to S3", "progress": 60},
+            )
+            s3_service.upload_folder(
+                local_folder_path=str(output_dir),
+                bucket_name=project.bucket_name,
+                object_prefix=export_prefix,
+                include_folder_name=False,
+            )
+            if result["stale_files"]:
+                s3_service.delete_objects(
+                    project.bucket_name,
+                    [export_prefix + f for f in result["stale_files"]],
+                )
+
+            # 6. 打包：边生成边通过 multipart upload 写入 S3
+            download_url = None
+            file_size = None
+            if request.export_options:
+                self.update_state(
+                    state=ExportStatus.PROCESSING,
+                    meta={"message": "Packaging export archive", "progress": 80},
+                )
+                output_format = request.export_options.output_format
+                if output_format not in ARCHIVE_EXTENSIONS:
+                    raise ValueError(f"Unsupported output format: {output_format}")
+                archive_key = (
+                    f"{project.name}/exports/{project.name}_nuscenes"
+                    f"{ARCHIVE_EXTENSIONS[output_format]}"
+                )
+                file_size = _stream_archive_to_s3(
+                    source_dir=output_dir,
+                    remote_files=result["reused_files"],
+                    s3_service=s3_service,
+                    bucket_name=project.bucket_name,
+                    remote_prefix=export_prefix,
+                    archive_key=archive_key,
+                    output_format=output_format,
+                )
+                download_url = s3_service.generate_presigned_url(
+                    project.bucket_name,
+                    archive_key,
+                    expiration=project.expiration_minutes * 60,
+                )
+
+            # 7. 清理临时文件
+            shutil.rmtree(output_dir)
+
+            # 8. 返回成功结果
+            return {
+                "status": ExportStatus.COMPLETED,
+                "message": "Export completed successfully",
+                "progress": 100.0,
+                "completed_at": datetime.utcnow().isoformat(),
+                "download_url": download_url,
+                "file_size": file_size,
+                "total_frames_processed": result["frames_count"],
+                "total_annotations_exported": result["annotations_count"],
+                "frames_changed": len(result["frames_changed"]),
+                "files_copied": result["files_copied"],
+                "files_reused": result["files_reused"],
+            }
+
+    except Exception as exc:
+        # 更新任务状态为失败
+        self.update_state(
+            state=ExportStatus.FAILED,
+            meta={
+                "progress": 0,
+                "current_step": "Task failed",
+                "message": str(exc),
+                "error_details": str(exc),
+            },
+        )
+        raise exc
+    finally:
+        redis_key = f"export_to_nuscenes_task:{project_name}"
+        if redis_client.exists(redis_key):
+            try:
+                redis_client.delete(redis_key)
+            except Exception:
+                # 如果无法获取任务状态，保守地设置过期时间
+                redis_client.expire(redis_key, 10)
+
+
+@celery_app.task(bind=True)
+def export_nuscenes_shard_task(
+    self,
+    job_id: str,
+    project_name: str,
+    output_project: str,
+    export_request: dict,
+    start: int,
+    end: int,
+) -> Dict[str, Any]:
+    """
+    分片导出任务：转换项目 [start, end) 区间的帧，上传传感器数据和部分表
+
+    Returns:
+        分片结果（shard_id 及统计信息），供 merge_nuscenes_shards_task 合并
+    """
+    request = NuScenesExportRequest.model_validate(export_request)
+    shard_id = f"{project_name}_{start:06d}"
+    output_dir = Path(f"/tmp/exports/{job_id}/{shard_id}")
+
+    with next(get_session()) as session:
+        self.update_state(
+            state=ExportStatus.PROCESSING,
+            meta={
+                "message": f"Loading frames [{start}, {end}) of {project_name}",
+                "progress": 0,
+            },
+        )
+        dest_project = _get_project(session, output_project)
+        project_metadata = get_project_metadata(
+            project_name, session, frame_range=(start, end)
+        )
+
+    try:
+        converter = NextPointsToNuScenesConverter(
+            project_metadata, request, partial=True
+        )
+        stats = converter.convert(output_dir)
+
+        self.update_state(
+            state=ExportStatus.PROCESSING,
+            meta={"message": f"Uploading shard {shard_id}", "progress": 60},
+        )
+        s3_service = S3Service(
+            access_key_id=dest_project.access_key_id,
+            secret_access_key=dest_project.secret_access_key,
+            endpoint_url=dest_project.s3_endpoint,
+            region_name=dest_project.region_name,
+        )
+        job_prefix = _multi_export_prefix(output_project, job_id)
+        for sub_dir in ("samples", "maps"):
+            s3_service.upload_folder(
+                local_folder_path=str(output_dir / sub_dir),
+                bucket_name=dest_project.bucket_name,
+                object_prefix=f"{job_prefix}{sub_dir}/",
+                include_folder_name=False,
+            )
+        s3_service.upload_folder(
+            local_folder_path=str(output_dir / "v1.0-all"),
+            bucket_name=dest_project.bucket_name,
+            object_prefix=f"{job_prefix}shards/{shard_id}/",
+            include_folder_name=False,
+        )
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    return {
+        "shard_id": shard_id,
+        "frames_processed": stats["frames_processed"],
+        "annotations_converted": stats["annotations_converted"],
+        "errors": stats["errors"],
+    }
+
+
+@celery_app.task(bind=True)
+def merge_nuscenes_shards_task(
+    self,
+    shard_results: List[Dict[str, Any]],
+    job_id: str,
+    output_project: str,
+    export_request: Optional[dict] = None,
+) -> Dict[str, Any]:
+    """
+    合并所有分片的部分表，跨分片重新链接 prev/next，写出统一的 v1.0-all；
+    指定 export_options 时与单项目导出一样打包为压缩包
+    """
+    request = NuScenesExportRequest.model_validate(export_request or {})
+    with next(get_session()) as session:
+        dest_project = _get_project(session, output_project)
+
+    s3_service = S3Service(
+        access_key_id=dest_project.access_key_id,
+        secret_access_key=dest_project.secret_access_key,
+        endpoint_url=dest_project.s3_endpoint,
+        region_name=dest_project.region_name,
+    )
+    bucket_name = dest_project.bucket_name
+    job_prefix = _multi_export_prefix(output_project, job_id)
+    output_dir = Path(f"/tmp/exports/{job_id}/merged/v1.0-all")
+    download_url = None
+    file_size = None
+
+    try:
+        self.update_state(
+            state=ExportStatus.PROCESSING,
+            meta={"message": f"Merging {len(shard_results)} shards", "progress": 90},
+        )
+        partials = []
+        for shard in shard_results:
+            shard_prefix = f"{job_prefix}shards/{shard['shard_id']}/"
+            partials.append(
+                {
+                    name: s3_service.read_json_object(
+                        bucket_name, f"{shard_prefix}{name}.json"
+                    )
+                    for name in NUSCENES_TABLES
+                }
+            )
+        merged = merge_partial_tables(partials)
+        save_merged_tables(merged, output_dir)
+
+        s3_service.upload_folder(
+            local_folder_path=str(output_dir),
+            bucket_name=bucket_name,
+            object_prefix=f"{job_prefix}v1.0-all/",
+            include_folder_name=False,
+        )
+        s3_service.delete_objects(
+            bucket_name, s3_service.list_objects(bucket_name, f"{job_prefix}shards/")
+        )
+
+        # 打包：v1.0-all 在本地，samples / maps 由各分片上传，直接从 S3 读取
+        if request.export_options:
+            self.update_state(
+                state=ExportStatus.PROCESSING,
+                meta={"message": "Packaging export archive", "progress": 95},
+            )
+            output_format = request.export_options.output_format
+            if output_format not in ARCHIVE_EXTENSIONS:
+                raise ValueError(f"Unsupported output format: {output_format}")
+            remote_files = [
+                key[len(job_prefix) :]
+                for sub_dir in ("samples", "maps")
+                for key in s3_service.list_objects(
+                    bucket_name, f"{job_prefix}{sub_dir}/"
+                )
+            ]
+            archive_key = (
+                f"{output_project}/exports/nuscenes_multi_{job_id}"
+                f"{ARCHIVE_EXTENSIONS[output_format]}"
             )
+            file_size = _stream_archive_to_s3(
+                source_dir=output_dir.parent,
+                remote_files=remote_files,
+                s3_service=s3_service,
+                bucket_name=bucket_name,
+                remote_prefix=job_prefix,
+                archive_key=archive_key,
+                output_format=output_format,
+            )
+            download_url = s3_service.generate_presigned_url(
+                bucket_name,
+                archive_key,
+                expiration=dest_project.expiration_minutes * 60,
+            )
+    finally:
+        shutil.rmtree(output_dir.parent, ignore_errors=True)
+
+    return {
+        "status": ExportStatus.COMPLETED,
+        "message": f"Multi-scene export completed: s3://{bucket_name}/{job_prefix}",
+        "progress": 100.0,
+        "completed_at": datetime.utcnow().isoformat(),
+        "download_url": download_url,
+        "file_size": file_size,
+        "total_frames_processed": sum(r["frames_processed"] for r in shard_results),
+        "total_annotations_exported": sum(
+            r["annotations_converted"] for r in shard_results
+        ),
+        "scenes_count": len(merged["scene"]),
+        "errors": [e for r in shard_results for e in r["errors"]],
+    }
+
+
+@celery_app.task
+def cleanup_nuscenes_shards_task(
+    request, exc, traceback, job_id: str, output_project: str
+) -> None:
+    """
+    多项目导出的 chord 错误回调：任一分片或合并失败时删除该次导出已上传的
+    分片表与传感器数据（合并任务不会执行，无人再清理）
+    """
+    logging.error(f"Multi-scene export {job_id} failed: {exc}")
+    with next(get_session()) as session:
+        dest_project = _get_project(session, output_project)
+    s3_service = S3Service(
+        access_key_id=dest_project.access_key_id,
+        secret_access_key=dest_project.secret_access_key,
+        endpoint_url=dest_project.s3_endpoint,
+        region_name=dest_project.region_name,
+    )
+    job_prefix = _multi_export_prefix(output_project, job_id)
+    s3_service.delete_objects(
+        dest_project.bucket_name,
+        s3_service.list_objects(dest_project.bucket_name, job_prefix),
+    )
+
+
+@celery_app.task(bind=True)
+def export_to_kitti_task(
+    self, project_name: str, export_request: dict
+) -> Dict[str, Any]:
+    """
+    导出项目到 KITTI 格式的异步任务
+
+    Args:
+        project_name: 项目名称
+        export_request: 导出请求配置
+
+    Returns:
+        任务结果字典
+    """
+    request = KittiExportRequest.model_validate(export_request)
+
+    try:
+        with next(get_session()) as session:
+            self.update_state(
+                state=ExportStatus.PROCESSING,
+                meta={"message": "Starting KITTI export process", "progress": 0},
+            )
+            project = _get_project(session, project_name)
+
+            self.update_state(
+                state=ExportStatus.PROCESSING,
+                meta={
+                    "message": f"Loading metadata for project: {project_name}",
+                    "progress": 5,
+                },
+            )
+            project_metadata = get_project_metadata(project_name, session)
+            if not project_metadata:
+                raise ValueError(f"Project {project_name} not found")
+
+            output_dir = Path(f"/tmp/exports/{project_name}_kitti")
+            if output_dir.exists():
+                shutil.rmtree(output_dir)
+            output_dir.mkdir(parents=True, exist_ok=True)
+
             s3_service = S3Service(
                 access_key_id=project.access_key_id,
                 secret_access_key=project.secret_access_key,
                 endpoint_url=project.s3_endpoint,
                 region_name=project.region_name,
             )
+            export_prefix = f"{project.name}/kitti/"
+
+            # 1. 转换：各帧的 velodyne / label_2 / calib / image_2 并发写出
+            self.update_state(
+                state=ExportStatus.PROCESSING,
+                meta={"message": "converting to KITTI format", "progress": 15},
+            )
+            converter = NextPointsToKittiConverter(project_metadata, request)
+            stats = converter.convert(output_dir)
+            if stats["frames_processed"] == 0:
+                raise ValueError(
+                    "KITTI conversion failed: " + "; ".join(stats["errors"][:5])
+                )
+
+            # 2. upload to S3
+            self.update_state(
+                state=ExportStatus.PROCESSING,
+                meta={"message": "Uploading to S3", "progress": 60},
+            )
             s3_service.upload_folder(
                 local_folder_path=str(output_dir),
                 bucket_name=project.bucket_name,
-                object_prefix=f"{project.name}/nuscenes/",
+                object_prefix=export_prefix,
                 include_folder_name=False,
             )
 
-            # 6. 清理临时文件
+            # 3. 打包
+            download_url = None
+            file_size = None
+            if request.export_options:
+                self.update_state(
+                    state=ExportStatus.PROCESSING,
+                    meta={"message": "Packaging export archive", "progress": 80},
+                )
+                output_format = request.export_options.output_format
+                if output_format not in ARCHIVE_EXTENSIONS:
+                    raise ValueError(f"Unsupported output format: {output_format}")
+                archive_key = (
+                    f"{project.name}/exports/{project.name}_kitti"
+                    f"{ARCHIVE_EXTENSIONS[output_format]}"
+                )
+                file_size = _stream_archive_to_s3(
+                    source_dir=output_dir,
+                    remote_files=[],
+                    s3_service=s3_service,
+                    bucket_name=project.bucket_name,
+                    remote_prefix=export_prefix,
+                    archive_key=archive_key,
+                    output_format=output_format,
+                )
+                download_url = s3_service.generate_presigned_url(
+                    project.bucket_name,
+                    archive_key,
+                    expiration=project.expiration_minutes * 60,
+                )
+
             shutil.rmtree(output_dir)
 
-            # 7. 返回成功结果
             return {
                 "status": ExportStatus.COMPLETED,
                 "message": "Export completed successfully",
+                "progress": 100.0,
                 "completed_at": datetime.utcnow().isoformat(),
+                "download_url": download_url,
+                "file_size": file_size,
+                "total_frames_processed": stats["frames_processed"],
+                "total_annotations_exported": stats["annotations_converted"],
+                "errors": stats["errors"],
             }
 
     except Exception as exc:
-        # 更新任务状态为失败
         self.update_state(
             state=ExportStatus.FAILED,
             meta={
@@ -137,19 +572,67 @@ def export_to_nuscenes_task(
         )
         raise exc
     finally:
-        redis_key = f"export_to_nuscenes_task:{project_name}"
+        redis_key = f"export_to_kitti_task:{project_name}"
         if redis_client.exists(redis_key):
             try:
                 redis_client.delete(redis_key)
             except Exception:
-                # 如果无法获取任务状态，保守地设置过期时间
                 redis_client.expire(redis_key, 10)
 
 
+def _get_project(session: Session, project_name: str) -> Project:
+    project = project_cache.get(project_name, session)
+    if not project:
+        raise ValueError(f"Project {project_name} not found")
+    return project
+
+
+def _multi_export_prefix(output_project: str, job_id: str) -> str:
+    """多项目导出结果在目标存储桶中的前缀"""
+    return f"{output_project}/nuscenes_multi/{job_id}/"
+
+
+def _load_export_manifest(
+    s3_service: S3Service, bucket_name: str, export_prefix: str
+) -> Optional[ExportManifest]:
+    """读取上次导出的 manifest，不存在或无法解析时返回 None（执行全量导出）"""
+    manifest_key = export_prefix + MANIFEST_FILENAME
+    try:
+        if not s3_service.object_exists(bucket_name, manifest_key):
+            return None
+        return ExportManifest.from_dict(
+            s3_service.read_json_object(bucket_name, manifest_key)
+        )
+    except Exception as e:
+        logging.warning(f"Failed to load export manifest {manifest_key}: {e}")
+        return None
+
+
+def _list_sensor_etags(
+    s3_service: S3Service, project: Project
+) -> Dict[Tuple[str, str], str]:
+    """列出点云与图片，返回 (timestamp, channel) -> ETag，用于判断源文件是否被覆盖"""
+    sensor_etags: Dict[Tuple[str, str], str] = {}
+    for sensor_dir in ("lidar", "camera"):
+        prefix = str(Path(project.bucket_prefix or "") / sensor_dir) + "/"
+        for obj in s3_service.list_all_objects(project.bucket_name, prefix):
+            key = obj.get("Key", "")
+            # 结构：<sensor_dir>/<channel>/<timestamp>.<ext>
+            channel, _, filename = key[len(prefix) :].partition("/")
+            if channel and filename and "/" not in filename:
+                sensor_etags[(Path(filename).stem, channel)] = obj.get(
+                    "ETag", ""
+                ).strip('"')
+    return sensor_etags
+
+
 def _perform_nuscenes_conversion(
     project_metadata: ProjectMetadataResponse,
     export_request: NuScenesExportRequest,
     output_dir: Path,
+    previous_manifest: Optional[ExportManifest] = None,
+    label_etags: Optional[Dict[str, str]] = None,
+    sensor_etags: Optional[Dict[Tuple[str, str], str]] = None,
 ) -> Dict[str, Any]:
     """
     执行实际的 NuScenes 格式转换
@@ -158,7 +641,13 @@ def _perform_nuscenes_conversion(
 
     try:
         # Create converter instance
-        converter = NextPointsToNuScenesConverter(project_metadata, export_request)
+        converter = NextPointsToNuScenesConverter(
+            project_metadata,
+            export_request,
+            previous_manifest=previous_manifest,
+            label_etags=label_etags,
+            sensor_etags=sensor_etags,
+        )
 
         # Perform conversion
         conversion_stats = converter.convert(output_dir)
@@ -167,6 +656,11 @@ def _perform_nuscenes_conversion(
             "frames_count": conversion_stats.get("frames_processed", 0),
             "annotations_count": conversion_stats.get("annotations_converted", 0),
             "instances_count": conversion_stats.get("instances_created", 0),
+            "frames_changed": conversion_stats.get("frames_changed", []),
+            "files_copied": conversion_stats.get("files_copied", 0),
+            "files_reused": conversion_stats.get("files_reused", 0),
+            "stale_files": conversion_stats.get("stale_files", []),
+            "reused_files": conversion_stats.get("reused_files", []),
             "errors": conversion_stats.get("errors", []),
         }
 
@@ -175,21 +669,84 @@ def _perform_nuscenes_conversion(
             "frames_count": 0,
             "annotations_count": 0,
             "instances_count": 0,
+            "frames_changed": [],
+            "files_copied": 0,
+            "files_reused": 0,
+            "stale_files": [],
+            "reused_files": [],
             "errors": [f"Conversion failed: {str(e)}"],
         }
 
 
-def _create_archive(source_dir: Path, project_name: str) -> Path:
-    """创建压缩包"""
-    archive_path = Path(f"/tmp/exports/{project_name}.zip")
+def _stream_archive_to_s3(
+    source_dir: Path,
+    remote_files: List[str],
+    s3_service: S3Service,
+    bucket_name: str,
+    remote_prefix: str,
+    archive_key: str,
+    output_format: str,
+) -> int:
+    """
+    将导出目录打包并直接流式上传到 S3，不在本地生成压缩包。
 
-    with zipfile.ZipFile(archive_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-        for file_path in source_dir.rglob("*"):
-            if file_path.is_file():
-                arcname = file_path.relative_to(source_dir)
-                zipf.write(file_path, arcname)
+    Args:
+        source_dir: 本地导出目录
+        remote_files: 增量导出中复用、仅存在于 S3 (remote_prefix 下) 的相对路径
+        output_format: zip / tar.gz / tar
 
-    return archive_path
+    Returns:
+        压缩包大小（字节）
+    """
+    local_files = sorted(p for p in source_dir.rglob("*") if p.is_file())
+    content_type = ARCHIVE_CONTENT_TYPES[output_format]
+    with s3_service.open_multipart_writer(
+        bucket_name, archive_key, content_type=content_type
+    ) as writer:
+        if output_format == "zip":
+            # 目标不可 seek，zipfile 会使用 data descriptor 流式写入
+            with zipfile.ZipFile(writer, "w") as zipf:
+                for file_path in local_files:
+                    zipf.write(
+                        file_path,
+                        file_path.relative_to(source_dir).as_posix(),
+                        compress_type=_zip_compress_type(file_path.name),
+                    )
+                for rel in remote_files:
+                    body, size = s3_service.get_object_stream(
+                        bucket_name, remote_prefix + rel
+                    )
+                    zinfo = zipfile.ZipInfo(rel, date_time=time.localtime()[:6])
+                    zinfo.compress_type = _zip_compress_type(rel)
+                    zinfo.file_size = size
+                    with zipf.open(
+                        zinfo, "w", force_zip64=size >= zipfile.ZIP64_LIMIT
+                    ) as dst:
+                        shutil.copyfileobj(body, dst, 1024 * 1024)
+        else:
+            mode = "w|gz" if output_format == "tar.gz" else "w|"
+            with tarfile.open(fileobj=writer, mode=mode) as tar:
+                for file_path in local_files:
+                    tar.add(
+                        file_path, arcname=file_path.relative_to(source_dir).as_posix()
+                    )
+                for rel in remote_files:
+                    body, size = s3_service.get_object_stream(
+                        bucket_name, remote_prefix + rel
+                    )
+                    tarinfo = tarfile.TarInfo(rel)
+                    tarinfo.size = size
+                    tarinfo.mtime = int(time.time())
+                    tar.addfile(tarinfo, body)
+        archive_size = writer.tell()
+    return archive_size
+
+
+def _zip_compress_type(filename: str) -> int:
+    """已压缩的传感器数据（jpg/pcd 等）使用 store 模式，避免重复压缩"""
+    if Path(filename).suffix.lower() in STORED_SUFFIXES:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
 
 
 @celery_app.task(name="cleanup_export_files")
@@ -0,0 +1,87 @@
+# app/tasks/label_check_tasks.py
+import json
+from datetime import datetime
+from typing import Any, Dict, List
+
+import redis
+
+from nextpoints_sdk.models.enums import TaskStatusEnum
+from nextpoints_sdk.models.project import Project
+
+from app.celery_app import celery_app
+from app.database import get_session
+from app.services.s3_service import S3Service
+from app.services.project_cache import project_cache
+from app.services import project_service
+
+redis_client = redis.Redis.from_url(celery_app.conf.broker_url)
+
+
+@celery_app.task(bind=True)
+def check_label_task(self, project_name: str) -> Dict[str, Any]:
+    """
+    后台执行项目标注检查，检查消息边产生边写入消息流
+
+    Args:
+        project_name: 项目名称
+
+    Returns:
+        任务结果字典
+    """
+    stream_key = project_service.label_check_stream_key(self.request.id)
+    message_count = 0
+
+    def on_progress(step: str, progress: float):
+        self.update_state(
+            state=TaskStatusEnum.PROCESSING,
+            meta={
+                "message": step,
+                "progress": round(progress, 1),
+                "message_count": message_count,
+            },
+        )
+
+    def on_messages(messages: List[Dict[str, Any]]):
+        nonlocal message_count
+        pipe = redis_client.pipeline()
+        pipe.rpush(stream_key, *[json.dumps(m) for m in messages])
+        pipe.expire(stream_key, project_service.LABEL_CHECK_STREAM_TTL)
+        pipe.execute()
+        message_count += len(messages)
+
+    try:
+        with next(get_session()) as session:
+            project = project_cache.get(project_name, session)
+            if not project:
+                raise ValueError(f"Project {project_name} not found")
+
+            s3_service = S3Service(
+                access_key_id=project.access_key_id,
+                secret_access_key=project.secret_access_key,
+                endpoint_url=project.s3_endpoint,
+                region_name=project.region_name,
+            )
+            project_service.run_label_check(
+                project, s3_service, on_progress=on_progress, on_messages=on_messages
+            )
+
+            return {
+                "status": TaskStatusEnum.COMPLETED,
+                "message": "Label check completed successfully",
+                "progress": 100.0,
+                "message_count": message_count,
+                "completed_at": datetime.utcnow().isoformat(),
+            }
+    except Exception as exc:
+        self.update_state(
+            state=TaskStatusEnum.FAILED,
+            meta={"message": str(exc), "message_count": message_count},
+        )
+        raise exc
+    finally:
+        redis_key = f"check_label_task:{project_name}"
+        if redis_client.exists(redis_key):
+            try:
+                redis_client.delete(redis_key)
+            except Exception:
+                redis_client.expire(redis_key, 10)
@@ -19,6 +19,7 @@ from app.celery_app import celery_app
 from app.database import get_session
 
 from app.services.s3_service import S3Service
+from app.services.project_cache import project_cache
 
 from tools.export_tools.export_to_nuscenes import NextPointsToNuScenesConverter
 from tools.import_tools.custom2nextpoints import custom2nextpoints
@@ -152,6 +153,8 @@ def create_project_task(self, create_request: dict) -> Dict[str, Any]:
             self.update_state(state=TaskStatusEnum.FAILED, meta={"message": str(exc)})
             raise exc
         finally:
+            # get_project_metadata 在提交前已缓存本项目，提交或回滚后都需失效
+            project_cache.invalidate(project_name)
             redis_key = f"create_project_task:{project_name}"
             if redis_client.exists(redis_key):
                 try:
@@ -0,0 +1,57 @@
+# app/tasks/trajectory_tasks.py
+from datetime import datetime
+from typing import Any, Dict
+
+import redis
+
+from nextpoints_sdk.models.enums import TaskStatusEnum
+
+from app.celery_app import celery_app
+from app.database import get_session
+from app.models.trajectory_model import TrajectorySmoothRequest
+from app.services import project_service
+
+redis_client = redis.Redis.from_url(celery_app.conf.broker_url)
+
+
+@celery_app.task(bind=True)
+def smooth_tracks_task(self, project_name: str, request: dict) -> Dict[str, Any]:
+    """
+    后台对整个场景的目标轨迹批量插值 / 平滑 / 外推
+
+    Args:
+        project_name: 项目名称
+        request: TrajectorySmoothRequest 配置
+
+    Returns:
+        任务结果字典
+    """
+    smooth_request = TrajectorySmoothRequest.model_validate(request)
+
+    def on_progress(step: str, progress: float):
+        self.update_state(
+            state=TaskStatusEnum.PROCESSING,
+            meta={"message": step, "progress": round(progress, 1)},
+        )
+
+    try:
+        with next(get_session()) as session:
+            stats = project_service.smooth_project_tracks(
+                project_name, smooth_request, session, on_progress=on_progress
+            )
+            return {
+                "status": TaskStatusEnum.COMPLETED,
+                "message": "Track smoothing completed successfully",
+                "completed_at": datetime.utcnow().isoformat(),
+                **stats,
+            }
+    except Exception as exc:
+        self.update_state(state=TaskStatusEnum.FAILED, meta={"message": str(exc)})
+        raise exc
+    finally:
+        redis_key = f"smooth_tracks_task:{project_name}"
+        if redis_client.exists(redis_key):
+            try:
+                redis_client.delete(redis_key)
+            except Exception:
+                redis_client.expire(redis_key, 10)
@@ -0,0 +1,200 @@
+# tools/annotation_snapshot.py
+"""项目标注的列式快照
+
+标注按帧存放在 label/<ts>.json，全项目的检查、导出与统计需要逐个读取解析。
+快照把整个项目的标注存成一个文件，每个 box 一行、每个字段一列（NumPy 数组），
+可一次读取并直接做向量化计算。快照同时记录生成时各标注文件的 S3 ETag，
+读取方据此判断快照是否仍与 label/ 目录一致。
+"""
+
+import io
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from nextpoints_sdk.models.annotation import AnnotationItem, FrameAnnotation
+
+SNAPSHOT_FILENAME = "annotation_snapshot.npz"
+SNAPSHOT_VERSION = 2
+
+# 浮点列名 -> 每行元素个数
+FLOAT_COLUMNS = {"position": 3, "rotation": 4, "scale": 3}
+STRING_COLUMNS = ["frame", "obj_id", "obj_type", "obj_attr"]
+
+
+class AnnotationSnapshot:
+    """每个 box 一行的列式标注表
+
+    Attributes:
+        frames: 项目内全部帧 ID（包含没有标注的帧），按时间戳排序
+        columns: frame / obj_id / obj_type / obj_attr 字符串列，
+            num_pts (int32，缺失为 -1)，position (N,3)，rotation (N,4, xyzw)，
+            scale (N,3)
+        label_etags: 帧 ID -> 生成快照时该帧标注文件的 ETag（不含引号）；
+            包括无法解析、没有进入 frames 的标注文件
+    """
+
+    def __init__(
+        self,
+        frames: Iterable[str],
+        columns: Dict[str, np.ndarray],
+        label_etags: Optional[Dict[str, str]] = None,
+    ):
+        self.frames = np.array(sorted(set(frames), key=frame_sort_key), dtype=str)
+        self.columns = columns
+        self.label_etags: Dict[str, str] = dict(label_etags or {})
+
+    def __len__(self) -> int:
+        return len(self.columns["frame"])
+
+    @classmethod
+    def from_annotations(
+        cls,
+        annotations: Iterable[FrameAnnotation],
+        label_etags: Optional[Dict[str, str]] = None,
+    ) -> "AnnotationSnapshot":
+        frames = []
+        rows = []
+        for frame_annotation in annotations:
+            frames.append(frame_annotation.frame)
+            for item in frame_annotation.annotation or []:
+                rows.append((frame_annotation.frame, item))
+        return cls(frames, _rows_to_columns(rows), label_etags)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> Optional["AnnotationSnapshot"]:
+        """从 npz 内容恢复快照，版本不匹配时返回 None"""
+        with np.load(io.BytesIO(data), allow_pickle=False) as npz:
+            if int(npz["version"]) != SNAPSHOT_VERSION:
+                return None
+            columns = {
+                name: npz[name] for name in [*STRING_COLUMNS, "num_pts", *FLOAT_COLUMNS]
+            }
+            label_etags = dict(
+                zip(npz["etag_frames"].tolist(), npz["etag_values"].tolist())
+            )
+            return cls(npz["frames"].tolist(), columns, label_etags)
+
+    def to_bytes(self) -> bytes:
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer,
+            version=np.array(SNAPSHOT_VERSION),
+            frames=self.frames,
+            etag_frames=np.array(list(self.label_etags.keys()), dtype=str),
+            etag_values=np.array(list(self.label_etags.values()), dtype=str),
+            **self.columns,
+        )
+        return buffer.getvalue()
+
+    def replace_frames(
+        self,
+        annotations: Iterable[FrameAnnotation],
+        label_etags: Optional[Dict[str, str]] = None,
+    ) -> "AnnotationSnapshot":
+        """
+        用新保存的帧替换对应行，返回新的快照
+
+        Args:
+            label_etags: 这些帧保存后标注文件的 ETag；未给出的帧记为空（未知），
+                下次与 label/ 目录比较时快照会被判定为过期
+        """
+        updated = self.from_annotations(annotations)
+        keep = ~np.isin(self.columns["frame"], updated.frames)
+        columns = {
+            name: np.concatenate([column[keep], updated.columns[name]])
+            for name, column in self.columns.items()
+        }
+        etags = dict(self.label_etags)
+        for frame in updated.frames.tolist():
+            etags[frame] = (label_etags or {}).get(frame) or ""
+        return AnnotationSnapshot(
+            [*self.frames.tolist(), *updated.frames], columns, etags
+        )
+
+    def is_current(self, label_etags: Dict[str, str]) -> bool:
+        """快照记录的标注 ETag 与当前 label/ 目录（帧 ID -> ETag）完全一致"""
+        return "" not in self.label_etags.values() and self.label_etags == label_etags
+
+    def row_items(self, rows: Iterable[int]) -> List[dict]:
+        """若干行还原为 AnnotationItem 的字典形式（与 model_dump(exclude_none=True) 一致）"""
+        rows = np.asarray(list(rows), dtype=np.int64)
+        c = {name: column[rows].tolist() for name, column in self.columns.items()}
+        items = []
+        for k in range(len(rows)):
+            item = {"obj_id": c["obj_id"][k], "obj_type": c["obj_type"][k]}
+            if c["obj_attr"][k]:
+                item["obj_attr"] = c["obj_attr"][k]
+            if c["num_pts"][k] >= 0:
+                item["num_pts"] = c["num_pts"][k]
+            item["psr"] = {
+                "position": dict(zip("xyz", c["position"][k])),
+                "rotation": dict(zip("xyzw", c["rotation"][k])),
+                "scale": dict(zip("xyz", c["scale"][k])),
+            }
+            items.append(item)
+        return items
+
+    def to_annotations(self, scene: str) -> List[FrameAnnotation]:
+        """还原为按帧组织的 FrameAnnotation 列表（兼容旧接口）"""
+        by_frame: Dict[str, List[AnnotationItem]] = {
+            frame: [] for frame in self.frames.tolist()
+        }
+        for frame, item in zip(
+            self.columns["frame"].tolist(), self.row_items(range(len(self)))
+        ):
+            by_frame.setdefault(frame, []).append(AnnotationItem(**item))
+        return [
+            FrameAnnotation(scene=scene, frame=frame, annotation=items)
+            for frame, items in by_frame.items()
+        ]
+
+    def tracks(self, obj_ids: Optional[Iterable[str]] = None) -> Dict[str, List[dict]]:
+        """
+        按目标组织的轨迹 obj_id -> [{"frame", "box"}]，每条轨迹按帧时间排序
+
+        Args:
+            obj_ids: 只取这些目标，None 表示全部
+        """
+        rows = np.arange(len(self))
+        if obj_ids is not None:
+            rows = rows[np.isin(self.columns["obj_id"], list(obj_ids))]
+        rank = {frame: i for i, frame in enumerate(self.frames.tolist())}
+        frames = self.columns["frame"][rows].tolist()
+        frame_order = np.array([rank[f] for f in frames], dtype=np.int64)
+        rows = rows[np.lexsort((frame_order, self.columns["obj_id"][rows]))]
+
+        tracks: Dict[str, List[dict]] = {}
+        for frame, item in zip(
+            self.columns["frame"][rows].tolist(), self.row_items(rows)
+        ):
+            tracks.setdefault(item["obj_id"], []).append({"frame": frame, "box": item})
+        return tracks
+
+
+def frame_sort_key(frame: str):
+    """帧 ID 排序键：纳秒时间戳按数值排序，其他 ID 排在后面"""
+    return (0, int(frame), "") if frame.isdigit() else (1, 0, frame)
+
+
+def _rows_to_columns(rows: List[tuple]) -> Dict[str, np.ndarray]:
+    """(frame, AnnotationItem) 行转为列"""
+    columns: Dict[str, np.ndarray] = {
+        "frame": np.array([frame for frame, _ in rows], dtype=str),
+        "obj_id": np.array([item.obj_id for _, item in rows], dtype=str),
+        "obj_type": np.array([item.obj_type for _, item in rows], dtype=str),
+        "obj_attr": np.array([item.obj_attr or "" for _, item in rows], dtype=str),
+        "num_pts": np.array(
+            [-1 if item.num_pts is None else item.num_pts for _, item in rows],
+            dtype=np.int32,
+        ),
+    }
+    psr_fields = {
+        "position": lambda p: (p.position.x, p.position.y, p.position.z),
+        "rotation": lambda p: (p.rotation.x, p.rotation.y, p.rotation.z, p.rotation.w),
+        "scale": lambda p: (p.scale.x, p.scale.y, p.scale.z),
+    }
+    for name, width in FLOAT_COLUMNS.items():
+        values = [psr_fields[name](item.psr) for _, item in rows]
+        columns[name] = np.array(values, dtype=np.float64).reshape(-1, width)
+    return columns
@@ -1,8 +1,10 @@
 import numpy as np
-from typing import List
+from typing import Iterable, List, Optional
 
 from nextpoints_sdk.models.annotation import FrameAnnotation
 
+from tools.annotation_snapshot import AnnotationSnapshot
+
 
 def get_labels():
     nuscenes_labels_dict = {
@@ -57,6 +59,10 @@ def get_labels():
     return labels_list
 
 
+# default max rotation change of an object between consecutive frames
+MAX_ROTATION_DELTA_DEG = 30.0
+
+
 class LabelChecker:
     """check scene labels
 
@@ -64,22 +70,53 @@ class LabelChecker:
     - object type : not in the predefined list
     - object id : absent
     - object size : too small or too large
-    - object direction : too large rotation delta
+    - object direction : too large rotation delta between consecutive frames
     - object type consistency : different object types in the same object id
     - duplicate : duplicate object id in the same frame
 
+    Labels are held as a columnar box table (one row per box, see
+    AnnotationSnapshot); rows are ordered by obj_id, then frame timestamp, so
+    every per-object check is a vectorized pass over contiguous tracks.
 
     Args:
-        path (str): scene path
+        annotations (List[FrameAnnotation]): scene labels
+        snapshot (AnnotationSnapshot): columnar labels, used instead of annotations
+        max_rotation_delta_deg (float): max rotation angle (degrees) of an object
+            between consecutive frames
     """
 
-    def __init__(self, annotations: List[FrameAnnotation]):
-        self.annotations = annotations
+    # (scope, check method) in the order they run
+    CHECKS = [
+        ("frame", "check_obj_type"),
+        ("frame", "check_obj_id"),
+        ("frame", "check_frame_duplicate_id"),
+        ("object", "check_obj_size"),
+        ("object", "check_obj_direction"),
+        ("object", "check_obj_type_consistency"),
+    ]
+
+    def __init__(
+        self,
+        annotations: Optional[List[FrameAnnotation]] = None,
+        snapshot: Optional[AnnotationSnapshot] = None,
+        max_rotation_delta_deg: float = MAX_ROTATION_DELTA_DEG,
+    ):
+        self.annotations = annotations or []
+        self.max_rotation_delta_deg = max_rotation_delta_deg
+        if snapshot is None:
+            snapshot = AnnotationSnapshot.from_annotations(
+                a for a in self.annotations if a.frame
+            )
+        self.snapshot = snapshot
 
         self.build_labels()
         self.def_labels = get_labels()
         self.messages = []
 
+    @classmethod
+    def from_snapshot(cls, snapshot: AnnotationSnapshot, **kwargs) -> "LabelChecker":
+        return cls(snapshot=snapshot, **kwargs)
+
     def clear_messages(self):
         self.messages = []
 
@@ -91,152 +128,190 @@ class LabelChecker:
         self.messages.append({"frame_id": frame, "obj_id": obj_id, "desc": desc})
 
     def build_labels(self):
-        self.frame_ids = []
-        self.labels = {}
-        self.obj_ids = {}
-
-        for annotation in self.annotations:
-            frame_id = annotation.frame
-            if not frame_id:
-                continue
-            if frame_id not in self.frame_ids:
-                self.frame_ids.append(frame_id)
-            if not self.labels.get(frame_id):
-                self.labels[frame_id] = []
-
-            for item in annotation.annotation:
-                obj_id = item.obj_id
-                if not self.obj_ids.get(obj_id):
-                    self.obj_ids[obj_id] = []
-                self.obj_ids[obj_id].append([frame_id, item.model_dump()])
-
-                self.labels[frame_id].append(item.model_dump())
-
-    # templates
-    def check_one_label(self, func):
-        for f in self.labels:
-            for o in self.labels[f]:
-                func(f, o)
-
-    def check_one_frame(self, func):
-        for f in self.labels:
-            func(f, self.labels[f])
-
-    def check_one_obj(self, func):
-        for id in self.obj_ids:
-            func(id, self.obj_ids[id])
-
-    def check_obj_type(self, frame_id, o):
-        if not o["obj_type"] in self.def_labels:
-            self.push_message(
-                frame_id,
-                o["obj_id"],
-                "object type {} not recognizable".format(o["obj_type"]),
+        """build the box table sorted by (obj_id, frame order)"""
+        columns = self.snapshot.columns
+
+        # frame order = position in snapshot.frames, which is sorted by timestamp
+        self.frame_ids = self.snapshot.frames
+        rank = {frame: i for i, frame in enumerate(self.frame_ids.tolist())}
+        unique_frames, frame_inv = np.unique(columns["frame"], return_inverse=True)
+        frame_order = np.array(
+            [rank[frame] for frame in unique_frames.tolist()], dtype=np.int64
+        )[frame_inv]
+
+        self.obj_ids, obj_inv = np.unique(columns["obj_id"], return_inverse=True)
+        order = np.lexsort((frame_order, obj_inv))
+
+        self.boxes = {name: column[order] for name, column in columns.items()}
+        self.boxes["frame_order"] = frame_order[order]
+        self.boxes["obj_index"] = obj_inv[order]
+        # True where a row continues the track of the previous row
+        obj_index = self.boxes["obj_index"]
+        self.same_track = np.zeros(len(order), dtype=bool)
+        self.same_track[1:] = obj_index[1:] == obj_index[:-1]
+
+    def _push_rows(self, rows, descs, obj_ids=None):
+        frames = self.boxes["frame"][rows].tolist()
+        if obj_ids is None:
+            obj_ids = self.boxes["obj_id"][rows].tolist()
+        for frame, obj_id, desc in zip(frames, obj_ids, descs):
+            self.push_message(frame, obj_id, desc)
+
+    def frame_mask(self, frames: Iterable[str]) -> np.ndarray:
+        """rows belonging to the given frames"""
+        return np.isin(self.boxes["frame"], list(frames))
+
+    def track_mask(self, obj_ids: Iterable[str]) -> np.ndarray:
+        """rows belonging to the given object tracks"""
+        return np.isin(self.obj_ids, list(obj_ids))[self.boxes["obj_index"]]
+
+    @staticmethod
+    def _flagged(flags, mask=None):
+        if mask is not None:
+            flags = flags & (mask if flags.ndim == 1 else mask[:, None])
+        return np.nonzero(flags)
+
+    def _in_label_order(self, rows):
+        """rows sorted by (frame order, row) as the per-label checks report"""
+        return rows[np.lexsort((rows, self.boxes["frame_order"][rows]))]
+
+    def check_obj_type(self, mask=None):
+        obj_type = self.boxes["obj_type"]
+        rows = self._in_label_order(
+            self._flagged(~np.isin(obj_type, self.def_labels), mask)[0]
+        )
+        self._push_rows(
+            rows,
+            [
+                "object type {} not recognizable".format(t)
+                for t in obj_type[rows].tolist()
+            ],
+        )
+
+    def check_obj_id(self, mask=None):
+        obj_type = self.boxes["obj_type"]
+        rows = self._in_label_order(self._flagged(self.boxes["obj_id"] == "", mask)[0])
+        self._push_rows(
+            rows,
+            ["object {} id absent".format(t) for t in obj_type[rows].tolist()],
+            obj_ids=[""] * len(rows),
+        )
+
+    def check_frame_duplicate_id(self, mask=None):
+        frame_order = self.boxes["frame_order"]
+        duplicate = self.same_track & (frame_order == np.roll(frame_order, 1))
+        # one message per (frame, obj_id)
+        first_dup = duplicate & ~np.roll(duplicate, 1)
+        rows = self._flagged(first_dup, mask)[0]
+        rows = rows[np.lexsort((self.boxes["obj_index"][rows], frame_order[rows]))]
+        self._push_rows(rows, ["duplicate object id"] * len(rows))
+
+    def check_obj_size(self, mask=None):
+        scale = self.boxes["scale"]
+        obj_index = self.boxes["obj_index"]
+        n_obj = len(self.obj_ids)
+        counts = np.bincount(obj_index, minlength=n_obj)
+        mean = (
+            np.stack(
+                [
+                    np.bincount(obj_index, weights=scale[:, a], minlength=n_obj)
+                    for a in range(3)
+                ],
+                axis=1,
             )
-
-    def check_obj_id(self, frame_id, o):
-        if not o["obj_id"]:
-            self.push_message(frame_id, "", "object {} id absent".format(o["obj_type"]))
-
-    def check_frame_duplicate_id(self, frame_id, objs):
-        obj_id_cnt = {}
-        for o in objs:
-            if obj_id_cnt.get(o["obj_id"]):
-                obj_id_cnt[o["obj_id"]] += 1
-            else:
-                obj_id_cnt[o["obj_id"]] = 1
-
-        for id in obj_id_cnt:
-            if obj_id_cnt[id] > 1:
-                self.push_message(frame_id, id, "duplicate object id")
-
-    def check_obj_size(self, obj_id, label_list):
-        if label_list[0][1]["obj_type"] == "Pedestrian":
-            return
-
-        mean = {}
-        for axis in ["x", "y", "z"]:
-            vs = list(map(lambda l: float(l[1]["psr"]["scale"][axis]), label_list))
-            mean[axis] = np.array(vs).mean()
-
-        for l in label_list:
-            frame_id = l[0]
-            label = l[1]
-
-            for axis in ["x", "y", "z"]:
-                ratio = label["psr"]["scale"][axis] / mean[axis]
-                if ratio < 0.95:
-                    self.push_message(
-                        frame_id,
-                        obj_id,
-                        "dimension {} too small: {}, mean {}".format(
-                            axis, label["psr"]["scale"][axis], mean[axis]
-                        ),
-                    )
-                    # return
-                elif ratio > 1.05:
-                    self.push_message(
-                        frame_id,
-                        obj_id,
-                        "dimension {} too large: {}, mean {}".format(
-                            axis, label["psr"]["scale"][axis], mean[axis]
-                        ),
-                    )
-                    # return
-
-    def check_obj_direction(self, obj_id, label_list):
-
-        for i in range(1, len(label_list)):
-            l = label_list[i]
-            pl = label_list[i - 1]
-            frame_id = l[0]
-            label = l[1]
-            plabel = pl[1]
-
-            for axis in ["x", "y", "z"]:
-                rotation_delta = (
-                    label["psr"]["rotation"][axis] - plabel["psr"]["rotation"][axis]
+            / np.maximum(counts, 1)[:, None]
+        )
+
+        # objects whose first label is a pedestrian are skipped
+        first_rows = np.nonzero(~self.same_track)[0]
+        skipped = self.boxes["obj_type"][first_rows] == "Pedestrian"
+        checked = ~skipped[obj_index]
+
+        row_mean = mean[obj_index]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = scale / row_mean
+        too_small = (ratio < 0.95) & checked[:, None]
+        too_large = (ratio > 1.05) & checked[:, None]
+        rows, axes = self._flagged(too_small | too_large, mask)
+        self._push_rows(
+            rows,
+            [
+                "dimension {} {}: {}, mean {}".format(
+                    "xyz"[a], "too small" if small else "too large", value, m
                 )
-                pi = 3.141592543
-                if rotation_delta > pi:
-                    rotation_delta = 2 * pi - rotation_delta
-                elif rotation_delta < -pi:
-                    rotation_delta = 2 * pi + rotation_delta
-
-                if rotation_delta > 30 / 180 * pi or rotation_delta < -30 / 180 * pi:
-                    self.push_message(
-                        frame_id, obj_id, "rotation {} delta too large".format(axis)
-                    )
-                    # return
-
-    def check_obj_type_consistency(self, obj_id, label_list):
-        for i in range(1, len(label_list)):
-
-            l = label_list[i]
-            pl = label_list[i - 1]
-            frame_id = l[0]
-            label = l[1]
-            plabel = pl[1]
-
-            if label["obj_type"] != plabel["obj_type"]:
-                self.push_message(
-                    frame_id,
-                    obj_id,
-                    "different object types: {}, previous {}".format(
-                        label["obj_type"], plabel["obj_type"]
-                    ),
+                for a, small, value, m in zip(
+                    axes.tolist(),
+                    too_small[rows, axes].tolist(),
+                    scale[rows, axes].tolist(),
+                    row_mean[rows, axes].tolist(),
                 )
-                # return
-        pass
+            ],
+        )
+
+    def check_obj_direction(self, mask=None):
+        # rotation is a quaternion (xyzw); angle between q1 and q2 is
+        # 2 * acos(|q1 . q2|), |.| because q and -q are the same rotation
+        quat = self.boxes["rotation"]
+        norm = np.linalg.norm(quat, axis=1, keepdims=True)
+        quat = quat / np.where(norm > 0, norm, 1.0)
+        dot = np.zeros(len(quat))
+        dot[1:] = np.abs(np.einsum("ij,ij->i", quat[1:], quat[:-1]))
+        delta = np.degrees(2 * np.arccos(np.clip(dot, 0.0, 1.0)))
+        too_large = (delta > self.max_rotation_delta_deg) & self.same_track
+        rows = self._flagged(too_large, mask)[0]
+        self._push_rows(
+            rows,
+            [
+                "rotation delta too large: {:.1f} deg".format(d)
+                for d in delta[rows].tolist()
+            ],
+        )
+
+    def check_obj_type_consistency(self, mask=None):
+        obj_type = self.boxes["obj_type"]
+        changed = np.zeros(len(obj_type), dtype=bool)
+        changed[1:] = obj_type[1:] != obj_type[:-1]
+        rows = self._flagged(changed & self.same_track, mask)[0]
+        self._push_rows(
+            rows,
+            [
+                "different object types: {}, previous {}".format(t, p)
+                for t, p in zip(obj_type[rows].tolist(), obj_type[rows - 1].tolist())
+            ],
+        )
+
+    def iter_checks(
+        self,
+        frames: Optional[Iterable[str]] = None,
+        obj_ids: Optional[Iterable[str]] = None,
+    ):
+        """run the checks one at a time, limited to frames / obj_ids if given
+
+        Yields:
+            (scope, check name, messages produced by that check) where scope is
+            "frame" for per-label / per-frame checks and "object" for track checks
+        """
+        masks = {
+            "frame": None if frames is None else self.frame_mask(frames),
+            "object": None if obj_ids is None else self.track_mask(obj_ids),
+        }
+        for scope, name in self.CHECKS:
+            start = len(self.messages)
+            getattr(self, name)(masks[scope])
+            yield scope, name, self.messages[start:]
+
+    def check_frames(self, frames: Optional[Iterable[str]] = None):
+        """per-label and per-frame checks, limited to frames if given"""
+        for _ in self.iter_checks(frames=frames, obj_ids=[]):
+            pass
+
+    def check_objects(self, obj_ids: Optional[Iterable[str]] = None):
+        """per-object (track) checks, limited to obj_ids if given"""
+        for _ in self.iter_checks(frames=[], obj_ids=obj_ids):
+            pass
 
     def check(self):
         self.clear_messages()
 
-        self.check_one_label(lambda f, o: self.check_obj_type(f, o))
-        self.check_one_label(lambda f, o: self.check_obj_id(f, o))
-
-        self.check_one_frame(lambda f, o: self.check_frame_duplicate_id(f, o))
-
-        self.check_one_obj(lambda id, o: self.check_obj_size(id, o))
-        self.check_one_obj(lambda id, o: self.check_obj_direction(id, o))
-        self.check_one_obj(lambda id, o: self.check_obj_type_consistency(id, o))
+        for _ in self.iter_checks():
+            pass
@@ -0,0 +1,118 @@
+# tools/compact_points.py
+"""点云的紧凑二进制格式
+
+浏览器可直接映射为 TypedArray，无需解析 PCD：
+
+    偏移 0   4 字节  魔数 b"NPPC"
+    偏移 4   uint32  格式版本
+    偏移 8   uint32  点数 N
+    偏移 12  uint32  保留（0）
+    偏移 16  float32 x, y, z 交错，共 N*3 个  -> new Float32Array(buf, 16, N*3)
+    随后     uint8   intensity，共 N 个       -> new Uint8Array(buf, 16+N*12, N)
+
+均为小端；xyz 在前、intensity 在后，按 Range 分段下载时可先渲染位置。
+"""
+
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+from wind_pypcd import pypcd
+
+MAGIC = b"NPPC"
+FORMAT_VERSION = 1
+HEADER_DTYPE = np.dtype(
+    [("magic", "S4"), ("version", "<u4"), ("count", "<u4"), ("reserved", "<u4")]
+)
+HEADER_SIZE = HEADER_DTYPE.itemsize
+
+
+def pcd_to_points(pcd_bytes: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    解析 PCD 字节为 (N,3) float32 坐标与 (N,) float32 强度
+
+    没有 intensity 字段时强度为 0，坐标非有限值的点被丢弃
+    """
+    data = pypcd.PointCloud.from_bytes(pcd_bytes).pc_data
+    xyz = np.empty((data.shape[0], 3), dtype=np.float32)
+    for i, field in enumerate("xyz"):
+        xyz[:, i] = data[field].reshape(-1)
+    if "intensity" in data.dtype.names:
+        intensity = data["intensity"].reshape(-1).astype(np.float32)
+    else:
+        intensity = np.zeros(len(xyz), dtype=np.float32)
+    valid = np.isfinite(xyz).all(axis=1)
+    return xyz[valid], intensity[valid]
+
+
+def crop_points(xyz: np.ndarray, bounds: Sequence[Optional[float]]) -> np.ndarray:
+    """
+    轴对齐包围盒裁剪
+
+    Args:
+        bounds: (min_x, min_y, min_z, max_x, max_y, max_z)，None 表示该方向不限
+
+    Returns:
+        (N,) 保留的点的掩码
+    """
+    keep = np.ones(len(xyz), dtype=bool)
+    for axis in range(3):
+        low, high = bounds[axis], bounds[axis + 3]
+        if low is not None:
+            keep &= xyz[:, axis] >= low
+        if high is not None:
+            keep &= xyz[:, axis] <= high
+    return keep
+
+
+def voxel_downsample(xyz: np.ndarray, voxel_size: float) -> np.ndarray:
+    """体素降采样：每个体素保留第一个点，返回保留点的序号（保持原顺序）"""
+    if len(xyz) == 0:
+        return np.arange(0)
+    voxels = np.floor(xyz / voxel_size).astype(np.int64)
+    _, first = np.unique(voxels, axis=0, return_index=True)
+    return np.sort(first)
+
+
+def encode_points(xyz: np.ndarray, intensity: np.ndarray) -> bytes:
+    """编码为紧凑格式；强度按前端约定的 0~255 截断取整为 uint8"""
+    header = np.zeros(1, dtype=HEADER_DTYPE)
+    header["magic"] = MAGIC
+    header["version"] = FORMAT_VERSION
+    header["count"] = len(xyz)
+    return b"".join(
+        [
+            header.tobytes(),
+            np.ascontiguousarray(xyz, dtype="<f4").tobytes(),
+            np.clip(np.rint(intensity), 0, 255).astype(np.uint8).tobytes(),
+        ]
+    )
+
+
+def decode_header(blob: bytes) -> int:
+    """校验头部并返回点数"""
+    header = np.frombuffer(blob[:HEADER_SIZE], dtype=HEADER_DTYPE)[0]
+    if header["magic"] != MAGIC or header["version"] != FORMAT_VERSION:
+        raise ValueError("Not a compact point cloud blob")
+    return int(header["count"])
+
+
+def convert_pcd(
+    pcd_bytes: bytes,
+    bounds: Optional[Sequence[Optional[float]]] = None,
+    voxel_size: Optional[float] = None,
+    max_points: Optional[int] = None,
+) -> bytes:
+    """
+    PCD -> 紧凑格式，可选裁剪、体素降采样与限制点数（等间隔抽取）
+    """
+    xyz, intensity = pcd_to_points(pcd_bytes)
+    if bounds is not None and any(b is not None for b in bounds):
+        keep = crop_points(xyz, bounds)
+        xyz, intensity = xyz[keep], intensity[keep]
+    if voxel_size:
+        keep = voxel_downsample(xyz, voxel_size)
+        xyz, intensity = xyz[keep], intensity[keep]
+    if max_points is not None and len(xyz) > max_points:
+        keep = np.linspace(0, len(xyz) - 1, max_points).astype(np.int64)
+        xyz, intensity = xyz[keep], intensity[keep]
+    return encode_points(xyz, intensity)
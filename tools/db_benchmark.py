@@ -0,0 +1,118 @@
+# tools/db_benchmark.py
+"""按名称查询 Project 在并发写入下的延迟基准
+
+写入进程模拟 Celery 任务不断更新项目状态，主进程按名称查询项目，
+分别在默认 rollback 日志与 WAL 下统计查询延迟：
+
+    python -m tools.db_benchmark --projects 200 --writers 4 --seconds 5
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from sqlmodel import Session, SQLModel, select
+
+from nextpoints_sdk.models.project import Project, ProjectStatusEnum
+
+from app.database import create_db_engine
+
+
+def _writer(url: str, wal: bool, names, stop_at: float, counter):
+    engine = create_db_engine(url, wal=wal)
+    statuses = list(ProjectStatusEnum)
+    writes = 0
+    while time.time() < stop_at:
+        with Session(engine) as session:
+            project = session.exec(
+                select(Project).where(Project.name == random.choice(names))
+            ).first()
+            project.status = random.choice(statuses)
+            session.add(project)
+            session.commit()
+        writes += 1
+    with counter.get_lock():
+        counter.value += writes
+
+
+def run(num_projects: int, num_writers: int, seconds: float, wal: bool):
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        engine = create_db_engine(url, wal=wal)
+        SQLModel.metadata.create_all(engine)
+        names = [f"scene_{i:05d}" for i in range(num_projects)]
+        with Session(engine) as session:
+            for name in names:
+                session.add(
+                    Project(
+                        name=name,
+                        bucket_name="bench",
+                        access_key_id="bench",
+                        secret_access_key="bench",
+                        created_at=datetime.now(timezone.utc),
+                    )
+                )
+            session.commit()
+
+        counter = multiprocessing.Value("i", 0)
+        stop_at = time.time() + seconds
+        writers = [
+            multiprocessing.Process(
+                target=_writer, args=(url, wal, names, stop_at, counter)
+            )
+            for _ in range(num_writers)
+        ]
+        for process in writers:
+            process.start()
+
+        latencies = []
+        while time.time() < stop_at:
+            start = time.perf_counter()
+            with Session(engine) as session:
+                session.exec(
+                    select(Project).where(Project.name == random.choice(names))
+                ).first()
+            latencies.append(time.perf_counter() - start)
+
+        for process in writers:
+            process.join()
+        engine.dispose()
+
+    ms = np.array(latencies) * 1000
+    return {
+        "mode": "wal" if wal else "delete",
+        "lookups": len(ms),
+        "writes": counter.value,
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--projects", type=int, default=200)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(
+        f"{'mode':<8}{'lookups':>9}{'writes':>8}"
+        f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+    )
+    for wal in (False, True):
+        r = run(args.projects, args.writers, args.seconds, wal)
+        print(
+            f"{r['mode']:<8}{r['lookups']:>9}{r['writes']:>8}"
+            f"{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}{r['max_ms']:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,7 @@
-# This file is intentionally left blank.
\ No newline at end of file
+"""
+KITTI format export converter for NextPoints
+"""
+
+from .converter import NextPointsToKittiConverter
+
+__all__ = ['NextPointsToKittiConverter']
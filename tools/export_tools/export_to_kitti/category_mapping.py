@@ -0,0 +1,55 @@
+# NextPoints to KITTI Category Mapping Configuration
+# This file maps NextPoints object types to KITTI object types (label_2)
+
+# KITTI Standard Object Types
+KITTI_TYPES = [
+    "Car",
+    "Van",
+    "Truck",
+    "Pedestrian",
+    "Person_sitting",
+    "Cyclist",
+    "Tram",
+    "Misc",
+    "DontCare",
+]
+
+# Category mapping from NextPoints to KITTI
+CATEGORY_MAPPING = {
+    # Vehicles
+    "car": "Car",
+    "van": "Van",
+    "bus": "Truck",
+    "truck": "Truck",
+    "trailer": "Truck",
+    "tram": "Tram",
+    "motorcycle": "Cyclist",
+    # Pedestrians
+    "pedestrian": "Pedestrian",
+    "person": "Pedestrian",
+    "child": "Pedestrian",
+    "police": "Pedestrian",
+    "worker": "Pedestrian",
+    "person_sitting": "Person_sitting",
+    # Cycles
+    "rider": "Cyclist",
+    "bicycle": "Cyclist",
+    "tricycle": "Cyclist",
+    "bicycle_group": "Cyclist",
+}
+
+# Fallback for types without a KITTI counterpart
+DEFAULT_KITTI_TYPE = "Misc"
+
+
+def get_kitti_type(nextpoints_type: str) -> str:
+    """
+    Get KITTI object type for NextPoints object type
+
+    Args:
+        nextpoints_type: NextPoints object type
+
+    Returns:
+        KITTI object type
+    """
+    return CATEGORY_MAPPING.get(nextpoints_type.lower(), DEFAULT_KITTI_TYPE)
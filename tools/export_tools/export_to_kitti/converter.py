@@ -0,0 +1,237 @@
+"""
+Main converter for NextPoints to KITTI object format
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+from nextpoints_sdk.models.project_metadata import (
+    ProjectMetadataResponse,
+    FrameMetadata,
+)
+from nextpoints_sdk.models.annotation import AnnotationItem
+from nextpoints_sdk.models.calibration import CalibrationMetadata
+
+from app.models.export_model import KittiExportRequest
+
+from ..export_to_nuscenes.utils import copy_sensor_data, sensor_source_key
+from .category_mapping import get_kitti_type
+from .utils import (
+    pose_to_matrix,
+    read_source_bytes,
+    pcd_bytes_to_points,
+    write_velodyne_bin,
+    box_corners_lidar,
+    transform_points,
+    boxes_lidar_to_camera,
+    project_boxes_to_image,
+    format_label_lines,
+    format_calib,
+)
+
+KITTI_SPLIT = "training"
+KITTI_SUBDIRS = ["velodyne", "label_2", "calib", "image_2"]
+
+
+class NextPointsToKittiConverter:
+    """Main converter class for NextPoints to KITTI format"""
+
+    def __init__(
+        self,
+        project_metadata: ProjectMetadataResponse,
+        export_request: KittiExportRequest,
+        max_workers: int = 8,
+    ):
+        self.project_metadata = project_metadata
+        self.export_request = export_request
+        self.scene_name = project_metadata.project.name
+        self.max_workers = max_workers
+
+        self.camera_channel, camera_calib = self._select_camera()
+        # Annotations and point clouds are in the main lidar frame, which the
+        # exporters treat as base_link; camera pose is camera -> base_link
+        self.tr_velo_to_cam = np.linalg.inv(
+            pose_to_matrix(camera_calib.pose if camera_calib else None)
+        )
+        self.intrinsic = np.eye(3)
+        self.image_size: Optional[Tuple[int, int]] = None
+        if camera_calib and camera_calib.camera_config:
+            cfg = camera_calib.camera_config
+            self.intrinsic = np.array(
+                [
+                    [cfg.intrinsic.fx, cfg.intrinsic.skew or 0.0, cfg.intrinsic.cx],
+                    [0.0, cfg.intrinsic.fy, cfg.intrinsic.cy],
+                    [0.0, 0.0, 1.0],
+                ]
+            )
+            self.image_size = (cfg.width, cfg.height)
+        self._calib_content = format_calib(self.intrinsic, self.tr_velo_to_cam)
+
+        # Statistics
+        self.stats = {
+            "frames_processed": 0,
+            "annotations_converted": 0,
+            "files_copied": 0,
+            "errors": [],
+        }
+
+    def _select_camera(self) -> Tuple[Optional[str], Optional[CalibrationMetadata]]:
+        """Camera exported as image_2: requested channel or the first camera"""
+        calibration = self.project_metadata.calibration
+        channel = self.export_request.camera_channel
+        if channel:
+            calib = calibration.get(channel)
+            if not calib or not calib.camera_config:
+                raise ValueError(f"Calibration missing for camera channel {channel}")
+            return channel, calib
+        for channel, calib in calibration.items():
+            if calib.camera_config:
+                return channel, calib
+        return None, None
+
+    def convert(self, output_dir: Path) -> Dict[str, Any]:
+        """Write velodyne / label_2 / calib / image_2 for every frame concurrently"""
+        self.project_metadata.frames.sort(key=lambda f: int(f.timestamp_ns))
+        split_dir = output_dir / KITTI_SPLIT
+        directories = {name: split_dir / name for name in KITTI_SUBDIRS}
+        for directory in directories.values():
+            directory.mkdir(parents=True, exist_ok=True)
+
+        # frame id -> timestamp of frames written successfully
+        exported: Dict[str, str] = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            frames = self.project_metadata.frames
+            futures = {
+                executor.submit(self._export_frame, f"{i:06d}", frame, directories): i
+                for i, frame in enumerate(frames)
+            }
+            for future in as_completed(futures):
+                frame_id, frame = f"{futures[future]:06d}", frames[futures[future]]
+                try:
+                    _, annotations, files = future.result()
+                    exported[frame_id] = frame.timestamp_ns
+                    self.stats["frames_processed"] += 1
+                    self.stats["annotations_converted"] += annotations
+                    self.stats["files_copied"] += files
+                except Exception as e:
+                    self.stats["errors"].append(
+                        f"Error processing frame {frame.timestamp_ns}: {e}"
+                    )
+                    # Drop whatever the failed frame wrote so no orphan files
+                    # are left outside the index lists
+                    for directory in directories.values():
+                        for path in directory.glob(f"{frame_id}.*"):
+                            path.unlink(missing_ok=True)
+
+        # Frame index lists, both built from the exported frames; timestamps
+        # map KITTI ids back to NextPoints frames
+        frame_ids = sorted(exported)
+        image_sets_dir = output_dir / "ImageSets"
+        image_sets_dir.mkdir(parents=True, exist_ok=True)
+        (image_sets_dir / "train.txt").write_text(
+            "".join(f"{frame_id}\n" for frame_id in frame_ids)
+        )
+        (split_dir / "timestamps.txt").write_text(
+            "".join(f"{frame_id} {exported[frame_id]}\n" for frame_id in frame_ids)
+        )
+        return self.stats
+
+    def _export_frame(
+        self, frame_id: str, frame: FrameMetadata, directories: Dict[str, Path]
+    ) -> Tuple[str, int, int]:
+        """Export one frame; returns (frame id, annotations written, files copied)"""
+        main_channel = self.project_metadata.main_channel
+        if main_channel not in frame.lidars:
+            raise ValueError(
+                f"Missing lidar data for main channel {main_channel} at frame {frame.timestamp_ns}"
+            )
+        points = pcd_bytes_to_points(read_source_bytes(frame.lidars[main_channel]))
+        write_velodyne_bin(points, directories["velodyne"] / f"{frame_id}.bin")
+        files = 1
+
+        if self.camera_channel:
+            image_url = (frame.images or {}).get(self.camera_channel)
+            if not image_url:
+                raise ValueError(
+                    f"Missing image URL for channel {self.camera_channel} frame {frame.timestamp_ns}"
+                )
+            # Keep the source encoding (KITTI readers open image_2 files by
+            # extension); only the name is changed
+            suffix = Path(sensor_source_key(image_url)).suffix.lower() or ".jpg"
+            copy_sensor_data(image_url, directories["image_2"], f"{frame_id}{suffix}")
+            files += 1
+
+        (directories["calib"] / f"{frame_id}.txt").write_text(self._calib_content)
+
+        lines = self._frame_labels(frame)
+        (directories["label_2"] / f"{frame_id}.txt").write_text(
+            "".join(f"{line}\n" for line in lines)
+        )
+        return frame_id, len(lines), files
+
+    def _frame_labels(self, frame: FrameMetadata) -> List[str]:
+        """Convert all annotations of a frame to label_2 lines in one batch"""
+        annotations = [a for a in frame.annotation or [] if self._should_include(a)]
+        if not annotations:
+            return []
+
+        centers = np.array(
+            [
+                [a.psr.position.x, a.psr.position.y, a.psr.position.z]
+                for a in annotations
+            ]
+        )
+        sizes_lwh = np.array(
+            [[a.psr.scale.x, a.psr.scale.y, a.psr.scale.z] for a in annotations]
+        )
+        quats = np.array(
+            [
+                [a.psr.rotation.x, a.psr.rotation.y, a.psr.rotation.z, a.psr.rotation.w]
+                for a in annotations
+            ]
+        )
+        yaws = R.from_quat(quats).as_euler("ZYX")[:, 0]
+
+        locations, dimensions, rotation_y, alpha = boxes_lidar_to_camera(
+            centers, sizes_lwh, yaws, self.tr_velo_to_cam
+        )
+        if self.image_size:
+            corners_cam = transform_points(
+                box_corners_lidar(centers, sizes_lwh, yaws), self.tr_velo_to_cam
+            )
+            bboxes, truncated = project_boxes_to_image(
+                corners_cam, self.intrinsic, *self.image_size
+            )
+        else:
+            bboxes = np.zeros((len(annotations), 4))
+            truncated = np.zeros(len(annotations))
+
+        types = [get_kitti_type(a.obj_type) for a in annotations]
+        return format_label_lines(
+            types, truncated, alpha, bboxes, dimensions, locations, rotation_y
+        )
+
+    def _should_include(self, annotation: AnnotationItem) -> bool:
+        """Check if annotation should be included based on filters"""
+        filter_config = self.export_request.annotation_filter
+
+        if not filter_config:
+            return True
+
+        # Object type filter
+        if (
+            filter_config.object_types
+            and annotation.obj_type not in filter_config.object_types
+        ):
+            return False
+
+        # Minimum points filter
+        if filter_config.min_points and (
+            not annotation.num_pts or annotation.num_pts < filter_config.min_points
+        ):
+            return False
+
+        return True
@@ -0,0 +1,207 @@
+"""
+Utilities for KITTI export: point cloud conversion, batched box transforms
+and label / calib file formatting
+"""
+
+import os
+import urllib.request
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+from wind_pypcd import pypcd
+
+from nextpoints_sdk.models.pose import Pose
+
+VELODYNE_FIELDS = ("x", "y", "z", "intensity")
+
+
+def pose_to_matrix(pose: Optional[Pose]) -> np.ndarray:
+    """4x4 homogeneous matrix of a Pose (identity when missing)"""
+    matrix = np.eye(4)
+    if pose is None:
+        return matrix
+    t = pose.transform.translation
+    r = pose.transform.rotation
+    matrix[:3, :3] = R.from_quat([r.x, r.y, r.z, r.w]).as_matrix()
+    matrix[:3, 3] = [t.x, t.y, t.z]
+    return matrix
+
+
+def read_source_bytes(source_url: str) -> bytes:
+    """Read a sensor file from a presigned URL or a local path"""
+    if source_url.startswith("http://") or source_url.startswith("https://"):
+        with urllib.request.urlopen(source_url) as response:
+            return response.read()
+    if os.path.exists(source_url):
+        with open(source_url, "rb") as f:
+            return f.read()
+    raise ValueError(f"Unsupported or missing source path: {source_url}")
+
+
+def pcd_bytes_to_points(pcd_bytes: bytes) -> np.ndarray:
+    """Decode PCD bytes into an (N, 4) float32 array of x, y, z, intensity.
+
+    Missing intensity is written as 0, points with non-finite coordinates
+    are dropped.
+    """
+    pc = pypcd.PointCloud.from_bytes(pcd_bytes)
+    data = pc.pc_data
+    points = np.zeros((data.shape[0], len(VELODYNE_FIELDS)), dtype=np.float32)
+    for i, field in enumerate(VELODYNE_FIELDS):
+        if field in data.dtype.names:
+            points[:, i] = data[field].reshape(-1)
+    return points[np.isfinite(points[:, :3]).all(axis=1)]
+
+
+def write_velodyne_bin(points: np.ndarray, output_path: Path) -> None:
+    """Write points as a KITTI velodyne .bin in a single buffer write"""
+    np.ascontiguousarray(points, dtype=np.float32).tofile(output_path)
+
+
+def box_corners_lidar(
+    centers: np.ndarray, sizes_lwh: np.ndarray, yaws: np.ndarray
+) -> np.ndarray:
+    """Corners of N yaw-only boxes in lidar frame, shape (N, 8, 3)"""
+    signs = np.array(
+        [
+            [1, 1, 1],
+            [1, -1, 1],
+            [-1, -1, 1],
+            [-1, 1, 1],
+            [1, 1, -1],
+            [1, -1, -1],
+            [-1, -1, -1],
+            [-1, 1, -1],
+        ],
+        dtype=float,
+    )
+    local = signs[None, :, :] * (sizes_lwh[:, None, :] / 2.0)
+    cos, sin = np.cos(yaws)[:, None], np.sin(yaws)[:, None]
+    x = local[..., 0] * cos - local[..., 1] * sin
+    y = local[..., 0] * sin + local[..., 1] * cos
+    return np.stack([x, y, local[..., 2]], axis=-1) + centers[:, None, :]
+
+
+def transform_points(points: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    """Apply a 4x4 transform to points of shape (..., 3)"""
+    return points @ matrix[:3, :3].T + matrix[:3, 3]
+
+
+def boxes_lidar_to_camera(
+    centers: np.ndarray,
+    sizes_lwh: np.ndarray,
+    yaws: np.ndarray,
+    tr_velo_to_cam: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Convert N lidar boxes to KITTI camera-frame parameters in one pass.
+
+    Args:
+        centers: (N, 3) box centers in lidar frame
+        sizes_lwh: (N, 3) length, width, height
+        yaws: (N,) heading around lidar z
+        tr_velo_to_cam: 4x4 lidar -> camera transform
+
+    Returns:
+        (locations (N, 3) bottom centers in camera frame,
+         dimensions (N, 3) as h, w, l,
+         rotation_y (N,),
+         alpha (N,))
+    """
+    bottoms = centers.copy()
+    bottoms[:, 2] -= sizes_lwh[:, 2] / 2.0
+    locations = transform_points(bottoms, tr_velo_to_cam)
+
+    headings = np.stack([np.cos(yaws), np.sin(yaws), np.zeros_like(yaws)], axis=1)
+    headings_cam = headings @ tr_velo_to_cam[:3, :3].T
+    rotation_y = np.arctan2(-headings_cam[:, 2], headings_cam[:, 0])
+
+    alpha = rotation_y - np.arctan2(locations[:, 0], locations[:, 2])
+    alpha = (alpha + np.pi) % (2 * np.pi) - np.pi
+
+    dimensions = sizes_lwh[:, [2, 1, 0]]
+    return locations, dimensions, rotation_y, alpha
+
+
+def project_boxes_to_image(
+    corners_cam: np.ndarray, intrinsic: np.ndarray, width: int, height: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Project (N, 8, 3) camera-frame corners to clipped 2D boxes.
+
+    Returns:
+        (bboxes (N, 4) left, top, right, bottom;
+         truncated (N,) fraction of the projected box outside the image,
+         1.0 for boxes behind the camera)
+    """
+    n = corners_cam.shape[0]
+    bboxes = np.zeros((n, 4))
+    truncated = np.ones(n)
+    if n == 0:
+        return bboxes, truncated
+
+    depth = corners_cam[..., 2]
+    in_front = depth > 1e-3
+    uv = corners_cam @ intrinsic.T
+    u = uv[..., 0] / np.where(in_front, depth, 1.0)
+    v = uv[..., 1] / np.where(in_front, depth, 1.0)
+    raw = np.stack(
+        [
+            np.where(in_front, u, np.inf).min(axis=1),
+            np.where(in_front, v, np.inf).min(axis=1),
+            np.where(in_front, u, -np.inf).max(axis=1),
+            np.where(in_front, v, -np.inf).max(axis=1),
+        ],
+        axis=1,
+    )
+    visible = in_front.any(axis=1)
+    raw = np.where(visible[:, None], raw, 0.0)
+    clipped = np.stack(
+        [
+            np.clip(raw[:, 0], 0, width - 1),
+            np.clip(raw[:, 1], 0, height - 1),
+            np.clip(raw[:, 2], 0, width - 1),
+            np.clip(raw[:, 3], 0, height - 1),
+        ],
+        axis=1,
+    )
+    raw_area = (raw[:, 2] - raw[:, 0]) * (raw[:, 3] - raw[:, 1])
+    clipped_area = (clipped[:, 2] - clipped[:, 0]) * (clipped[:, 3] - clipped[:, 1])
+    valid = visible & (raw_area > 0)
+    bboxes[valid] = clipped[valid]
+    truncated[valid] = 1.0 - clipped_area[valid] / raw_area[valid]
+    return bboxes, np.clip(truncated, 0.0, 1.0)
+
+
+def format_label_lines(
+    types: List[str],
+    truncated: np.ndarray,
+    alpha: np.ndarray,
+    bboxes: np.ndarray,
+    dimensions: np.ndarray,
+    locations: np.ndarray,
+    rotation_y: np.ndarray,
+) -> List[str]:
+    """KITTI label_2 lines (occlusion is unknown, written as 0)"""
+    lines = []
+    for i, obj_type in enumerate(types):
+        values = [alpha[i], *bboxes[i], *dimensions[i], *locations[i], rotation_y[i]]
+        lines.append(
+            f"{obj_type} {truncated[i]:.2f} 0 " + " ".join(f"{v:.2f}" for v in values)
+        )
+    return lines
+
+
+def format_calib(intrinsic: np.ndarray, tr_velo_to_cam: np.ndarray) -> str:
+    """KITTI calib file content; all P matrices use the exported camera"""
+
+    def _row(matrix: np.ndarray) -> str:
+        return " ".join(f"{v:.12e}" for v in matrix.reshape(-1))
+
+    p = np.zeros((3, 4))
+    p[:3, :3] = intrinsic
+    lines = [f"P{i}: {_row(p)}" for i in range(4)]
+    lines.append(f"R0_rect: {_row(np.eye(3))}")
+    lines.append(f"Tr_velo_to_cam: {_row(tr_velo_to_cam[:3, :4])}")
+    lines.append(f"Tr_imu_to_velo: {_row(np.eye(4)[:3, :4])}")
+    return "\n".join(lines) + "\n"
@@ -6,7 +6,7 @@ import os
 import json
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, List, Optional, Set, Tuple
 import binascii
 from nextpoints_sdk.models.project_metadata import (
     ProjectMetadataResponse,
@@ -36,14 +36,9 @@ from .schema.pydantic_models import (
 )
 
 from .utils import (
-    generate_scene_token,
-    generate_log_token,
-    generate_sample_token,
-    generate_sample_data_token,
-    generate_annotation_token,
-    generate_ego_pose_token,
-    generate_calibrated_sensor_token,
-    generate_sensor_token,
+    TokenFactory,
+    ExportManifest,
+    sensor_source_key,
     transform_psr_to_global,
     nuscenes_to_ego_pose_format,
     create_nuscenes_directory_structure,
@@ -71,11 +66,33 @@ class NextPointsToNuScenesConverter:
         self,
         project_metadata: ProjectMetadataResponse,
         export_request: NuScenesExportRequest,
+        previous_manifest: Optional[ExportManifest] = None,
+        label_etags: Optional[Dict[str, str]] = None,
+        sensor_etags: Optional[Dict[Tuple[str, str], str]] = None,
+        partial: bool = False,
     ):
         self.project_metadata = project_metadata
         self.export_request = export_request
         self.scene_name = project_metadata.project.name
 
+        # Sharded export: metadata holds only a frame range of the scene, the
+        # tables written are partial and validated after merging (see merge.py)
+        self.partial = partial
+
+        # Incremental export: sensor files recorded in previous_manifest with
+        # the same source key and S3 ETag are assumed present at the
+        # destination already. sensor_etags maps (timestamp_ns, channel) to the
+        # current ETag of the source object; files without one are re-copied.
+        self.previous_manifest = previous_manifest
+        self.label_etags: Dict[str, str] = label_etags or {}
+        self.sensor_etags: Dict[Tuple[str, str], str] = sensor_etags or {}
+        self.manifest = ExportManifest(self.scene_name)
+        self.reused_files: Set[str] = set()
+        # Files written by this run; validation checks against these instead
+        # of stat-ing every referenced path
+        self.written_files: Set[str] = set()
+        self._sample_data_records: List[Dict[str, Any]] = []
+
         # Data containers
         self.scenes: List[SceneModel] = []
         self.samples: List[SampleModel] = []
@@ -91,8 +108,11 @@ class NextPointsToNuScenesConverter:
         self.instances: List[InstanceModel] = []
         self.sample_annotations: List[SampleAnnotationModel] = []
 
+        # Memoized token generation shared with the instance tracker
+        self.tokens = TokenFactory()
+
         # Annotation tracking
-        self.instance_tracker = InstanceTracker()
+        self.instance_tracker = InstanceTracker(token_factory=self.tokens)
 
         # Tokens cache
         self.category_tokens: Dict[str, str] = {}
@@ -105,6 +125,11 @@ class NextPointsToNuScenesConverter:
             "frames_processed": 0,
             "annotations_converted": 0,
             "instances_created": 0,
+            "files_copied": 0,
+            "files_reused": 0,
+            "reused_files": [],
+            "frames_changed": [],
+            "stale_files": [],
             "errors": [],
         }
 
@@ -141,11 +166,22 @@ class NextPointsToNuScenesConverter:
             print("Saving JSON tables completed.")
 
             # Validate structure & files
-            validation_errors = validate_nuscenes_structure(
-                output_dir, main_channel=self.project_metadata.main_channel
-            )
-            if validation_errors:
-                self.stats["errors"].extend(validation_errors)
+            if not self.partial:
+                validation_errors = validate_nuscenes_structure(
+                    output_dir,
+                    main_channel=self.project_metadata.main_channel,
+                    sample_data=self._sample_data_records,
+                    known_files=self.written_files | self.reused_files,
+                )
+                if validation_errors:
+                    self.stats["errors"].extend(validation_errors)
+
+            # Record what this export contains for the next incremental run
+            changed, stale = self.manifest.diff(self.previous_manifest)
+            self.stats["frames_changed"] = changed
+            self.stats["stale_files"] = stale
+            self.stats["reused_files"] = sorted(self.reused_files)
+            self.manifest.save(output_dir)
             return self.stats
         except Exception as e:
             self.stats["errors"].append(f"Conversion failed: {str(e)}")
@@ -160,7 +196,7 @@ class NextPointsToNuScenesConverter:
         self.project_metadata.frames.sort(key=lambda f: int(f.timestamp_ns))
         # Categories
         for category_name in get_all_nuscenes_categories():
-            token = generate_sensor_token(f"category_{category_name}")
+            token = self.tokens.sensor(f"category_{category_name}")
             self.category_tokens[category_name] = token
 
             category = CategoryModel(
@@ -172,7 +208,7 @@ class NextPointsToNuScenesConverter:
 
         # Attributes
         for attr_name in get_all_nuscenes_attributes():
-            token = generate_sensor_token(f"attribute_{attr_name}")
+            token = self.tokens.sensor(f"attribute_{attr_name}")
             self.attribute_tokens[attr_name] = token
 
             attribute = AttributeModel(
@@ -192,8 +228,15 @@ class NextPointsToNuScenesConverter:
         # Sensors and calibrated sensors from project metadata
         self._initialize_sensors()
 
+        # Pre-generate per-frame tokens once for all timestamps
+        self.tokens.precompute_frames(
+            self.scene_name,
+            [f.timestamp_ns for f in self.project_metadata.frames],
+            channels=[s.channel for s in self.sensors],
+        )
+
         # Log
-        log_token = generate_log_token(self.scene_name)
+        log_token = self.tokens.log(self.scene_name)
         log = LogModel(
             token=log_token,
             logfile=f"{self.scene_name}.log",
@@ -203,27 +246,27 @@ class NextPointsToNuScenesConverter:
         )
         self.logs.append(log)
 
-        # Scene
-        scene_token = generate_scene_token(self.scene_name)
-        first_sample_token = generate_sample_token(
-            self.scene_name, self.project_metadata.frames[0].timestamp_ns
+        # Scene (summary fields describe the whole scene, also for shards)
+        scene_token = self.tokens.scene(self.scene_name)
+        first_sample_token = self.tokens.sample(
+            self.scene_name, self.project_metadata.start_timestamp_ns
         )
-        last_sample_token = generate_sample_token(
-            self.scene_name, self.project_metadata.frames[-1].timestamp_ns
+        last_sample_token = self.tokens.sample(
+            self.scene_name, self.project_metadata.end_timestamp_ns
         )
         scene = SceneModel(
             token=scene_token,
             name=self.scene_name,
             description=f"Exported from NextPoints project: {self.scene_name}",
             log_token=log_token,
-            nbr_samples=len(self.project_metadata.frames),
+            nbr_samples=self.project_metadata.frame_count,
             first_sample_token=first_sample_token,
             last_sample_token=last_sample_token,
         )
         self.scenes.append(scene)
 
         # Default map (required by NuScenes SDK) create 1x1 black png
-        map_token = generate_sensor_token(f"map_{self.scene_name}")
+        map_token = self.tokens.sensor(f"map_{self.scene_name}")
         black_png_bytes = binascii.unhexlify(
             b"89504E470D0A1A0A0000000D49484452000000010000000108020000009077053D0000000A49444154789C636000000200018D0D0A2DB40000000049454E44AE426082"
         )
@@ -243,7 +286,7 @@ class NextPointsToNuScenesConverter:
         main_channel = self.project_metadata.main_channel
 
         # LIDAR sensor uses its original channel name
-        lidar_sensor_token = generate_sensor_token(main_channel)
+        lidar_sensor_token = self.tokens.sensor(main_channel)
         self.sensor_tokens[main_channel] = lidar_sensor_token
 
         lidar_sensor = SensorModel(
@@ -252,9 +295,7 @@ class NextPointsToNuScenesConverter:
         self.sensors.append(lidar_sensor)
 
         # LIDAR calibrated sensor (identity assuming overlap with base_link)
-        lidar_calib_token = generate_calibrated_sensor_token(
-            self.scene_name, main_channel
-        )
+        lidar_calib_token = self.tokens.calibrated_sensor(self.scene_name, main_channel)
         self.calibrated_sensor_tokens[main_channel] = lidar_calib_token
 
         lidar_calib = CalibratedSensorModel(
@@ -273,7 +314,7 @@ class NextPointsToNuScenesConverter:
     def _add_camera_sensor(self, camera_name: str, calib_data: Any):
         """Add camera sensor and calibrated sensor using raw channel name"""
         camera_channel = camera_name  # keep original
-        sensor_token = generate_sensor_token(camera_channel)
+        sensor_token = self.tokens.sensor(camera_channel)
         self.sensor_tokens[camera_channel] = sensor_token
 
         sensor = SensorModel(
@@ -281,7 +322,7 @@ class NextPointsToNuScenesConverter:
         )
         self.sensors.append(sensor)
 
-        calib_token = generate_calibrated_sensor_token(self.scene_name, camera_channel)
+        calib_token = self.tokens.calibrated_sensor(self.scene_name, camera_channel)
         self.calibrated_sensor_tokens[camera_channel] = calib_token
 
         try:
@@ -359,23 +400,25 @@ class NextPointsToNuScenesConverter:
         timestamp_us = int(frame.timestamp_ns) // 1000
 
         # Generate sample token
-        sample_token = generate_sample_token(self.scene_name, frame.timestamp_ns)
+        sample_token = self.tokens.sample(self.scene_name, frame.timestamp_ns)
+        self.manifest.record_label(
+            frame.timestamp_ns, self.label_etags.get(frame.timestamp_ns)
+        )
 
-        # Determine prev/next tokens
+        # Determine prev/next tokens from the frame links, which stay valid
+        # across shard boundaries
         prev_token = ""
         next_token = ""
-        if frame_index > 0:
-            prev_frame = self.project_metadata.frames[frame_index - 1]
-            prev_token = generate_sample_token(self.scene_name, prev_frame.timestamp_ns)
-        if frame_index < len(self.project_metadata.frames) - 1:
-            next_frame = self.project_metadata.frames[frame_index + 1]
-            next_token = generate_sample_token(self.scene_name, next_frame.timestamp_ns)
+        if frame.prev_timestamp_ns:
+            prev_token = self.tokens.sample(self.scene_name, frame.prev_timestamp_ns)
+        if frame.next_timestamp_ns:
+            next_token = self.tokens.sample(self.scene_name, frame.next_timestamp_ns)
 
         # Create sample data dictionary to collect sensor data tokens
         sample_data_dict = {}
 
         # Create ego pose
-        ego_pose_token = generate_ego_pose_token(self.scene_name, frame.timestamp_ns)
+        ego_pose_token = self.tokens.ego_pose(self.scene_name, frame.timestamp_ns)
         # Convert Pose model to ego pose dict
         pose = frame.pose
         if pose:
@@ -440,7 +483,7 @@ class NextPointsToNuScenesConverter:
             raise ValueError(
                 f"Missing lidar data for main channel {main_channel} at frame {frame.timestamp_ns}"
             )
-        sample_data_token = generate_sample_data_token(
+        sample_data_token = self.tokens.sample_data(
             self.scene_name, frame.timestamp_ns, main_channel
         )
         lidar_filename = generate_nuscenes_filename(
@@ -451,9 +494,13 @@ class NextPointsToNuScenesConverter:
         )
         lidar_target_path.mkdir(parents=True, exist_ok=True)
         lidar_source = frame.lidars[main_channel]
-        success = copy_sensor_data(lidar_source, lidar_target_path, lidar_filename)
-        if not success:
-            raise ValueError(f"Failed to copy lidar file {lidar_source}")
+        self._export_sensor_file(
+            frame.timestamp_ns,
+            main_channel,
+            lidar_source,
+            lidar_target_path,
+            lidar_filename,
+        )
         sample_data = SampleDataModel(
             token=sample_data_token,
             sample_token=sample_token,
@@ -483,7 +530,7 @@ class NextPointsToNuScenesConverter:
         for channel, image_url in frame.images.items():
             if channel not in self.calibrated_sensor_tokens:
                 raise ValueError(f"Calibration missing for camera channel {channel}")
-            sample_data_token = generate_sample_data_token(
+            sample_data_token = self.tokens.sample_data(
                 self.scene_name, frame.timestamp_ns, channel
             )
             image_filename = generate_nuscenes_filename(
@@ -497,9 +544,9 @@ class NextPointsToNuScenesConverter:
                 raise ValueError(
                     f"Missing image URL for channel {channel} frame {frame.timestamp_ns}"
                 )
-            success = copy_sensor_data(image_url, cam_dir, image_filename)
-            if not success:
-                raise ValueError(f"Failed to copy image file {image_url}")
+            self._export_sensor_file(
+                frame.timestamp_ns, channel, image_url, cam_dir, image_filename
+            )
             calib = self.project_metadata.calibration.get(channel)
             height = width = None
             if calib and calib.camera_config:
@@ -523,6 +570,33 @@ class NextPointsToNuScenesConverter:
             camera_tokens[channel] = sample_data_token
         return camera_tokens
 
+    def _export_sensor_file(
+        self,
+        timestamp_ns: str,
+        channel: str,
+        source_url: str,
+        target_dir: Path,
+        filename: str,
+    ):
+        """Copy a sensor file unless the previous export already holds it"""
+        source_key = sensor_source_key(source_url)
+        source_etag = self.sensor_etags.get((str(timestamp_ns), channel))
+        relative_path = f"samples/{channel}/{filename}"
+        if self.previous_manifest and self.previous_manifest.sensor_unchanged(
+            timestamp_ns, channel, source_key, relative_path, source_etag
+        ):
+            self.reused_files.add(relative_path)
+            self.stats["files_reused"] += 1
+        else:
+            success = copy_sensor_data(source_url, target_dir, filename)
+            if not success:
+                raise ValueError(f"Failed to copy sensor file {source_url}")
+            self.written_files.add(relative_path)
+            self.stats["files_copied"] += 1
+        self.manifest.record_sensor(
+            timestamp_ns, channel, source_key, relative_path, source_etag
+        )
+
     def _process_annotations(
         self, frame: FrameMetadata, sample_token: str, timestamp_us: int
     ):
@@ -612,7 +686,7 @@ class NextPointsToNuScenesConverter:
         ]
 
         # Generate annotation token
-        annotation_token = generate_annotation_token(
+        annotation_token = self.tokens.annotation(
             self.scene_name, frame.timestamp_ns, annotation.obj_id
         )
 
@@ -690,7 +764,7 @@ class NextPointsToNuScenesConverter:
             )
         except Exception as e:
             raise ValueError(f"Schema validation error: {e}")
-        cross_errors = cross_validate(tables_model)
+        cross_errors = [] if self.partial else cross_validate(tables_model)
         if cross_errors:
             raise ValueError(
                 "Cross-table validation errors: \n" + "\n".join(cross_errors)
@@ -719,3 +793,5 @@ class NextPointsToNuScenesConverter:
             print(f"Saving {filename} with {len(data)} records")
 
             save_json_table(data, output_dir, filename)
+            self.written_files.add(f"v1.0-all/{filename}")
+        self._sample_data_records = tables["sample_data.json"]
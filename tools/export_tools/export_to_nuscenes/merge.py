@@ -0,0 +1,103 @@
+"""
+Reduce step for sharded NuScenes export
+
+Each shard converts a contiguous frame range of one scene and writes partial
+tables. Tokens are deterministic, so shards agree on every shared record
+(scene, log, sensors, categories, ...). Merging is therefore a token-level
+union followed by re-linking the chains that may cross shard boundaries:
+sample_data per (scene, channel) and sample_annotation per instance.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from .schema.pydantic_models import NuScenesTables, cross_validate
+from .utils import save_json_table
+
+NUSCENES_TABLES = [
+    "scene",
+    "sample",
+    "sample_data",
+    "ego_pose",
+    "sensor",
+    "calibrated_sensor",
+    "log",
+    "category",
+    "attribute",
+    "visibility",
+    "map",
+    "instance",
+    "sample_annotation",
+]
+
+Tables = Dict[str, List[Dict[str, Any]]]
+
+
+def merge_partial_tables(partials: List[Tables]) -> Tables:
+    """Merge partial tables produced by shards into one consistent set"""
+    merged: Tables = {}
+    for name in NUSCENES_TABLES:
+        by_token: Dict[str, Dict[str, Any]] = {}
+        for partial in partials:
+            for record in partial.get(name, []):
+                by_token.setdefault(record["token"], record)
+        merged[name] = list(by_token.values())
+
+    _link_sample_data(merged)
+    _link_annotations(merged)
+    return merged
+
+
+def _link_chain(records: List[Dict[str, Any]]) -> None:
+    for i, record in enumerate(records):
+        record["prev"] = records[i - 1]["token"] if i > 0 else ""
+        record["next"] = records[i + 1]["token"] if i < len(records) - 1 else ""
+
+
+def _link_sample_data(tables: Tables) -> None:
+    sample_to_scene = {s["token"]: s["scene_token"] for s in tables["sample"]}
+    sensor_to_channel = {s["token"]: s["channel"] for s in tables["sensor"]}
+    calib_to_channel = {
+        cs["token"]: sensor_to_channel.get(cs["sensor_token"], "")
+        for cs in tables["calibrated_sensor"]
+    }
+    groups: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+    for sd in tables["sample_data"]:
+        key = (
+            sample_to_scene.get(sd["sample_token"], ""),
+            calib_to_channel.get(sd["calibrated_sensor_token"], ""),
+        )
+        groups.setdefault(key, []).append(sd)
+    for records in groups.values():
+        records.sort(key=lambda x: x["timestamp"])
+        _link_chain(records)
+
+
+def _link_annotations(tables: Tables) -> None:
+    sample_ts = {s["token"]: s["timestamp"] for s in tables["sample"]}
+    by_instance: Dict[str, List[Dict[str, Any]]] = {}
+    for ann in tables["sample_annotation"]:
+        by_instance.setdefault(ann["instance_token"], []).append(ann)
+    for records in by_instance.values():
+        records.sort(key=lambda a: sample_ts.get(a["sample_token"], 0))
+        _link_chain(records)
+    for inst in tables["instance"]:
+        records = by_instance.get(inst["token"], [])
+        inst["nbr_annotations"] = len(records)
+        if records:
+            inst["first_annotation_token"] = records[0]["token"]
+            inst["last_annotation_token"] = records[-1]["token"]
+
+
+def save_merged_tables(tables: Tables, output_dir: Path) -> None:
+    """Validate merged tables (schema + cross-table) and write them as JSON"""
+    try:
+        tables_model = NuScenesTables(**tables)
+    except Exception as e:
+        raise ValueError(f"Schema validation error: {e}")
+    cross_errors = cross_validate(tables_model)
+    if cross_errors:
+        raise ValueError("Cross-table validation errors: \n" + "\n".join(cross_errors))
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for name in NUSCENES_TABLES:
+        save_json_table(tables[name], output_dir, f"{name}.json")
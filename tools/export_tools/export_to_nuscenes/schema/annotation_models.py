@@ -1,14 +1,16 @@
 """
 NuScenes annotation and instance schema models (migrated to direct Pydantic models)
 """
-from typing import List, Dict
+from typing import List, Dict, Optional
 from .pydantic_models import InstanceModel, SampleAnnotationModel
+from ..utils.token_generator import TokenFactory
 
 
 class InstanceTracker:
     """Track instances across frames for trajectory building using Pydantic models"""
     
-    def __init__(self):
+    def __init__(self, token_factory: Optional[TokenFactory] = None):
+        self.token_factory = token_factory or TokenFactory()
         self.instances: Dict[str, Dict] = {}  # instance_token -> info dict
         self.annotations_by_instance: Dict[str, List[SampleAnnotationModel]] = {}
         self.annotation_timestamps: Dict[str, int] = {}
@@ -21,8 +23,7 @@ class InstanceTracker:
         annotation: SampleAnnotationModel,
         timestamp_us: int
     ) -> str:
-        from ..utils import generate_instance_token
-        instance_token = generate_instance_token(scene_name, track_id)
+        instance_token = self.token_factory.instance(scene_name, track_id)
         if instance_token not in self.instances:
             self.instances[instance_token] = {
                 "token": instance_token,
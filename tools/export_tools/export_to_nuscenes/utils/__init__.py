@@ -11,7 +11,8 @@ from .token_generator import (
     generate_instance_token,
     generate_ego_pose_token,
     generate_calibrated_sensor_token,
-    generate_sensor_token
+    generate_sensor_token,
+    TokenFactory,
 )
 
 from .coordinate_transform import (
@@ -32,6 +33,12 @@ from .file_utils import (
     cleanup_temp_files
 )
 
+from .export_manifest import (
+    ExportManifest,
+    sensor_source_key,
+    MANIFEST_FILENAME
+)
+
 __all__ = [
     # Token generation
     'generate_scene_token',
@@ -43,6 +50,7 @@ __all__ = [
     'generate_ego_pose_token',
     'generate_calibrated_sensor_token',
     'generate_sensor_token',
+    'TokenFactory',
     
     # Coordinate transformation
     'transform_position_to_global',
@@ -58,5 +66,10 @@ __all__ = [
     'generate_nuscenes_filename',
     'validate_nuscenes_structure',
     'get_file_size_mb',
-    'cleanup_temp_files'
+    'cleanup_temp_files',
+
+    # Incremental export
+    'ExportManifest',
+    'sensor_source_key',
+    'MANIFEST_FILENAME'
 ]
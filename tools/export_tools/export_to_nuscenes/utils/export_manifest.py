@@ -0,0 +1,125 @@
+"""
+Export manifest for incremental NuScenes export
+
+The manifest records, per frame, the label ETag and the source key and S3
+ETag of every sensor file written by the previous export. A subsequent export
+compares against it to skip sensor files that are already present at the
+destination and whose source object has not been overwritten since.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+MANIFEST_FILENAME = "export_manifest.json"
+MANIFEST_VERSION = 1
+
+
+def sensor_source_key(source_url: str) -> str:
+    """Stable identity of a sensor source (presigned query string stripped)"""
+    if source_url.startswith("http://") or source_url.startswith("https://"):
+        return urlsplit(source_url).path.lstrip("/")
+    return source_url
+
+
+class ExportManifest:
+    """Per-frame label ETag and sensor source keys of one export"""
+
+    def __init__(
+        self, scene_name: str, frames: Optional[Dict[str, Dict[str, Any]]] = None
+    ):
+        self.scene_name = scene_name
+        # timestamp_ns -> {"label_etag": str,
+        #                  "sensors": {channel: {"key", "etag", "filename"}}}
+        self.frames: Dict[str, Dict[str, Any]] = frames or {}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> Optional["ExportManifest"]:
+        """Build manifest from its JSON form; unknown versions are ignored"""
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+            return None
+        return cls(scene_name=data.get("scene_name", ""), frames=data.get("frames"))
+
+    @classmethod
+    def load(cls, output_dir: Path) -> Optional["ExportManifest"]:
+        manifest_path = output_dir / MANIFEST_FILENAME
+        if not manifest_path.exists():
+            return None
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": MANIFEST_VERSION,
+            "scene_name": self.scene_name,
+            "frames": self.frames,
+        }
+
+    def save(self, output_dir: Path) -> Path:
+        manifest_path = output_dir / MANIFEST_FILENAME
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+        return manifest_path
+
+    def _frame(self, timestamp_ns: str) -> Dict[str, Any]:
+        return self.frames.setdefault(
+            str(timestamp_ns), {"label_etag": "", "sensors": {}}
+        )
+
+    def record_label(self, timestamp_ns: str, label_etag: Optional[str]) -> None:
+        self._frame(timestamp_ns)["label_etag"] = label_etag or ""
+
+    def record_sensor(
+        self,
+        timestamp_ns: str,
+        channel: str,
+        source_key: str,
+        filename: str,
+        source_etag: Optional[str] = None,
+    ) -> None:
+        self._frame(timestamp_ns)["sensors"][channel] = {
+            "key": source_key,
+            "etag": source_etag or "",
+            "filename": filename,
+        }
+
+    def sensor_unchanged(
+        self,
+        timestamp_ns: str,
+        channel: str,
+        source_key: str,
+        filename: str,
+        source_etag: Optional[str],
+    ) -> bool:
+        """True if the same source object (key and ETag) was exported to the
+        same filename before; an unknown ETag on either side never matches"""
+        entry = self.frames.get(str(timestamp_ns), {}).get("sensors", {}).get(channel)
+        return bool(
+            entry
+            and source_etag
+            and entry["key"] == source_key
+            and entry.get("etag") == source_etag
+            and entry["filename"] == filename
+        )
+
+    def files(self) -> Set[str]:
+        return {
+            sensor["filename"]
+            for frame in self.frames.values()
+            for sensor in frame.get("sensors", {}).values()
+        }
+
+    def diff(self, previous: Optional["ExportManifest"]) -> Tuple[List[str], List[str]]:
+        """Compare against a previous manifest.
+
+        Returns:
+            (changed frame timestamps, files only present in previous export)
+        """
+        if previous is None:
+            return sorted(self.frames.keys(), key=int), []
+        changed = [
+            ts for ts, entry in self.frames.items() if previous.frames.get(ts) != entry
+        ]
+        stale = sorted(previous.files() - self.files())
+        return sorted(changed, key=int), stale
@@ -6,7 +6,7 @@ import json
 import shutil
 import urllib.request
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Set
 
 
 def create_nuscenes_directory_structure(output_dir: Path, sensor_channels: Optional[List[str]] = None) -> Dict[str, Path]:
@@ -100,47 +100,90 @@ def generate_nuscenes_filename(
     return f"{scene_name}_{sensor_channel}_{timestamp}{file_extension}"
 
 
-def validate_nuscenes_structure(output_dir: Path, main_channel: Optional[str] = None) -> List[str]:
+REQUIRED_TABLE_FILES = [
+    'scene.json', 'sample.json', 'sample_data.json', 'sample_annotation.json',
+    'instance.json', 'ego_pose.json', 'calibrated_sensor.json', 'sensor.json',
+    'category.json', 'attribute.json', 'visibility.json', 'log.json', 'map.json'
+]
+
+
+def _scandir_names(directory: Path) -> Set[str]:
+    """Names of the entries in a directory (empty if it does not exist)"""
+    try:
+        with os.scandir(directory) as it:
+            return {entry.name for entry in it}
+    except (FileNotFoundError, NotADirectoryError):
+        return set()
+
+
+def validate_nuscenes_structure(
+    output_dir: Path,
+    main_channel: Optional[str] = None,
+    sample_data: Optional[List[Dict[str, Any]]] = None,
+    known_files: Optional[Set[str]] = None,
+    check_filesystem: bool = True
+) -> List[str]:
     """Validate generated NuScenes directory structure and file presence.
     Checks:
       - Required directories & JSON files.
       - Each sample_data entry's filename exists.
       - At least one point cloud (pcd) file present (optionally in main_channel).
+
+    Args:
+        output_dir: export root
+        main_channel: lidar channel that must contain point clouds
+        sample_data: in-memory sample_data records; loaded from
+            v1.0-all/sample_data.json when not given
+        known_files: relative paths known to exist (written by the converter,
+            reused from a previous export, or taken from one storage listing)
+        check_filesystem: resolve paths not in known_files with one
+            os.scandir per directory; when False they are reported missing
     """
+    known_files = known_files or set()
     errors: List[str] = []
+    dir_cache: Dict[Path, Set[str]] = {}
+
+    def _exists(rel: str) -> bool:
+        if rel in known_files:
+            return True
+        if not check_filesystem:
+            return False
+        parent, _, name = rel.rpartition('/')
+        directory = output_dir / parent
+        if directory not in dir_cache:
+            dir_cache[directory] = _scandir_names(directory)
+        return name in dir_cache[directory]
+
     required_dirs = ['samples', 'v1.0-all']
     for dir_name in required_dirs:
-        if not (output_dir / dir_name).exists():
+        if not _exists(dir_name) and not any(f.startswith(f"{dir_name}/") for f in known_files):
             errors.append(f"Missing required directory: {dir_name}")
-    required_files = [
-        'scene.json', 'sample.json', 'sample_data.json', 'sample_annotation.json',
-        'instance.json', 'ego_pose.json', 'calibrated_sensor.json', 'sensor.json',
-        'category.json', 'attribute.json', 'visibility.json', 'log.json', 'map.json'
-    ]
-    v1_dir = output_dir / 'v1.0-all'
-    if v1_dir.exists():
-        for filename in required_files:
-            if not (v1_dir / filename).exists():
-                errors.append(f"Missing required file: v1.0-all/{filename}")
-    # Load sample_data and verify referenced files
-    pcd_count = 0
-    if (v1_dir / 'sample_data.json').exists():
+    for filename in REQUIRED_TABLE_FILES:
+        if not _exists(f"v1.0-all/{filename}"):
+            errors.append(f"Missing required file: v1.0-all/{filename}")
+
+    if sample_data is None:
         try:
-            with open(v1_dir / 'sample_data.json', 'r', encoding='utf-8') as f:
-                sd_list = json.load(f)
-            for entry in sd_list:
-                rel = entry.get('filename')
-                if not rel:
-                    errors.append(f"sample_data {entry.get('token')} missing filename")
-                    continue
-                file_path = output_dir / rel
-                if not file_path.exists():
-                    errors.append(f"Referenced data file missing: {rel}")
-                if entry.get('fileformat') == 'pcd':
-                    if (not main_channel) or (main_channel and main_channel in rel):
-                        pcd_count += 1
+            with open(output_dir / 'v1.0-all' / 'sample_data.json', 'r', encoding='utf-8') as f:
+                sample_data = json.load(f)
+        except FileNotFoundError:
+            sample_data = []
         except Exception as e:
             errors.append(f"Failed to inspect sample_data.json: {e}")
+            sample_data = []
+
+    # Verify referenced files
+    pcd_count = 0
+    for entry in sample_data:
+        rel = entry.get('filename')
+        if not rel:
+            errors.append(f"sample_data {entry.get('token')} missing filename")
+            continue
+        if not _exists(rel):
+            errors.append(f"Referenced data file missing: {rel}")
+        if entry.get('fileformat') == 'pcd':
+            if (not main_channel) or (main_channel and main_channel in rel):
+                pcd_count += 1
     if pcd_count == 0:
         errors.append("No point cloud files found for main channel" + (f" {main_channel}" if main_channel else ""))
     return errors
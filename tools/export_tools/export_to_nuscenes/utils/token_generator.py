@@ -4,7 +4,7 @@ Token generator for NuScenes format
 
 import uuid
 import hashlib
-from typing import Union
+from typing import Dict, Iterable, Tuple, Union
 
 
 # def generate_uuid_from_input(input_str: str) -> str:
@@ -70,3 +70,68 @@ def generate_calibrated_sensor_token(scene_name: str, sensor_name: str) -> str:
 def generate_sensor_token(sensor_name: str) -> str:
     """Generate sensor token"""
     return generate_uuid_from_input(f"sensor-{sensor_name}")
+
+
+class TokenFactory:
+    """Memoized token generator.
+
+    Tokens are cached per (kind, scene, key) so the uuid5 hashing cost is paid
+    once per distinct token. Generated values are identical to the
+    module-level ``generate_*_token`` functions.
+    """
+
+    def __init__(self):
+        self._cache: Dict[Tuple[str, ...], str] = {}
+
+    def _get(self, kind: str, *parts: Union[str, int]) -> str:
+        cache_key = (kind,) + tuple(str(p) for p in parts)
+        token = self._cache.get(cache_key)
+        if token is None:
+            token = generate_uuid_from_input("-".join(cache_key))
+            self._cache[cache_key] = token
+        return token
+
+    def precompute_frames(
+        self,
+        scene_name: str,
+        timestamps: Iterable[Union[str, int]],
+        channels: Iterable[str] = (),
+    ) -> None:
+        """Bulk generate sample/ego_pose/sample_data tokens for all frames"""
+        channels = list(channels)
+        for ts in timestamps:
+            self.sample(scene_name, ts)
+            self.ego_pose(scene_name, ts)
+            for channel in channels:
+                self.sample_data(scene_name, ts, channel)
+
+    def scene(self, scene_name: str) -> str:
+        return self._get("scene", scene_name)
+
+    def log(self, scene_name: str) -> str:
+        return self._get("log", scene_name)
+
+    def sample(self, scene_name: str, timestamp: Union[str, int]) -> str:
+        return self._get("sample", scene_name, timestamp)
+
+    def sample_data(
+        self, scene_name: str, timestamp: Union[str, int], channel: str
+    ) -> str:
+        return self._get("sample_data", scene_name, timestamp, channel)
+
+    def annotation(
+        self, scene_name: str, timestamp: Union[str, int], obj_id: str
+    ) -> str:
+        return self._get("annotation", scene_name, timestamp, obj_id)
+
+    def instance(self, scene_name: str, track_id: str) -> str:
+        return self._get("instance", scene_name, track_id)
+
+    def ego_pose(self, scene_name: str, timestamp: Union[str, int]) -> str:
+        return self._get("ego_pose", scene_name, timestamp)
+
+    def calibrated_sensor(self, scene_name: str, sensor_name: str) -> str:
+        return self._get("calibrated_sensor", scene_name, sensor_name)
+
+    def sensor(self, sensor_name: str) -> str:
+        return self._get("sensor", sensor_name)
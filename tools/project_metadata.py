@@ -1,10 +1,12 @@
 from sqlmodel import Session
 from fastapi import HTTPException, Depends, status
+import hashlib
+import json
 import posixpath
+import time
 from pathlib import Path
 from typing import Dict, Any, Optional, List, Set, Tuple
 from botocore.exceptions import ClientError
-from sqlmodel import select
 import os
 from nextpoints_sdk.models.project_metadata import (
     ProjectMetadataResponse,
@@ -17,6 +19,8 @@ from nextpoints_sdk.models.enums import ProjectStatusEnum
 from nextpoints_sdk.models.project import Project, ProjectResponse
 
 from app.services.s3_service import S3Service
+from app.services.project_cache import project_cache
+from app.services import http_cache
 
 
 from app.database import get_session
@@ -26,12 +30,16 @@ def get_project_metadata(
     project_name: str,
     session: Session = Depends(get_session),
     use_presigned_urls: bool = True,
+    frame_range: Optional[Tuple[int, int]] = None,
 ) -> ProjectMetadataResponse:
     """
     获取项目完整元数据,用于对数据进行校验
+
+    frame_range: 可选 [start, end) 帧序号区间，仅加载区间内的帧（分片导出使用）；
+    摘要信息（frame_count / 起止时间戳）始终描述整个项目。
     """
     # 1. 获取项目基本信息和状态
-    project = session.exec(select(Project).where(Project.name == project_name)).first()
+    project = project_cache.get(project_name, session)
 
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -47,7 +55,7 @@ def get_project_metadata(
     # 3. generate project metadata
     try:
         project_meta_data = _generate_project_meta_data(
-            project, s3_service, use_presigned_urls
+            project, s3_service, use_presigned_urls, frame_range=frame_range
         )
         return project_meta_data
     except Exception as e:
@@ -58,11 +66,105 @@ def get_project_metadata(
         )
 
 
+# 元数据的全部来源目录（均在 bucket_prefix 下）
+METADATA_SOURCE_DIRS = ("calib", "lidar", "camera", "ego_pose", "label")
+
+
+def list_project_objects(
+    project: Project, s3_service: S3Service
+) -> Dict[str, List[Dict]]:
+    """列出元数据来源目录下的全部对象（含 S3 ETag），只 list 不读取对象"""
+    root = (project.bucket_prefix or "").strip("/")
+    return {
+        name: s3_service.list_all_objects(
+            project.bucket_name, posixpath.join(root, name) if root else name
+        )
+        for name in METADATA_SOURCE_DIRS
+    }
+
+
+def project_metadata_etag(
+    project: Project, listings: Dict[str, List[Dict]], use_presigned_urls: bool = True
+) -> str:
+    """
+    元数据的强 ETag：由项目配置与全部来源对象的 (Key, ETag) 计算
+
+    使用预签名 URL 时按半个有效期切换时间窗口，浏览器缓存的 URL 不会在
+    验证通过后已过期
+    """
+    digest = hashlib.sha256()
+    digest.update(
+        json.dumps(
+            [
+                project.name,
+                project.status,
+                project.description,
+                project.bucket_name,
+                project.bucket_prefix,
+                project.s3_endpoint,
+                project.use_presigned_urls,
+                project.expiration_minutes,
+                use_presigned_urls,
+            ],
+            default=str,
+        ).encode("utf-8")
+    )
+    if project.use_presigned_urls:
+        window = max(60, project.expiration_minutes * 30)
+        digest.update(f"url-window:{int(time.time() // window)}\n".encode("utf-8"))
+    for name in METADATA_SOURCE_DIRS:
+        for obj in listings[name]:
+            digest.update(f"{obj['Key']}\0{obj.get('ETag', '')}\n".encode("utf-8"))
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def get_project_metadata_if_none_match(
+    project_name: str,
+    session: Session,
+    if_none_match: Optional[str] = None,
+) -> Tuple[Optional[ProjectMetadataResponse], str]:
+    """
+    条件获取项目元数据：先列目录计算 ETag，与 If-None-Match 匹配时不读取任何对象
+
+    Returns:
+        (元数据, ETag)，ETag 匹配时元数据为 None
+    """
+    project = project_cache.get(project_name, session)
+
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    s3_service = S3Service(
+        access_key_id=project.access_key_id,
+        secret_access_key=project.secret_access_key,
+        endpoint_url=project.s3_endpoint,
+        region_name=project.region_name,
+    )
+
+    listings = list_project_objects(project, s3_service)
+    etag = project_metadata_etag(project, listings)
+    if http_cache.etag_matches(if_none_match, etag):
+        return None, etag
+
+    try:
+        project_meta_data = _generate_project_meta_data(
+            project, s3_service, True, listings=listings
+        )
+        return project_meta_data, etag
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to generate_project_meta_data: {str(e)}",
+        )
+
+
 def _generate_project_meta_data(
     project: Project,
     s3_service: S3Service,
     use_presigned_urls: bool,
     main_channel: Optional[str] = "lidar-fusion",
+    frame_range: Optional[Tuple[int, int]] = None,
+    listings: Optional[Dict[str, List[Dict]]] = None,
 ) -> ProjectMetadataResponse:
     """
     目录约定（均在 root = bucket_prefix 下）：
@@ -70,6 +172,8 @@ def _generate_project_meta_data(
       - lidar/<lidar_channel>/<timestamp>.pcd
       - camera/<camera_channel>/<timestamp>.jpg
       - ego_pose/<timestamp>.json
+
+    listings: 可选，list_project_objects 的结果，传入时不再重复列目录
     """
 
     def _safe_join(*parts: str, strip_slash=True) -> str:
@@ -161,9 +265,20 @@ def _generate_project_meta_data(
     camera_prefix = _safe_join(root, "camera")
     ego_pose_prefix = _safe_join(root, "ego_pose")
 
+    def _list(name: str, prefix: str) -> List[Dict]:
+        """优先使用调用方已列出的对象，避免重复 list"""
+        if listings is not None:
+            return listings[name]
+        return s3_service.list_all_objects(bucket, prefix)
+
+    # 已列出标注目录时直接据此判断标注文件是否存在，省去逐帧 HEAD
+    label_keys: Optional[Set[str]] = (
+        {obj["Key"] for obj in listings["label"]} if listings is not None else None
+    )
+
     # 1) 读 calib：严格校验为 CalibrationMetadata
     calibration: Dict[str, CalibrationMetadata] = {}
-    for obj in s3_service.list_all_objects(bucket, calib_prefix):
+    for obj in _list("calib", calib_prefix):
         key = obj.get("Key") or obj.get("key")
         if not key or not _is_ext(key, ".json"):
             continue
@@ -179,7 +294,7 @@ def _generate_project_meta_data(
     lidar_channels: Dict[str, Set[str]] = {}  # channel -> {timestamp_ns}
     lidar_index: Dict[Tuple[str, str], str] = {}  # (channel, ts) -> key
 
-    for obj in s3_service.list_all_objects(bucket, lidar_prefix):
+    for obj in _list("lidar", lidar_prefix):
         key = obj.get("Key") or obj.get("key")
         if not key or not _is_ext(key, ".pcd"):
             continue
@@ -196,7 +311,7 @@ def _generate_project_meta_data(
     camera_channels: Dict[str, Set[str]] = {}
     camera_index: Dict[Tuple[str, str], str] = {}
 
-    for obj in s3_service.list_all_objects(bucket, camera_prefix):
+    for obj in _list("camera", camera_prefix):
         key = obj.get("Key") or obj.get("key")
         if not key or not _is_ext(key, ".jpg", ".jpeg", ".png"):
             continue
@@ -214,7 +329,7 @@ def _generate_project_meta_data(
 
     # ego_pose：ts -> key
     ego_pose_index: Dict[str, str] = {}
-    for obj in s3_service.list_all_objects(bucket, ego_pose_prefix):
+    for obj in _list("ego_pose", ego_pose_prefix):
         key = obj.get("Key") or obj.get("key")
         if not key or not _is_ext(key, ".json"):
             continue
@@ -240,8 +355,17 @@ def _generate_project_meta_data(
         raise ValueError(f"主通道 {main_channel} 下未发现任何 .pcd 帧。")
 
     # 4) 构建 frames：以主通道时间戳作为帧集合
+    frame_indices = range(len(baseline_ts))
+    if frame_range is not None:
+        frame_indices = frame_indices[frame_range[0] : frame_range[1]]
+        if not frame_indices:
+            raise ValueError(
+                f"帧区间 {frame_range} 超出范围（共 {len(baseline_ts)} 帧）。"
+            )
+
     frames: List[FrameMetadata] = []
-    for idx, ts in enumerate(baseline_ts):
+    for idx in frame_indices:
+        ts = baseline_ts[idx]
         # lidars: 收集同时间戳的所有激光通道（至少包含 main_channel）
         lidars: Dict[str, str] = {}
         for ch in lidar_channels.keys():
@@ -280,7 +404,11 @@ def _generate_project_meta_data(
         annotation: Optional[List[AnnotationItem]] = None
         label_key = _safe_join(root, "label", f"{ts}.json")
         try:
-            if s3_service.object_exists(bucket, label_key):
+            if (
+                label_key in label_keys
+                if label_keys is not None
+                else s3_service.object_exists(bucket, label_key)
+            ):
                 label_data = s3_service.read_json_object(bucket, label_key)
                 if isinstance(label_data, list):
                     annotation = [
@@ -315,7 +443,7 @@ def _generate_project_meta_data(
 
     project_meta_response = ProjectMetadataResponse(
         project=_project_to_response(project),
-        frame_count=len(frames),
+        frame_count=len(baseline_ts),
         start_timestamp_ns=start_ts,
         end_timestamp_ns=end_ts,
         duration_seconds=duration_seconds,
@@ -326,3 +454,54 @@ def _generate_project_meta_data(
 
     # 6) 组装返回
     return project_meta_response
+
+
+def list_frame_timestamps(
+    project_name: str,
+    session: Session = Depends(get_session),
+    main_channel: str = "lidar-fusion",
+) -> List[str]:
+    """
+    仅列出主通道的帧时间戳（按时间排序），不读取标注/位姿，用于分片规划
+    """
+    project = project_cache.get(project_name, session)
+
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    s3_service = S3Service(
+        access_key_id=project.access_key_id,
+        secret_access_key=project.secret_access_key,
+        endpoint_url=project.s3_endpoint,
+        region_name=project.region_name,
+    )
+    lidar_prefix = posixpath.join(
+        (project.bucket_prefix or "").strip("/"), "lidar", main_channel
+    ).lstrip("/")
+    timestamps = []
+    for obj in s3_service.list_all_objects(project.bucket_name, lidar_prefix + "/"):
+        key = obj.get("Key", "")
+        if key.lower().endswith(".pcd"):
+            timestamps.append(posixpath.basename(key).rsplit(".", 1)[0])
+    return sorted(timestamps, key=int)
+
+
+def label_etags_from_listing(objects: List[Dict[str, Any]]) -> Dict[str, str]:
+    """label/ 目录的列表结果 -> 帧 ID 到标注文件 ETag（不含引号）的映射"""
+    return {
+        Path(obj["Key"]).stem: obj.get("ETag", "").strip('"')
+        for obj in objects
+        if obj.get("Key", "").endswith(".json")
+    }
+
+
+def list_label_etags(s3_service: S3Service, project: Project) -> Dict[str, str]:
+    """
+    列出项目的标注文件，返回帧 ID -> ETag（不含引号）
+
+    标注快照与导出清单都用它判断标注是否变化，两处得到的 ETag 一致
+    """
+    label_key_prefix = str(Path(project.bucket_prefix or "") / "label")
+    return label_etags_from_listing(
+        s3_service.list_all_objects(project.bucket_name, label_key_prefix)
+    )
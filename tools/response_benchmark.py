@@ -0,0 +1,193 @@
+# tools/response_benchmark.py
+"""/metadata 响应序列化与压缩的基准
+
+用合成的长场景元数据（预签名 URL、位姿、标注）比较：
+  - default: 返回模型，由 FastAPI 按 response_model 重新校验并 jsonable_encoder 编码
+  - model:   直接返回 ModelJSONResponse，不压缩
+  - gzip:    json_response 按 Accept-Encoding 做 gzip 压缩
+
+TestClient 不经过网络，另按 --mbps 的链路带宽把传输时间计入 "link" 两列，
+压缩只有在传输时间占主导时才有收益
+
+    python -m tools.response_benchmark --frames 2000 --boxes 30 --requests 30 --mbps 50
+"""
+
+import argparse
+import time
+
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from nextpoints_sdk.models.project_metadata import ProjectMetadataResponse
+
+from app.services import json_response as jr
+
+URL = (
+    "https://s3.example.com/bucket/{scene}/nextpoints/{path}"
+    "?X-Amz-Algorithm=AWS4-HMAC-SHA256&X-Amz-Credential=AKIAEXAMPLE%2F20250101%2F"
+    "us-east-1%2Fs3%2Faws4_request&X-Amz-Date=20250101T000000Z&X-Amz-Expires=3600"
+    "&X-Amz-SignedHeaders=host&X-Amz-Signature={sig}"
+)
+POSE_FRAME = {"parent_frame_id": "map", "child_frame_id": "base_link"}
+
+
+def _transform(rng: np.random.Generator) -> dict:
+    q = rng.normal(size=4)
+    q /= np.linalg.norm(q)
+    t = rng.normal(size=3) * 100
+    return {
+        "translation": dict(zip("xyz", t.tolist())),
+        "rotation": dict(zip("xyzw", q.tolist())),
+    }
+
+
+def make_metadata(num_frames: int, num_boxes: int, scene: str = "scene_0001"):
+    rng = np.random.default_rng(0)
+    cameras = ["front", "front_left", "front_right", "back", "back_left", "back_right"]
+    calibration = {
+        "lidar-fusion": {
+            "channel": "lidar-fusion",
+            "sensor_type": "lidar",
+            "pose": {**POSE_FRAME, "transform": _transform(rng)},
+        }
+    }
+    for camera in cameras:
+        calibration[camera] = {
+            "channel": camera,
+            "sensor_type": "camera",
+            "pose": {**POSE_FRAME, "transform": _transform(rng)},
+            "camera_config": {
+                "width": 1920,
+                "height": 1080,
+                "model": "pinhole",
+                "intrinsic": {"fx": 1000.0, "fy": 1000.0, "cx": 960.0, "cy": 540.0},
+                "distortion_coefficients": {"k1": 0, "k2": 0, "p1": 0, "p2": 0},
+            },
+        }
+
+    timestamps = [str(1700000000000000000 + i * 100000000) for i in range(num_frames)]
+    frames = []
+    for i, ts in enumerate(timestamps):
+        sig = lambda: rng.bytes(32).hex()
+        boxes = []
+        for k in range(num_boxes):
+            yaw = float(rng.uniform(-np.pi, np.pi))
+            boxes.append(
+                {
+                    "obj_id": str(k),
+                    "obj_type": "Car",
+                    "psr": {
+                        "position": dict(
+                            zip("xyz", (rng.normal(size=3) * 30).tolist())
+                        ),
+                        "rotation": {
+                            "x": 0.0,
+                            "y": 0.0,
+                            "z": float(np.sin(yaw / 2)),
+                            "w": float(np.cos(yaw / 2)),
+                        },
+                        "scale": {"x": 4.5, "y": 1.9, "z": 1.6},
+                    },
+                }
+            )
+        frames.append(
+            {
+                "id": i,
+                "timestamp_ns": ts,
+                "prev_timestamp_ns": timestamps[i - 1] if i > 0 else "",
+                "next_timestamp_ns": timestamps[i + 1] if i < num_frames - 1 else "",
+                "lidars": {
+                    "lidar-fusion": URL.format(
+                        scene=scene, path=f"lidar/lidar-fusion/{ts}.pcd", sig=sig()
+                    )
+                },
+                "images": {
+                    camera: URL.format(
+                        scene=scene, path=f"camera/{camera}/{ts}.jpg", sig=sig()
+                    )
+                    for camera in cameras
+                },
+                "pose": {**POSE_FRAME, "transform": _transform(rng)},
+                "annotation": boxes,
+            }
+        )
+
+    return ProjectMetadataResponse.model_validate(
+        {
+            "project": {
+                "id": 1,
+                "name": scene,
+                "description": None,
+                "status": "unstarted",
+                "created_at": "2025-01-01T00:00:00",
+            },
+            "frame_count": num_frames,
+            "start_timestamp_ns": timestamps[0],
+            "end_timestamp_ns": timestamps[-1],
+            "duration_seconds": (num_frames - 1) * 0.1,
+            "main_channel": "lidar-fusion",
+            "calibration": calibration,
+            "frames": frames,
+        }
+    )
+
+
+def build_app(metadata: ProjectMetadataResponse) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/default", response_model=ProjectMetadataResponse)
+    async def default():
+        return metadata
+
+    @app.get("/fast", response_model=ProjectMetadataResponse)
+    async def fast(request: Request):
+        return jr.json_response(request, metadata)
+
+    return app
+
+
+def run(client: TestClient, path: str, encoding: str, num_requests: int, mbps: float):
+    latencies, wire = [], 0
+    for _ in range(num_requests):
+        start = time.perf_counter()
+        response = client.get(path, headers={"Accept-Encoding": encoding})
+        latencies.append(time.perf_counter() - start)
+        wire = response.num_bytes_downloaded
+        assert response.status_code == 200
+    ms = np.array(latencies) * 1000
+    link_ms = ms + wire * 8 / (mbps * 1e6) * 1000
+    return (
+        wire,
+        [float(np.percentile(v, q)) for v in (ms, link_ms) for q in (50, 95)],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=2000)
+    parser.add_argument("--boxes", type=int, default=30)
+    parser.add_argument("--requests", type=int, default=30)
+    parser.add_argument(
+        "--mbps", type=float, default=50.0, help="simulated link bandwidth"
+    )
+    args = parser.parse_args()
+
+    client = TestClient(build_app(make_metadata(args.frames, args.boxes)))
+    cases = [
+        ("default", "/default", "identity"),
+        ("model", "/fast", "identity"),
+        ("gzip", "/fast", "gzip"),
+    ]
+
+    print(
+        f"{'case':<9}{'bytes':>12}{'p50 ms':>10}{'p95 ms':>10}"
+        f"{'link p50':>10}{'link p95':>10}"
+    )
+    for name, path, encoding in cases:
+        wire, times = run(client, path, encoding, args.requests, args.mbps)
+        print(f"{name:<9}{wire:>12}" + "".join(f"{t:>10.1f}" for t in times))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Tests for the columnar annotation snapshot
+"""
+
+import numpy as np
+
+from nextpoints_sdk.models.annotation import FrameAnnotation
+
+from tools.annotation_snapshot import AnnotationSnapshot
+
+
+def make_box(obj_id: str, x: float, obj_type: str = "Car", num_pts=None) -> dict:
+    box = {
+        "obj_id": obj_id,
+        "obj_type": obj_type,
+        "psr": {
+            "position": {"x": x, "y": 1.0, "z": 0.5},
+            "rotation": {"x": 0.0, "y": 0.0, "z": 0.0, "w": 1.0},
+            "scale": {"x": 4.0, "y": 2.0, "z": 1.5},
+        },
+    }
+    if num_pts is not None:
+        box["num_pts"] = num_pts
+    return box
+
+
+def make_frame(frame: str, boxes) -> FrameAnnotation:
+    return FrameAnnotation(scene="scene", frame=frame, annotation=boxes)
+
+
+def make_snapshot() -> AnnotationSnapshot:
+    return AnnotationSnapshot.from_annotations(
+        [
+            make_frame("300", [make_box("1", 3.0), make_box("2", 30.0, "Bus", 12)]),
+            make_frame("100", [make_box("1", 1.0)]),
+            make_frame("200", []),
+        ],
+        label_etags={"100": "a", "200": "b", "300": "c"},
+    )
+
+
+def test_frames_sorted_by_timestamp_including_empty_frames():
+    snapshot = make_snapshot()
+    assert snapshot.frames.tolist() == ["100", "200", "300"]
+    assert len(snapshot) == 3
+
+
+def test_bytes_round_trip_keeps_rows_and_label_etags():
+    snapshot = make_snapshot()
+    restored = AnnotationSnapshot.from_bytes(snapshot.to_bytes())
+
+    assert restored.frames.tolist() == snapshot.frames.tolist()
+    assert restored.label_etags == snapshot.label_etags
+    for name, column in snapshot.columns.items():
+        np.testing.assert_array_equal(restored.columns[name], column)
+
+
+def test_row_items_match_model_dump():
+    snapshot = make_snapshot()
+    bus_row = snapshot.columns["obj_id"].tolist().index("2")
+    assert snapshot.row_items([bus_row]) == [make_box("2", 30.0, "Bus", 12)]
+
+
+def test_replace_frames_swaps_rows_of_saved_frames_only():
+    snapshot = make_snapshot()
+    updated = snapshot.replace_frames(
+        [
+            make_frame("300", [make_box("2", 31.0, "Bus")]),
+            make_frame("400", [make_box("3", 40.0)]),
+        ],
+        label_etags={"300": "c2", "400": "d"},
+    )
+
+    by_frame = {
+        a.frame: [item.model_dump(exclude_none=True) for item in a.annotation]
+        for a in updated.to_annotations("scene")
+    }
+    assert by_frame == {
+        "100": [make_box("1", 1.0)],
+        "200": [],
+        "300": [make_box("2", 31.0, "Bus")],
+        "400": [make_box("3", 40.0)],
+    }
+    assert updated.label_etags == {"100": "a", "200": "b", "300": "c2", "400": "d"}
+    # the original snapshot is left untouched
+    assert len(snapshot) == 3 and snapshot.label_etags["300"] == "c"
+
+
+def test_replace_frames_without_etag_marks_snapshot_stale():
+    snapshot = make_snapshot()
+    current = {"100": "a", "200": "b", "300": "c"}
+    assert snapshot.is_current(current)
+
+    updated = snapshot.replace_frames([make_frame("200", [make_box("1", 2.0)])])
+    assert updated.label_etags["200"] == ""
+    assert not updated.is_current(current)
+    assert not snapshot.is_current({**current, "400": "d"})
+
+
+def test_tracks_grouped_by_object_in_time_order():
+    snapshot = make_snapshot().replace_frames([make_frame("200", [make_box("1", 2.0)])])
+    tracks = snapshot.tracks()
+
+    assert sorted(tracks) == ["1", "2"]
+    assert [entry["frame"] for entry in tracks["1"]] == ["100", "200", "300"]
+    assert [entry["box"]["psr"]["position"]["x"] for entry in tracks["1"]] == [
+        1.0,
+        2.0,
+        3.0,
+    ]
+    assert snapshot.tracks(["2"]) == {
+        "2": [{"frame": "300", "box": make_box("2", 30.0, "Bus", 12)}]
+    }
+    assert snapshot.tracks(["missing"]) == {}
@@ -0,0 +1,174 @@
+"""
+Tests for the vectorized LabelChecker against the original per-label loops
+"""
+
+import copy
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+from scipy.spatial.transform import Rotation as R
+
+from nextpoints_sdk.models.annotation import FrameAnnotation
+
+from tools.check_label import LabelChecker, get_labels
+
+LABEL_DIR = Path(__file__).resolve().parents[2] / "data" / "example" / "label"
+
+
+def reference_messages(annotations):
+    """messages of the original dict-of-lists LabelChecker
+
+    The rotation check is left out: it was changed on purpose from per-axis
+    euler deltas to quaternion angles in timestamp order.
+    """
+    def_labels = get_labels()
+    labels, obj_ids, messages = {}, {}, []
+    for annotation in annotations:
+        labels.setdefault(annotation.frame, [])
+        for item in annotation.annotation:
+            o = item.model_dump()
+            labels[annotation.frame].append(o)
+            obj_ids.setdefault(o["obj_id"], []).append([annotation.frame, o])
+
+    for frame_id, objs in labels.items():
+        for o in objs:
+            if o["obj_type"] not in def_labels:
+                messages.append(
+                    (
+                        frame_id,
+                        o["obj_id"],
+                        "object type {} not recognizable".format(o["obj_type"]),
+                    )
+                )
+        for o in objs:
+            if not o["obj_id"]:
+                messages.append(
+                    (frame_id, "", "object {} id absent".format(o["obj_type"]))
+                )
+        counts = {}
+        for o in objs:
+            counts[o["obj_id"]] = counts.get(o["obj_id"], 0) + 1
+        for obj_id, count in counts.items():
+            if count > 1:
+                messages.append((frame_id, obj_id, "duplicate object id"))
+
+    for obj_id, label_list in obj_ids.items():
+        if label_list[0][1]["obj_type"] != "Pedestrian":
+            mean = {
+                axis: np.array(
+                    [float(l[1]["psr"]["scale"][axis]) for l in label_list]
+                ).mean()
+                for axis in "xyz"
+            }
+            for frame_id, label in label_list:
+                for axis in "xyz":
+                    value = label["psr"]["scale"][axis]
+                    ratio = value / mean[axis]
+                    if ratio < 0.95 or ratio > 1.05:
+                        messages.append(
+                            (
+                                frame_id,
+                                obj_id,
+                                "dimension {} {}: {}, mean {}".format(
+                                    axis,
+                                    "too small" if ratio < 0.95 else "too large",
+                                    value,
+                                    mean[axis],
+                                ),
+                            )
+                        )
+        for (_, plabel), (frame_id, label) in zip(label_list, label_list[1:]):
+            if label["obj_type"] != plabel["obj_type"]:
+                messages.append(
+                    (
+                        frame_id,
+                        obj_id,
+                        "different object types: {}, previous {}".format(
+                            label["obj_type"], plabel["obj_type"]
+                        ),
+                    )
+                )
+    return messages
+
+
+def load_fixture_frames():
+    """example labels; rotations are stored as euler angles, converted to xyzw"""
+    frames = {}
+    for path in sorted(LABEL_DIR.glob("*.json")):
+        items = json.loads(path.read_text())
+        for item in items:
+            rotation = item["psr"]["rotation"]
+            if "w" not in rotation:
+                quat = R.from_euler(
+                    "xyz", [rotation["x"], rotation["y"], rotation["z"]]
+                ).as_quat()
+                item["psr"]["rotation"] = dict(zip("xyzw", quat.tolist()))
+        frames[path.stem] = items
+    return frames
+
+
+def to_annotations(frames):
+    return [
+        FrameAnnotation(scene="example", frame=frame, annotation=items)
+        for frame, items in frames.items()
+    ]
+
+
+def checker_messages(checker):
+    return [
+        (m["frame_id"], m["obj_id"], m["desc"])
+        for m in checker.messages
+        if not m["desc"].startswith("rotation")
+    ]
+
+
+def perturbed_frames():
+    """fixture labels with one error of every kind the checks look for"""
+    frames = copy.deepcopy(load_fixture_frames())
+    first, second, *_, last = sorted(frames)
+    frames[first][0]["obj_type"] = "Spaceship"
+    frames[second][1]["obj_id"] = ""
+    frames[second].append(copy.deepcopy(frames[second][2]))
+    frames[last][0]["psr"]["scale"]["x"] *= 1.5
+    frames[last][1]["obj_type"] = "Truck"
+    return frames
+
+
+@pytest.mark.parametrize(
+    "frames", [load_fixture_frames(), perturbed_frames()], ids=["fixture", "perturbed"]
+)
+def test_messages_match_reference_checker(frames):
+    annotations = to_annotations(frames)
+    checker = LabelChecker(annotations)
+    checker.check()
+
+    expected = reference_messages(annotations)
+    assert sorted(checker_messages(checker)) == sorted(expected)
+
+
+def test_perturbed_fixture_reports_every_kind_of_error():
+    checker = LabelChecker(to_annotations(perturbed_frames()))
+    checker.check()
+    descs = " ".join(m[2] for m in checker_messages(checker))
+
+    for fragment in [
+        "not recognizable",
+        "id absent",
+        "duplicate object id",
+        "too large",
+        "different object types",
+    ]:
+        assert fragment in descs
+
+
+def test_frame_and_object_checks_split_the_full_check():
+    annotations = to_annotations(perturbed_frames())
+    full = LabelChecker(annotations)
+    full.check()
+
+    split = LabelChecker(annotations)
+    split.check_frames()
+    split.check_objects()
+    assert sorted(map(str, split.messages)) == sorted(map(str, full.messages))
@@ -0,0 +1,64 @@
+"""
+Tests for the compact point cloud blob
+"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("wind_pypcd")
+
+from tools.compact_points import (  # noqa: E402
+    HEADER_SIZE,
+    crop_points,
+    decode_header,
+    encode_points,
+    voxel_downsample,
+)
+
+
+def decode(blob: bytes):
+    """read the blob the way the browser maps it to typed arrays"""
+    count = decode_header(blob)
+    xyz = np.frombuffer(blob, dtype="<f4", count=count * 3, offset=HEADER_SIZE)
+    intensity = np.frombuffer(
+        blob, dtype=np.uint8, count=count, offset=HEADER_SIZE + count * 12
+    )
+    return xyz.reshape((-1, 3)), intensity
+
+
+def test_encode_decode_round_trip():
+    rng = np.random.default_rng(0)
+    xyz = rng.normal(size=(100, 3)).astype(np.float32)
+    intensity = rng.uniform(0, 255, size=100).astype(np.float32)
+
+    blob = encode_points(xyz, intensity)
+    assert len(blob) == HEADER_SIZE + 100 * 13
+    decoded_xyz, decoded_intensity = decode(blob)
+    np.testing.assert_array_equal(decoded_xyz, xyz)
+    np.testing.assert_array_equal(decoded_intensity, np.rint(intensity))
+
+
+def test_intensity_is_rounded_and_clipped_to_uint8():
+    xyz = np.zeros((4, 3), dtype=np.float32)
+    _, intensity = decode(encode_points(xyz, np.array([-3.0, 1.4, 1.6, 300.0])))
+    assert intensity.tolist() == [0, 1, 2, 255]
+
+
+def test_empty_blob_round_trip():
+    blob = encode_points(np.zeros((0, 3), dtype=np.float32), np.zeros(0))
+    assert len(blob) == HEADER_SIZE and decode_header(blob) == 0
+
+
+def test_decode_header_rejects_other_data():
+    with pytest.raises(ValueError):
+        decode_header(b"PCD\n" + bytes(HEADER_SIZE))
+
+
+def test_crop_and_voxel_downsample_keep_point_order():
+    xyz = np.array(
+        [[0.1, 0.0, 0.0], [5.0, 0.0, 0.0], [0.2, 0.0, 0.0], [1.5, 0.0, 0.0]],
+        dtype=np.float32,
+    )
+    keep = crop_points(xyz, (None, None, None, 2.0, None, None))
+    assert keep.tolist() == [True, False, True, True]
+    assert voxel_downsample(xyz[keep], 1.0).tolist() == [0, 2]
@@ -0,0 +1,69 @@
+"""
+Tests for compressed JSON responses
+"""
+
+import gzip
+import json
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.services import http_cache
+from app.services import json_response as jr
+
+ETAG = '"abc"'
+LARGE = {"frames": ["frame"] * 1000}
+
+
+def make_client(client=("172.18.0.5", 50000), min_size=1024):
+    app = FastAPI()
+
+    @app.get("/large")
+    async def large(request: Request):
+        return jr.json_response(
+            request, LARGE, headers={"ETag": ETAG}, min_size=min_size
+        )
+
+    return TestClient(app, client=client)
+
+
+def get_raw(client, encoding):
+    """response bytes as sent, without the client's transparent decoding"""
+    with client.stream(
+        "GET", "/large", headers={"Accept-Encoding": encoding}
+    ) as response:
+        return response, b"".join(response.iter_raw())
+
+
+def test_private_client_accepting_gzip_gets_compressed_body():
+    response, body = get_raw(make_client(), "gzip, deflate")
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert json.loads(gzip.decompress(body)) == LARGE
+    assert response.headers["ETag"] == '"abc-gzip"'
+    assert http_cache.etag_matches(response.headers["ETag"], ETAG)
+
+
+def test_loopback_client_is_compressed_too():
+    response, _ = get_raw(make_client(client=("127.0.0.1", 50000)), "gzip")
+    assert response.headers["Content-Encoding"] == "gzip"
+
+
+def test_small_or_unaccepted_responses_are_not_compressed():
+    for client, encoding in [
+        (make_client(min_size=10**6), "gzip"),
+        (make_client(), "identity"),
+        (make_client(), "gzip;q=0"),
+    ]:
+        response, body = get_raw(client, encoding)
+        assert "Content-Encoding" not in response.headers
+        assert response.headers["ETag"] == ETAG
+        assert json.loads(body) == LARGE
+
+
+def test_compression_can_be_switched_off(monkeypatch):
+    monkeypatch.setattr(jr, "JSON_COMPRESS", False)
+    response, body = get_raw(make_client(), "gzip")
+    assert "Content-Encoding" not in response.headers
+    assert json.loads(body) == LARGE
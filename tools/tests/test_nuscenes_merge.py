@@ -0,0 +1,131 @@
+"""
+Tests for merging the partial NuScenes tables of a sharded export
+"""
+
+from collections import Counter
+
+from tools.export_tools.export_to_nuscenes.merge import (
+    NUSCENES_TABLES,
+    merge_partial_tables,
+)
+
+CHANNELS = ["lidar", "cam_front"]
+
+
+def make_shard(frames, scenes=("scene_a",)):
+    """partial tables of one shard covering frames (timestamps) of every scene
+
+    Shared records (scenes, sensors, instances) are repeated in every shard as
+    the converter does; sample_data / sample_annotation chains only link
+    records inside the shard.
+    """
+    tables = {name: [] for name in NUSCENES_TABLES}
+    for channel in CHANNELS:
+        tables["sensor"].append({"token": f"sensor_{channel}", "channel": channel})
+    for scene in scenes:
+        tables["scene"].append({"token": scene, "name": scene})
+        for channel in CHANNELS:
+            tables["calibrated_sensor"].append(
+                {
+                    "token": f"calib_{scene}_{channel}",
+                    "sensor_token": f"sensor_{channel}",
+                }
+            )
+        tables["instance"].append(
+            {
+                "token": f"inst_{scene}",
+                "nbr_annotations": len(frames),
+                "first_annotation_token": f"ann_{scene}_{frames[0]}",
+                "last_annotation_token": f"ann_{scene}_{frames[-1]}",
+            }
+        )
+        for ts in frames:
+            sample = f"sample_{scene}_{ts}"
+            tables["sample"].append(
+                {"token": sample, "timestamp": ts, "scene_token": scene}
+            )
+            for channel in CHANNELS:
+                tables["sample_data"].append(
+                    {
+                        "token": f"sd_{scene}_{channel}_{ts}",
+                        "sample_token": sample,
+                        "calibrated_sensor_token": f"calib_{scene}_{channel}",
+                        "timestamp": ts,
+                    }
+                )
+            tables["sample_annotation"].append(
+                {
+                    "token": f"ann_{scene}_{ts}",
+                    "sample_token": sample,
+                    "instance_token": f"inst_{scene}",
+                }
+            )
+    for name in ("sample_data", "sample_annotation"):
+        chains = {}
+        for record in tables[name]:
+            key = record.get("calibrated_sensor_token", record.get("instance_token"))
+            chains.setdefault(key, []).append(record)
+        for records in chains.values():
+            for i, record in enumerate(records):
+                record["prev"] = records[i - 1]["token"] if i > 0 else ""
+                record["next"] = records[i + 1]["token"] if i < len(records) - 1 else ""
+    return tables
+
+
+def follow(records, first):
+    """tokens of the chain starting at first, checking prev links on the way"""
+    by_token = {r["token"]: r for r in records}
+    tokens, prev = [], ""
+    token = first
+    while token:
+        record = by_token[token]
+        assert record["prev"] == prev
+        tokens.append(token)
+        prev, token = token, record["next"]
+    return tokens
+
+
+def merge_two_shards(scenes=("scene_a",)):
+    # shards listed out of order: the merge must not depend on shard order
+    return merge_partial_tables(
+        [make_shard([300, 400], scenes), make_shard([100, 200], scenes)]
+    )
+
+
+def test_merge_keeps_one_record_per_token():
+    merged = merge_two_shards()
+
+    for name, records in merged.items():
+        counts = Counter(r["token"] for r in records)
+        assert all(c == 1 for c in counts.values()), name
+    assert len(merged["scene"]) == 1
+    assert len(merged["sensor"]) == len(CHANNELS)
+    assert len(merged["sample"]) == 4
+    assert len(merged["sample_data"]) == 4 * len(CHANNELS)
+
+
+def test_sample_data_chains_are_relinked_per_channel_across_shards():
+    merged = merge_two_shards()
+
+    for channel in CHANNELS:
+        chain = follow(merged["sample_data"], f"sd_scene_a_{channel}_100")
+        assert chain == [f"sd_scene_a_{channel}_{ts}" for ts in (100, 200, 300, 400)]
+
+
+def test_sample_data_chains_do_not_cross_scenes():
+    merged = merge_two_shards(scenes=("scene_a", "scene_b"))
+
+    for scene in ("scene_a", "scene_b"):
+        chain = follow(merged["sample_data"], f"sd_{scene}_lidar_100")
+        assert chain == [f"sd_{scene}_lidar_{ts}" for ts in (100, 200, 300, 400)]
+
+
+def test_annotations_and_instances_are_relinked_across_shards():
+    merged = merge_two_shards()
+
+    chain = follow(merged["sample_annotation"], "ann_scene_a_100")
+    assert chain == [f"ann_scene_a_{ts}" for ts in (100, 200, 300, 400)]
+    (instance,) = merged["instance"]
+    assert instance["nbr_annotations"] == 4
+    assert instance["first_annotation_token"] == "ann_scene_a_100"
+    assert instance["last_annotation_token"] == "ann_scene_a_400"
@@ -0,0 +1,158 @@
+"""
+Tests for track interpolation, smoothing and extrapolation
+"""
+
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+
+from tools.trajectory import (
+    fill_track,
+    frame_times,
+    pack_tracks,
+    quat_to_rpy,
+    reference_rows,
+    smooth_tracks,
+    unwrap_angles,
+)
+
+
+def yaw_quat(degrees) -> np.ndarray:
+    return R.from_euler("z", np.reshape(degrees, (-1, 1)), degrees=True).as_quat()
+
+
+def quat_yaw(rotation) -> np.ndarray:
+    return np.degrees(quat_to_rpy(rotation)[:, 2])
+
+
+def test_frame_times_from_timestamps_or_frame_order():
+    np.testing.assert_allclose(
+        frame_times(["1000000000", "1500000000", "3000000000"]), [0.0, 0.5, 2.0]
+    )
+    np.testing.assert_allclose(frame_times(["a", "b"]), [0.0, 1.0])
+
+
+def test_fill_track_interpolates_between_key_frames():
+    filled = fill_track(
+        key_times=np.array([0.0, 2.0]),
+        position=np.array([[0.0, 0.0, 0.0], [2.0, 4.0, 0.0]]),
+        rotation=yaw_quat([0.0, 40.0]),
+        scale=np.array([[4.0, 2.0, 1.0], [6.0, 2.0, 1.0]]),
+        query_times=np.array([0.5, 1.0]),
+    )
+
+    assert filled["valid"].tolist() == [True, True]
+    np.testing.assert_allclose(filled["position"], [[0.5, 1.0, 0.0], [1.0, 2.0, 0.0]])
+    np.testing.assert_allclose(filled["scale"][:, 0], [4.5, 5.0])
+    np.testing.assert_allclose(quat_yaw(filled["rotation"]), [10.0, 20.0])
+
+
+def test_fill_track_extrapolates_at_half_the_last_velocity():
+    key_times = np.array([0.0, 1.0])
+    position = np.array([[0.0, 0.0, 0.0], [2.0, 0.0, 0.0]])
+    scale = np.ones((2, 3))
+    rotation = yaw_quat([0.0, 10.0])
+    query_times = np.array([-1.0, 3.0])
+
+    filled = fill_track(key_times, position, rotation, scale, query_times)
+    assert filled["valid"].tolist() == [True, True]
+    np.testing.assert_allclose(filled["position"][:, 0], [-1.0, 4.0])
+    np.testing.assert_allclose(quat_yaw(filled["rotation"]), [-5.0, 20.0])
+
+    filled = fill_track(
+        key_times, position, rotation, scale, query_times, extrapolate=False
+    )
+    assert filled["valid"].tolist() == [False, False]
+
+
+def test_fill_track_single_key_frame_holds_the_box():
+    filled = fill_track(
+        np.array([1.0]),
+        np.array([[3.0, 1.0, 0.0]]),
+        yaw_quat([30.0]),
+        np.ones((1, 3)),
+        np.array([0.0, 1.0, 5.0]),
+    )
+    assert filled["valid"].all()
+    np.testing.assert_allclose(filled["position"], [[3.0, 1.0, 0.0]] * 3)
+    np.testing.assert_allclose(quat_yaw(filled["rotation"]), [30.0] * 3)
+
+
+def make_tracks(yaw_degrees, frame_index, obj_ids=None, num_frames=6):
+    """one box per (obj_id, frame), x position equal to the frame index"""
+    frame_index = np.asarray(frame_index)
+    obj_ids = np.asarray(obj_ids if obj_ids is not None else ["1"] * len(frame_index))
+    position = np.zeros((len(frame_index), 3))
+    position[:, 0] = frame_index
+    return pack_tracks(
+        obj_ids,
+        frame_index,
+        position,
+        yaw_quat(yaw_degrees),
+        np.ones((len(frame_index), 3)),
+        num_frames,
+    )
+
+
+def test_pack_tracks_pads_missing_frames_and_keeps_first_duplicate():
+    obj_ids, states, mask, rows = make_tracks(
+        [0.0, 10.0, 20.0, 30.0], [0, 2, 2, 1], obj_ids=["b", "b", "b", "a"]
+    )
+
+    assert obj_ids == ["a", "b"]
+    assert states.shape == (2, 6, 9)
+    assert mask.tolist() == [
+        [False, True, False, False, False, False],
+        [True, False, True, False, False, False],
+    ]
+    assert rows.tolist() == [[-1, 3, -1, -1, -1, -1], [0, -1, 1, -1, -1, -1]]
+    np.testing.assert_allclose(np.degrees(states[1, 2, 8]), 10.0)
+    assert reference_rows(rows).tolist() == [[3, 3, 3, 3, 3, 3], [0, 0, 1, 1, 1, 1]]
+
+
+def test_unwrap_angles_across_pi():
+    _, states, mask, _ = make_tracks([170.0, -170.0, -150.0], [0, 2, 3])
+    yaw = np.degrees(unwrap_angles(states, mask)[0, mask[0], 8])
+    np.testing.assert_allclose(yaw, [170.0, 190.0, 210.0])
+
+
+def test_smooth_tracks_fills_gaps_through_the_unwrapped_yaw():
+    _, states, mask, _ = make_tracks([170.0, -170.0], [0, 2])
+    smoothed, smoothed_mask = smooth_tracks(states, mask, np.arange(6.0))
+
+    assert smoothed_mask[0].tolist() == [True, True, True, False, False, False]
+    np.testing.assert_allclose(smoothed[0, 1, 0], 1.0)
+    # the short way round, not through 0
+    np.testing.assert_allclose(np.degrees(smoothed[0, 1, 8]), 180.0)
+
+
+def test_smooth_tracks_max_gap_and_no_interpolation():
+    _, states, mask, _ = make_tracks([0.0, 0.0, 0.0], [0, 1, 4])
+
+    _, filled = smooth_tracks(states, mask, np.arange(6.0), max_gap=1)
+    assert filled[0].tolist() == mask[0].tolist()
+    _, filled = smooth_tracks(states, mask, np.arange(6.0), max_gap=2)
+    assert filled[0, :5].all()
+    _, filled = smooth_tracks(states, mask, np.arange(6.0), interpolate=False)
+    assert filled[0].tolist() == mask[0].tolist()
+
+
+def test_smooth_tracks_window_averages_valid_frames_only():
+    _, states, mask, _ = make_tracks([0.0] * 4, [0, 1, 2, 5])
+    states[0, 1, 0] = 4.0
+    smoothed, _ = smooth_tracks(
+        states, mask, np.arange(6.0), interpolate=False, window=3
+    )
+
+    np.testing.assert_allclose(smoothed[0, [0, 1, 2, 5], 0], [2.0, 2.0, 3.0, 5.0])
+
+
+def test_smooth_tracks_extrapolates_a_limited_number_of_frames():
+    _, states, mask, _ = make_tracks([0.0, 20.0], [2, 3])
+    smoothed, smoothed_mask = smooth_tracks(
+        states, mask, np.arange(6.0), extrapolate_frames=1
+    )
+
+    assert smoothed_mask[0].tolist() == [False, True, True, True, True, False]
+    # half of the last step: 0.5 per frame in x, 10 degrees per frame in yaw
+    np.testing.assert_allclose(smoothed[0, [1, 4], 0], [1.5, 3.5])
+    np.testing.assert_allclose(np.degrees(smoothed[0, [1, 4], 8]), [-10.0, 30.0])
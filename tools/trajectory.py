@@ -0,0 +1,282 @@
+# tools/trajectory.py
+"""目标轨迹的插值与外推
+
+在整条轨迹上向量化计算：已标注帧之间按时间线性插值位置与尺寸、球面插值旋转；
+首尾之外按 MAFilter 的速度外推（见 algos/trajectory.py）。
+多目标时把轨迹打包为 (目标数, 帧数, 9) 的数组与有效掩码，一次处理整个场景。
+"""
+
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+from scipy.spatial.transform import Rotation as R, Slerp
+
+
+def frame_times(frames: Sequence[str]) -> np.ndarray:
+    """帧 ID 转为时间轴（秒）；帧 ID 不全是纳秒时间戳时退化为帧序号"""
+    if frames and all(frame.isdigit() for frame in frames):
+        ns = np.array([int(frame) for frame in frames], dtype=np.int64)
+        return (ns - ns[0]) / 1e9
+    return np.arange(len(frames), dtype=np.float64)
+
+
+def fill_track(
+    key_times: np.ndarray,
+    position: np.ndarray,
+    rotation: np.ndarray,
+    scale: np.ndarray,
+    query_times: np.ndarray,
+    extrapolate: bool = True,
+) -> Dict[str, np.ndarray]:
+    """
+    根据已标注的关键帧计算 query_times 处的框
+
+    Args:
+        key_times: (K,) 关键帧时间，严格递增
+        position / rotation / scale: (K,3) / (K,4, xyzw) / (K,3) 关键帧的框
+        query_times: (M,) 待计算的时间
+        extrapolate: 是否计算首尾关键帧之外的时间
+
+    Returns:
+        valid (M,) 是否计算了该时间，以及 position / rotation / scale
+        (M,3) / (M,4) / (M,3)，valid 为 False 的行无意义
+    """
+    key_times = np.asarray(key_times, dtype=np.float64)
+    query_times = np.asarray(query_times, dtype=np.float64)
+    linear = np.concatenate([position, scale], axis=1)
+    rotations = R.from_quat(rotation)
+
+    out_linear = np.zeros((len(query_times), 6))
+    out_rotation = np.tile([0.0, 0.0, 0.0, 1.0], (len(query_times), 1))
+
+    inside = (query_times >= key_times[0]) & (query_times <= key_times[-1])
+    if inside.any() and len(key_times) > 1:
+        t = query_times[inside]
+        i = np.clip(
+            np.searchsorted(key_times, t, side="right") - 1, 0, len(key_times) - 2
+        )
+        w = ((t - key_times[i]) / (key_times[i + 1] - key_times[i]))[:, None]
+        out_linear[inside] = linear[i] * (1 - w) + linear[i + 1] * w
+        out_rotation[inside] = Slerp(key_times, rotations)(t).as_quat()
+    elif inside.any():
+        out_linear[inside] = linear[0]
+        out_rotation[inside] = rotation[0]
+
+    valid = inside.copy()
+    if extrapolate:
+        # MAFilter 的递推 v = 0.5 * v + 0.5 * (x_k - (x_{k-1} + v)) 化简后
+        # 速度恒为最后一步变化量的一半，这里按时间换算为每秒速度
+        for side, last, prev in (
+            (query_times > key_times[-1], -1, -2),
+            (query_times < key_times[0], 0, 1),
+        ):
+            if not side.any():
+                continue
+            dt = (query_times[side] - key_times[last])[:, None]
+            if len(key_times) > 1:
+                step = key_times[last] - key_times[prev]
+                v_linear = 0.5 * (linear[last] - linear[prev]) / step
+                v_rotation = (
+                    0.5 * (rotations[last] * rotations[prev].inv()).as_rotvec() / step
+                )
+            else:
+                v_linear = np.zeros(6)
+                v_rotation = np.zeros(3)
+            out_linear[side] = linear[last] + v_linear * dt
+            out_rotation[side] = (
+                R.from_rotvec(v_rotation * dt) * rotations[last]
+            ).as_quat()
+            valid |= side
+
+    return {
+        "valid": valid,
+        "position": out_linear[:, :3],
+        "rotation": out_rotation,
+        "scale": np.maximum(out_linear[:, 3:], 0.0),
+    }
+
+
+# 批量轨迹的状态：position (3), scale (3), rotation (roll, pitch, yaw)
+STATE_DIM = 9
+
+
+def quat_to_rpy(rotation: np.ndarray) -> np.ndarray:
+    """(N,4) xyzw 四元数 -> (N,3) roll, pitch, yaw"""
+    return R.from_quat(rotation).as_euler("ZYX")[:, ::-1]
+
+
+def rpy_to_quat(rpy: np.ndarray) -> np.ndarray:
+    return R.from_euler("ZYX", rpy[:, ::-1]).as_quat()
+
+
+def pack_tracks(
+    obj_ids: np.ndarray,
+    frame_index: np.ndarray,
+    position: np.ndarray,
+    rotation: np.ndarray,
+    scale: np.ndarray,
+    num_frames: int,
+):
+    """
+    把逐框的行打包为 (目标数, 帧数, 9) 的补齐数组
+
+    Args:
+        obj_ids / frame_index: (N,) 每行的目标 ID 与所在帧的序号
+        position / rotation / scale: (N,3) / (N,4) / (N,3)
+        num_frames: 帧数
+
+    Returns:
+        (目标 ID 列表, states (O,F,9), mask (O,F), rows (O,F) 来源行号，无框为 -1)；
+        同一帧内重复的目标只取第一行
+    """
+    unique_ids, obj_index = np.unique(obj_ids, return_inverse=True)
+    rows = np.full((len(unique_ids), num_frames), -1, dtype=np.int64)
+    # 倒序赋值，重复时保留第一行
+    order = np.arange(len(obj_index))[::-1]
+    rows[obj_index[order], frame_index[order]] = order
+
+    mask = rows >= 0
+    states = np.zeros((len(unique_ids), num_frames, STATE_DIM))
+    source = rows[mask]
+    states[mask] = np.concatenate(
+        [position[source], scale[source], quat_to_rpy(rotation[source])], axis=1
+    )
+    return unique_ids.tolist(), states, mask, rows
+
+
+def _prev_valid(mask: np.ndarray) -> np.ndarray:
+    """每个位置及之前最近的有效帧序号，没有为 -1"""
+    index = np.where(mask, np.arange(mask.shape[1]), -1)
+    return np.maximum.accumulate(index, axis=1)
+
+
+def _next_valid(mask: np.ndarray) -> np.ndarray:
+    """每个位置及之后最近的有效帧序号，没有为帧数"""
+    num_frames = mask.shape[1]
+    index = np.where(mask, np.arange(num_frames), num_frames)
+    return np.minimum.accumulate(index[:, ::-1], axis=1)[:, ::-1]
+
+
+def _take(states: np.ndarray, index: np.ndarray) -> np.ndarray:
+    index = np.clip(index, 0, states.shape[1] - 1)
+    return np.take_along_axis(states, index[..., None], axis=1)
+
+
+def unwrap_angles(states: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """沿每条轨迹的有效帧展开角度，使相邻有效帧的角度差在 [-pi, pi)"""
+    states = states.copy()
+    angles = states[..., 6:]
+    prev = _prev_valid(np.pad(mask, ((0, 0), (1, 0)))[:, :-1]) - 1  # 严格在前
+    delta = angles - _take(angles, prev)
+    delta = (delta + np.pi) % (2 * np.pi) - np.pi
+    delta = np.where((mask & (prev >= 0))[..., None], delta, 0.0)
+    first = _take(angles, _next_valid(mask)[:, :1])
+    states[..., 6:] = first + np.cumsum(delta, axis=1)
+    return states
+
+
+def smooth_tracks(
+    states: np.ndarray,
+    mask: np.ndarray,
+    times: np.ndarray,
+    interpolate: bool = True,
+    max_gap: Optional[int] = None,
+    window: int = 1,
+    extrapolate_frames: int = 0,
+):
+    """
+    对全部轨迹同时插值、平滑和外推
+
+    Args:
+        states: (O,F,9) pack_tracks 的状态
+        mask: (O,F) 有框的位置
+        times: (F,) 帧时间
+        interpolate: 是否按时间线性插值填补轨迹中间缺失的帧
+        max_gap: 只填补不超过该帧数的缺口，None 不限制
+        window: 滑动平均窗口（帧数，奇数），1 表示不平滑
+        extrapolate_frames: 在轨迹首尾之外按 MAFilter 速度外推的帧数
+
+    Returns:
+        (states, mask)，角度已展开
+    """
+    states = unwrap_angles(states, mask)
+    num_frames = mask.shape[1]
+    frame = np.arange(num_frames)
+
+    if interpolate:
+        prev, nxt = _prev_valid(mask), _next_valid(mask)
+        gap = ~mask & (prev >= 0) & (nxt < num_frames)
+        if max_gap is not None:
+            gap &= nxt - prev - 1 <= max_gap
+        t0, t1 = (
+            times[np.clip(prev, 0, None)],
+            times[np.clip(nxt, None, num_frames - 1)],
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            w = np.where(gap, (times[frame] - t0) / (t1 - t0), 0.0)[..., None]
+        filled = _take(states, prev) * (1 - w) + _take(states, nxt) * w
+        states = np.where(gap[..., None], filled, states)
+        mask = mask | gap
+
+    if window > 1:
+        # 只在有效帧上做居中滑动平均：窗口内有效帧之和 / 有效帧数
+        half = window // 2
+        weights = mask[..., None].astype(np.float64)
+        cum_sum = np.pad(np.cumsum(states * weights, axis=1), ((0, 0), (1, 0), (0, 0)))
+        cum_cnt = np.pad(np.cumsum(weights, axis=1), ((0, 0), (1, 0), (0, 0)))
+        hi = np.minimum(frame + half + 1, num_frames)
+        lo = np.maximum(frame - half, 0)
+        total = cum_sum[:, hi] - cum_sum[:, lo]
+        count = cum_cnt[:, hi] - cum_cnt[:, lo]
+        states = np.where(mask[..., None], total / np.maximum(count, 1.0), states)
+
+    if extrapolate_frames > 0:
+        # MAFilter 的速度为最后一步变化量的一半，按时间换算
+        prev, nxt = _prev_valid(mask), _next_valid(mask)
+        for edge, neighbour, outside in (
+            (
+                prev[:, -1:],
+                _prev_valid(mask & (frame < prev[:, -1:]))[:, -1:],
+                frame > prev[:, -1:],
+            ),
+            (
+                nxt[:, :1],
+                _next_valid(mask & (frame > nxt[:, :1]))[:, :1],
+                frame < nxt[:, :1],
+            ),
+        ):
+            has_track = (edge >= 0) & (edge < num_frames)
+            reach = outside & has_track & (np.abs(frame - edge) <= extrapolate_frames)
+            has_pair = (neighbour >= 0) & (neighbour < num_frames)
+            x_edge, x_neighbour = _take(states, edge), _take(states, neighbour)
+            t_edge, t_neighbour = (
+                times[np.clip(edge, 0, num_frames - 1)],
+                times[np.clip(neighbour, 0, num_frames - 1)],
+            )
+            with np.errstate(divide="ignore", invalid="ignore"):
+                v = np.where(
+                    has_pair[..., None],
+                    0.5 * (x_edge - x_neighbour) / (t_edge - t_neighbour)[..., None],
+                    0.0,
+                )
+            extrapolated = x_edge + v * (
+                times[frame][None, :, None] - t_edge[..., None]
+            )
+            states = np.where(reach[..., None], extrapolated, states)
+            mask = mask | reach
+
+    states[..., 3:6] = np.maximum(states[..., 3:6], 0.0)
+    return states, mask
+
+
+def reference_rows(rows: np.ndarray) -> np.ndarray:
+    """
+    每个位置的参考来源行：有框用自身，否则用之前最近的框，之前没有则用之后最近的框
+
+    用于给补出的框沿用类别、属性等字段；整条轨迹无框时为 -1
+    """
+    mask = rows >= 0
+    prev, nxt = _prev_valid(mask), _next_valid(mask)
+    ref = np.where(prev >= 0, prev, nxt)
+    ref_rows = np.take_along_axis(rows, np.clip(ref, 0, rows.shape[1] - 1), axis=1)
+    return np.where(ref < rows.shape[1], ref_rows, -1)